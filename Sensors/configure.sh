@@ -50,6 +50,7 @@ done
 echo "All crontab files updated with the current directory: $CURRENT_DIR"
 
 ./deploy/enable-actuator.sh
+./deploy/enable-collector.sh
 ./deploy/enable-crontab-jobs.sh
 
 echo "Configuration of the sensors and te actuator is done"
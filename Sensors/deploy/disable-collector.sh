@@ -0,0 +1,7 @@
+#!/bin/bash
+
+# Stop and disable the collector service
+sudo systemctl stop collector.service
+sudo systemctl disable collector.service
+
+echo "Service collector has been disabled and stopped."
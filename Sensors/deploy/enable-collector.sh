@@ -0,0 +1,30 @@
+#!/bin/bash
+
+# Get the current user
+CURRENT_USER=$(whoami)
+
+# The collector is run as a module from the Sensors directory
+SCRIPT_DIR=$(pwd)
+SERVICE_FILE="/etc/systemd/system/collector.service"
+
+# Create the systemd service file with the current user as the User
+echo "[Unit]
+Description=Sensors Collector Service
+After=network.target
+
+[Service]
+WorkingDirectory=$SCRIPT_DIR
+ExecStart=/usr/bin/python3 -m services.collector
+Restart=always
+User=$CURRENT_USER
+Environment=PYTHONUNBUFFERED=1
+
+[Install]
+WantedBy=multi-user.target" | sudo tee $SERVICE_FILE > /dev/null
+
+# Reload systemd, start, and enable the service
+sudo systemctl daemon-reload
+sudo systemctl start collector.service
+sudo systemctl enable collector.service
+
+echo "Service collector has been set up, started, and will run on startup."
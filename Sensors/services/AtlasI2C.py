@@ -1,5 +1,6 @@
 #!/usr/bin/python
 
+import asyncio
 import io
 import sys
 import fcntl
@@ -167,6 +168,20 @@ class AtlasI2C:
             time.sleep(current_timeout)
             return self.read()
 
+    async def query_async(self, command):
+        '''
+        same as query, but the event loop keeps running while the board
+        processes the command. writing and reading /dev/i2c only take a few
+        milliseconds, only the wait is awaited
+        '''
+        self.write(command)
+        current_timeout = self.get_command_timeout(command=command)
+        if not current_timeout:
+            return "sleep mode"
+        else:
+            await asyncio.sleep(current_timeout)
+            return self.read()
+
     def close(self):
         self.file_read.close()
         self.file_write.close()
@@ -188,3 +203,49 @@ class AtlasI2C:
         self.set_i2c_address(prev_addr)
 
         return i2c_devices
+
+
+def query_all(devices, command):
+    '''
+    write a command to several boards, wait once for the longest timeout,
+    then read every response. each board has its own file streams bound to
+    its address, so the boards process the command at the same time instead
+    of one after the other
+    returns the response of each device, in order, or the IOError raised
+    while querying it
+    '''
+    responses = [None] * len(devices)
+    timeout = 0
+    for index, device in enumerate(devices):
+        try:
+            device.write(command)
+        except IOError as e:
+            responses[index] = e
+            continue
+        current_timeout = device.get_command_timeout(command=command)
+        if current_timeout:
+            timeout = max(timeout, current_timeout)
+        else:
+            responses[index] = "sleep mode"
+    time.sleep(timeout)
+    for index, device in enumerate(devices):
+        if responses[index] is not None:
+            continue
+        try:
+            responses[index] = device.read()
+        except IOError as e:
+            responses[index] = e
+    return responses
+
+
+async def query_all_async(devices, command):
+    '''
+    same as query_all, from an event loop: every board processes the command
+    at the same time
+    returns the response of each device, in order, or the error raised
+    while querying it
+    '''
+    return await asyncio.gather(
+        *(device.query_async(command) for device in devices),
+        return_exceptions=True,
+    )
@@ -4,7 +4,12 @@ import time
 import requests
 import json
 import os
-from constants import OFF, ON, SERVER_URL, PUMP_PIN
+from constants import OFF, ON, SERVER_URL, PUMP_PIN, ACTUATOR_SUBSCRIBE
+
+# The server sends a keep-alive every 15 seconds on the state stream
+STREAM_READ_TIMEOUT = 45
+# Time to wait before subscribing again after the stream failed
+RESUBSCRIBE_DELAY = 10
 
 def get_raspberry_pi_model():
     try:
@@ -32,6 +37,7 @@ class Actuator:
         self.is_connected = True
         self.actuator_id = id
         self.activate = False
+        self.last_activation = None
         self.stop_pump()
 
     def start_pump(self):
@@ -44,31 +50,74 @@ class Actuator:
         self.pump_line.release()
         self.chip.close()
 
+    def activate_pump(self):
+        self.start_pump()
+        time.sleep(self.duration)
+        self.stop_pump()
+        self.last_activation = time.monotonic()
+        requests.patch(f"{SERVER_URL}/actuators/{self.actuator_id}/last_activated", data={})
+        self.activate = False
+
+    def update_state(self, data):
+        print(data)
+        self.activate, status, self.duration , self.period = data["activate"], data["status"], data["duration"], data["period"]
+        print(f"Status: {status}, Duration: {self.duration}, Period: {self.period}")
+
+    def poll_state(self):
+        response = requests.get(f"{SERVER_URL}/actuators/{self.actuator_id}/state")
+        if response.status_code == 200:
+            self.update_state(response.json())
+        else:
+            print(f" error status code : {response.status_code} ")
+
     def initLoop(self):
         print("Starting actuator loop")
         while(self.is_connected):
             if(self.activate):
-                self.start_pump()
-                time.sleep(self.duration)
-                self.stop_pump()
-                requests.patch(f"{SERVER_URL}/actuators/{self.actuator_id}/last_activated", data={})
-                self.activate = False
+                self.activate_pump()
             time.sleep(self.period)
-            response = requests.get(f"{SERVER_URL}/actuators/{self.actuator_id}/state")
-            if response.status_code == 200:
-                data = response.json()
-                print(data)
-                self.activate, status, self.duration , self.period = data["activate"], data["status"], data["duration"], data["period"]
-                print(f"Status: {status}, Duration: {self.duration}, Period: {self.period}")
-            else:
-                print(f" error status code : {response.status_code} ")
+            self.poll_state()
+
+    def subscribeLoop(self):
+        # The server pushes a new state whenever the sensor of the actuator receives a measurement
+        print("Starting actuator subscription")
+        while(self.is_connected):
+            try:
+                with requests.get(
+                    f"{SERVER_URL}/actuators/{self.actuator_id}/state/stream",
+                    stream=True,
+                    timeout=(5, STREAM_READ_TIMEOUT),
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not line or not line.startswith("data:"):
+                            continue
+                        self.update_state(json.loads(line[len("data:"):]))
+                        # States sent while the pump was running predate its last activation
+                        if self.last_activation is not None and time.monotonic() - self.last_activation < self.period:
+                            self.activate = False
+                            continue
+                        if(self.activate):
+                            self.activate_pump()
+            except (requests.RequestException, ValueError) as e:
+                print(f"State stream failed : {e}, polling until the next subscription")
+                try:
+                    self.poll_state()
+                    if(self.activate):
+                        self.activate_pump()
+                except requests.RequestException as e:
+                    print(f"Polling failed : {e}")
+                time.sleep(RESUBSCRIBE_DELAY)
 
 #TODO décider de la fréquence à laquelle le raspberry pi verifie si il doit activer la pompe
     
 
 def main():
     actuator = Actuator(PUMP_PIN,1)
-    actuator.initLoop()
+    if ACTUATOR_SUBSCRIBE:
+        actuator.subscribeLoop()
+    else:
+        actuator.initLoop()
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,6 @@
 from .AtlasI2C import (
-     AtlasI2C
+     AtlasI2C,
+     query_all
 )
 import time
 import re
@@ -15,11 +16,42 @@ logging.basicConfig(format = log_format, level = logging.DEBUG)
 logger = logging.getLogger()
 
 
+def parse_value(response) :
+    # The boards answer with an error code while they are still taking the reading
+    if not response.startswith("Success"):
+        raise ValueError(response)
+    to_convert = re.findall(r'\d+(?:\.\d+)?', response)
+    return float(to_convert[1])
+
+
+def read_value(device) :
+    return parse_value(device.query('R'))
+
+
+def read_all(devices) :
+    """
+    Reads several sensors at once: the boards take their readings at the same time, so reading
+    all the sensors takes as long as reading one.
+    Args:
+        devices (dict[str, AtlasI2C]): The device of each sensor ID.
+    Returns:
+        dict[str, float]: The value read for each sensor ID. Sensors that could not be read are left out.
+    """
+    values = {}
+    responses = query_all(list(devices.values()), 'R')
+    for sensor_id, response in zip(devices, responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            values[sensor_id] = parse_value(response)
+        except (OSError, ValueError, IndexError) as e:
+            logging.error(f"Sensor {sensor_id} could not be read: {e}")
+    return values
+
+
 def get_value(addr) :
     device = AtlasI2C(address=addr, moduletype="EC", name="Patch")
-    value = device.query('R')
-    to_convert = re.findall(r'\d+(?:\.\d+)?', value)
-    return float(to_convert[1])
+    return read_value(device)
 
 
 def main():
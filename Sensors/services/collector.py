@@ -0,0 +1,141 @@
+import logging
+import random
+import signal
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from .AtlasI2C import AtlasI2C
+from .atlas_main import read_all
+from .constants import (
+    COLLECT_PERIOD,
+    MEASUREMENT_BUFFER_PATH,
+    SENSOR_ID_TO_I2C_ADDR,
+    SERVER_URL,
+    UPLOAD_BATCH_SIZE,
+    UPLOAD_RETRY_MAX_DELAY,
+    UPLOAD_RETRY_MIN_DELAY,
+)
+from .measurement_buffer import MeasurementBuffer
+
+log_format = "%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s"
+logging.basicConfig(format = log_format, level = logging.INFO, force = True)
+
+logger = logging.getLogger("collector")
+
+# Time to wait for the server to answer a batch
+UPLOAD_TIMEOUT = (5, 30)
+
+
+class Collector:
+    """
+    Reads every sensor of SENSOR_ID_TO_I2C_ADDR each COLLECT_PERIOD seconds and appends the readings
+    to the on-disk buffer. An uploader thread drains the buffer to /measurements/batch, so readings
+    taken while the server is unreachable are sent once it is back.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.stopping = threading.Event()
+        self.new_readings = threading.Event()
+        # The devices are opened once, instead of once per reading
+        self.devices = {}
+        for sensor_id, addr in SENSOR_ID_TO_I2C_ADDR.items():
+            self.devices[sensor_id] = AtlasI2C(address=addr, moduletype="EC", name="Patch")
+        self.session = requests.Session()
+
+    def collect(self):
+        timestamp = datetime.now().astimezone()
+        for sensor_id, value in read_all(self.devices).items():
+            self.buffer.append(sensor_id, value, timestamp)
+            logger.debug(f"Sensor {sensor_id} read: {value}")
+        self.new_readings.set()
+
+    def collectLoop(self):
+        next_collect = time.monotonic()
+        while not self.stopping.is_set():
+            self.collect()
+            # Keep the schedule even if reading the sensors takes a few seconds
+            next_collect += COLLECT_PERIOD
+            self.stopping.wait(max(0, next_collect - time.monotonic()))
+
+    def upload(self, readings):
+        """
+        Sends a batch of readings to the server.
+        Args:
+            readings (list[tuple[int, int, float, str]]): Readings of the buffer, see MeasurementBuffer.peek.
+        Returns:
+            bool: True if the readings can be removed from the buffer, False if they must be sent again.
+        """
+        measurements = [
+            {"sensor_id": sensor_id, "value": value, "timestamp": timestamp}
+            for _, sensor_id, value, timestamp in readings
+        ]
+        try:
+            response = self.session.post(f"{SERVER_URL}/measurements/batch", json=measurements, timeout=UPLOAD_TIMEOUT)
+        except requests.RequestException as e:
+            logger.warning(f"Server unreachable, {len(readings)} readings kept in the buffer: {e}")
+            return False
+        if response.status_code == 200:
+            for rejection in response.json()["rejected"]:
+                logger.error(f"Reading of sensor {rejection['sensor_id']} rejected: {rejection['detail']}")
+            return True
+        if response.status_code == 422:
+            # Sending the same batch again would be rejected again and block the buffer
+            logger.error(f"Batch of {len(readings)} readings rejected, dropping it: {response.text}")
+            return True
+        logger.warning(f"Server answered {response.status_code}, {len(readings)} readings kept in the buffer")
+        return False
+
+    def uploadLoop(self):
+        retry_delay = UPLOAD_RETRY_MIN_DELAY
+        while not self.stopping.is_set():
+            readings = self.buffer.peek(UPLOAD_BATCH_SIZE)
+            if not readings:
+                self.new_readings.wait(COLLECT_PERIOD)
+                self.new_readings.clear()
+                continue
+            if self.upload(readings):
+                self.buffer.remove_up_to(readings[-1][0])
+                retry_delay = UPLOAD_RETRY_MIN_DELAY
+                continue
+            # Jitter keeps the Raspberry Pis from all retrying at the same time after an outage
+            self.stopping.wait(retry_delay * random.uniform(0.5, 1))
+            retry_delay = min(retry_delay * 2, UPLOAD_RETRY_MAX_DELAY)
+
+    def stop(self, *args):
+        self.stopping.set()
+        self.new_readings.set()
+
+    def run(self):
+        uploader = threading.Thread(target=self.uploadLoop, name="uploader", daemon=True)
+        uploader.start()
+        logger.info(f"Collecting sensors {', '.join(self.devices)} every {COLLECT_PERIOD} seconds")
+        try:
+            self.collectLoop()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            uploader.join()
+            for device in self.devices.values():
+                device.close()
+            self.session.close()
+
+
+def main():
+    buffer = MeasurementBuffer(MEASUREMENT_BUFFER_PATH)
+    logger.info(f"{len(buffer)} readings waiting in the buffer")
+    try:
+        collector = Collector(buffer)
+        # systemd stops the service with SIGTERM
+        signal.signal(signal.SIGTERM, collector.stop)
+        collector.run()
+    finally:
+        buffer.close()
+
+
+if __name__ == "__main__":
+    main()
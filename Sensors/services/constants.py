@@ -10,6 +10,19 @@ DISTANCE_RESERVOIR_REMPLI = 55
 #PIN utilisé pour la pompe
 PUMP_PIN = 26
 
+# L'actuateur reçoit son état du serveur à chaque nouvelle mesure (True) ou le demande à chaque période (False)
+ACTUATOR_SUBSCRIBE = True
+
+# Collecteur : lit tous les capteurs de SENSOR_ID_TO_I2C_ADDR toutes les COLLECT_PERIOD secondes
+COLLECT_PERIOD = 60
+# Les mesures attendent d'être envoyées au serveur dans ce fichier SQLite
+MEASUREMENT_BUFFER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "measurements_buffer.db")
+# Nombre maximal de mesures envoyées par requête à /measurements/batch
+UPLOAD_BATCH_SIZE = 500
+# Délai entre deux tentatives d'envoi, doublé à chaque échec jusqu'au maximum (en secondes)
+UPLOAD_RETRY_MIN_DELAY = 1
+UPLOAD_RETRY_MAX_DELAY = 300
+
 #ETAT DES PIN
 OFF = 0
 ON = 1
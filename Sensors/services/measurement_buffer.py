@@ -0,0 +1,70 @@
+import sqlite3
+import threading
+
+
+class MeasurementBuffer:
+    """
+    Measurements waiting to be sent to the server, kept on disk so that they survive
+    a restart of the Raspberry Pi or an outage of the server.
+    Readings are appended by the collector and removed by the uploader once the server has received them.
+    """
+
+    def __init__(self, path):
+        # The collector and the uploader run in different threads
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # A reading is on disk once append returns, even if the power goes out
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS measurements (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sensor_id INTEGER NOT NULL,
+                value REAL NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+        """)
+
+    def append(self, sensor_id, value, timestamp):
+        """
+        Adds a reading at the end of the buffer.
+        Args:
+            sensor_id (int): The ID of the sensor in the aquadash web app.
+            value (float): The value read.
+            timestamp (datetime): Time of the reading, timezone aware.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO measurements (sensor_id, value, timestamp) VALUES (?, ?, ?)",
+                (int(sensor_id), value, timestamp.isoformat()),
+            )
+
+    def peek(self, limit):
+        """
+        Returns the oldest readings of the buffer without removing them.
+        Args:
+            limit (int): Maximum number of readings to return.
+        Returns:
+            list[tuple[int, int, float, str]]: The ID in the buffer, sensor ID, value and ISO timestamp of each reading.
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT id, sensor_id, value, timestamp FROM measurements ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+
+    def remove_up_to(self, last_id):
+        """
+        Removes the readings up to the given buffer ID, once they were received by the server.
+        Args:
+            last_id (int): The buffer ID of the last reading to remove.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM measurements WHERE id <= ?", (last_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT count(*) FROM measurements").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -2,6 +2,7 @@
 # SPDX-FileCopyrightText: Copyright (c) 2020 Bryan Siepert for Adafruit Industries
 #
 # SPDX-License-Identifier: MIT
+import asyncio
 import time
 import board
 import adafruit_shtc3
@@ -26,6 +27,10 @@ def get_temperature_humidity():
     values['humidity'] = relative_humidity
     return values
 
+async def get_temperature_humidity_async():
+    # The driver waits for the measurement with time.sleep, it runs in the default executor
+    return await asyncio.get_running_loop().run_in_executor(None, get_temperature_humidity)
+
 if __name__ == '__main__':
     logging.info('Getting temperature and humidity')
     values = get_temperature_humidity();
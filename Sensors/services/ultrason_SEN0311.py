@@ -4,6 +4,7 @@ to deal in the Software without restriction, including without limitation the ri
 and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
 The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.'''
 
+import asyncio
 import serial
 import sys
 import os
@@ -59,8 +60,6 @@ class Ultrasound_Sensor:
     return (l[0] + l[1] + l[2])&0x00ff
 
   def _measure(self):
-    data = [0]*4
-    i = 0
     timenow = time.time()
 
     while (self._ser.inWaiting() < 4):
@@ -70,7 +69,15 @@ class Ultrasound_Sensor:
     
     rlt = self._ser.read(self._ser.inWaiting())
     #print(rlt)
-    
+    return self._parse(rlt)
+
+  def _parse(self, rlt):
+    '''
+      @brief    Decode the last frame of the bytes read from the sensor
+      @return    measured distance
+    '''
+    data = [0]*4
+    i = 0
     index = len(rlt)
     if(len(rlt) >= 4):
       index = len(rlt) - 4
@@ -120,9 +127,43 @@ class Ultrasound_Sensor:
   #CurrentMinValue = minimum water level
   #CurrentMaxValue = maximum water level
 
-'''End class declaration'''
 
-sensor = Ultrasound_Sensor()
+class Async_Ultrasound_Sensor(Ultrasound_Sensor):
+  '''
+    @brief    Same sensor, read from an asyncio event loop: the serial port is watched
+              by the loop instead of being polled every 10 ms
+  '''
+
+  async def getDistance(self):
+    '''
+      @brief    Get measured distance
+      @return    measured distance
+    '''
+    await self._measure()
+    return self.distance
+
+  async def _measure(self):
+    loop = asyncio.get_running_loop()
+    readable = asyncio.Event()
+    deadline = loop.time() + 1
+    rlt = b''
+    loop.add_reader(self._ser.fileno(), readable.set)
+    try:
+      while True:
+        rlt += self._ser.read(self._ser.inWaiting())
+        remaining = deadline - loop.time()
+        if len(rlt) >= 4 or remaining <= 0:
+          break
+        readable.clear()
+        try:
+          await asyncio.wait_for(readable.wait(), remaining)
+        except asyncio.TimeoutError:
+          pass
+    finally:
+      loop.remove_reader(self._ser.fileno())
+    return self._parse(rlt)
+
+'''End class declaration'''
 
 def print_distance(distance):
   if sensor.last_operate_status == sensor.STA_OK:
@@ -140,12 +181,14 @@ def print_distance(distance):
 
 
 if __name__ == "__main__":
+  # Opened here so that importing the drivers does not open the serial port
+  sensor = Async_Ultrasound_Sensor()
   #Minimum ranging threshold for sensor
   dis_min = 0
   #Highest ranging threshold for sensor
   dis_max = 4500
   sensor.set_dis_range(dis_min, dis_max)
-  distance = sensor.getDistance()
+  distance = asyncio.run(sensor.getDistance())
   pourcentage = sensor.DistanceToPercentage(distance, DISTANCE_RESERVOIR_VIDE, DISTANCE_RESERVOIR_REMPLI)
   requests.post(f'{SERVER_URL}/water_level', json={"value":pourcentage})
   #Delay time < 0.6s
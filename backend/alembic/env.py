@@ -21,6 +21,14 @@ if config.config_file_name is not None:
 from app import models
 target_metadata = models.Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The partitions of the measurements are created by the backend, see app.services.measurement_partitions
+    if type_ == "table" and reflected and compare_to is None and name.startswith("measurements_"):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -43,6 +51,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -66,7 +75,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,76 @@
+"""Retention policies
+
+Revision ID: 2f7b9d3e5a8c
+Revises: 6c2e8a4f1d3b
+Create Date: 2026-10-18 21:05:37.842116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f7b9d3e5a8c'
+down_revision: Union[str, Sequence[str], None] = '6c2e8a4f1d3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by the app at startup (create_all) already have the tables
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("retention_policies"):
+        op.create_table(
+            "retention_policies",
+            sa.Column(
+                "sensor_type",
+                postgresql.ENUM(name="sensortype", create_type=False),
+                primary_key=True,
+            ),
+            sa.Column("raw_days", sa.Integer(), nullable=True),
+            sa.Column("minute_days", sa.Integer(), nullable=True),
+            sa.Column("hour_days", sa.Integer(), nullable=True),
+            sa.Column("day_days", sa.Integer(), nullable=True),
+            sa.CheckConstraint(
+                "raw_days > 0 AND minute_days > 0 AND hour_days > 0 AND day_days > 0",
+                name="check_retention_days_positive",
+            ),
+        )
+    if not inspector.has_table("retention_runs"):
+        op.create_table(
+            "retention_runs",
+            sa.Column("run_id", sa.Integer(), primary_key=True),
+            sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("finished_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("partitions_dropped", sa.Integer(), nullable=False),
+            sa.Column("measurements_dropped", sa.Integer(), nullable=False),
+            sa.Column("measurements_deleted", sa.Integer(), nullable=False),
+            sa.Column("rollups_deleted", sa.Integer(), nullable=False),
+        )
+
+    # The retention deletes the raw measurements whose rollups it keeps: it sets aquapoly.keep_rollups
+    # so that their buckets are not recomputed from the remaining measurements
+    op.execute("""
+        CREATE OR REPLACE TRIGGER measurements_rollup_delete
+            AFTER DELETE ON measurements
+            REFERENCING OLD TABLE AS old_measurements
+            FOR EACH STATEMENT
+            WHEN (current_setting('aquapoly.keep_rollups', true) IS DISTINCT FROM 'on')
+            EXECUTE FUNCTION measurements_rollup_delete()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE TRIGGER measurements_rollup_delete
+            AFTER DELETE ON measurements
+            REFERENCING OLD TABLE AS old_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_rollup_delete()
+    """)
+    op.drop_table("retention_runs")
+    op.drop_table("retention_policies")
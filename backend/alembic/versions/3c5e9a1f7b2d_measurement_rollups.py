@@ -0,0 +1,107 @@
+"""Measurement rollups
+
+Revision ID: 3c5e9a1f7b2d
+Revises: b99bff401293
+Create Date: 2026-10-18 10:12:45.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e9a1f7b2d'
+down_revision: Union[str, Sequence[str], None] = 'b99bff401293'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_rollups_table() -> None:
+    op.create_table(
+        "measurement_rollups",
+        sa.Column("sensor_id", sa.Integer(), sa.ForeignKey("sensors.sensor_id"), nullable=False),
+        sa.Column("resolution", sa.Enum("minute", "hour", "day", name="rollupresolution"), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("min", sa.Float(), nullable=False),
+        sa.Column("max", sa.Float(), nullable=False),
+        sa.Column("sum", sa.Float(), nullable=False),
+        sa.Column("last_value", sa.Float(), nullable=False),
+        sa.Column("last_timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("sensor_id", "resolution", "bucket_start"),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by the app at startup (create_all) already have the table, but not the trigger
+    if not sa.inspect(op.get_bind()).has_table("measurement_rollups"):
+        create_rollups_table()
+    else:
+        op.execute("DELETE FROM measurement_rollups")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION measurements_rollup() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO measurement_rollups AS r
+                (sensor_id, resolution, bucket_start, count, min, max, sum, last_value, last_timestamp)
+            SELECT
+                n.sensor_id,
+                res.resolution,
+                date_trunc(res.resolution::text, n.timestamp, 'UTC'),
+                count(*),
+                min(n.value),
+                max(n.value),
+                sum(n.value),
+                (array_agg(n.value ORDER BY n.timestamp DESC))[1],
+                max(n.timestamp)
+            FROM new_measurements AS n
+            CROSS JOIN unnest(enum_range(NULL::rollupresolution)) AS res(resolution)
+            GROUP BY 1, 2, 3
+            ON CONFLICT (sensor_id, resolution, bucket_start) DO UPDATE SET
+                count = r.count + EXCLUDED.count,
+                min = LEAST(r.min, EXCLUDED.min),
+                max = GREATEST(r.max, EXCLUDED.max),
+                sum = r.sum + EXCLUDED.sum,
+                last_value = CASE WHEN EXCLUDED.last_timestamp >= r.last_timestamp
+                    THEN EXCLUDED.last_value ELSE r.last_value END,
+                last_timestamp = GREATEST(r.last_timestamp, EXCLUDED.last_timestamp);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE TRIGGER measurements_rollup
+            AFTER INSERT ON measurements
+            REFERENCING NEW TABLE AS new_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_rollup()
+    """)
+
+    # Backfill the rollups of the existing measurements
+    op.execute("""
+        INSERT INTO measurement_rollups
+            (sensor_id, resolution, bucket_start, count, min, max, sum, last_value, last_timestamp)
+        SELECT
+            m.sensor_id,
+            res.resolution,
+            date_trunc(res.resolution::text, m.timestamp, 'UTC'),
+            count(*),
+            min(m.value),
+            max(m.value),
+            sum(m.value),
+            (array_agg(m.value ORDER BY m.timestamp DESC))[1],
+            max(m.timestamp)
+        FROM measurements AS m
+        CROSS JOIN unnest(enum_range(NULL::rollupresolution)) AS res(resolution)
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS measurements_rollup ON measurements")
+    op.execute("DROP FUNCTION IF EXISTS measurements_rollup()")
+    op.drop_table("measurement_rollups")
+    sa.Enum(name="rollupresolution").drop(op.get_bind(), checkfirst=True)
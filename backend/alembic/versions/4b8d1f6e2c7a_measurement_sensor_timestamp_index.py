@@ -0,0 +1,88 @@
+"""Measurement sensor and timestamp index
+
+Revision ID: 4b8d1f6e2c7a
+Revises: 9e4b2d6f8a1c
+Create Date: 2026-10-18 18:40:27.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8d1f6e2c7a'
+down_revision: Union[str, Sequence[str], None] = '9e4b2d6f8a1c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def is_partitioned() -> bool:
+    # Databases created by the app at startup (create_all) have a partitioned table, see 6c2e8a4f1d3b,
+    # whose indexes can't be built concurrently
+    return op.get_bind().execute(
+        sa.text("SELECT EXISTS (SELECT FROM pg_partitioned_table WHERE partrelid = 'measurements'::regclass)")
+    ).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The measurements are written continuously: build the indexes without locking the table for writes
+    concurrently = not is_partitioned()
+    with op.get_context().autocommit_block():
+        # Databases created by the app at startup (create_all) already have the index.
+        # Ascending: new measurements go at the end of the range of their sensor, which keeps the pages full,
+        # and the latest ones are read with a backward scan
+        op.create_index(
+            "ix_measurements_sensor_id_timestamp",
+            "measurements",
+            ["sensor_id", "timestamp"],
+            postgresql_concurrently=concurrently,
+            if_not_exists=True,
+        )
+        # The composite index serves the lookups by sensor as well
+        op.drop_index(
+            "ix_measurements_sensor_id", "measurements", postgresql_concurrently=concurrently, if_exists=True
+        )
+        # Optional, with `alembic -x measurements_brin=1 upgrade head`: the measurements are inserted in timestamp
+        # order, so a BRIN index of a few hundred kB can replace the B-tree on the timestamp
+        if context.get_x_argument(as_dictionary=True).get("measurements_brin") == "1":
+            op.create_index(
+                "ix_measurements_timestamp_brin",
+                "measurements",
+                ["timestamp"],
+                postgresql_using="brin",
+                postgresql_with={"pages_per_range": 32},
+                postgresql_concurrently=concurrently,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                "ix_measurements_timestamp", "measurements", postgresql_concurrently=concurrently, if_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    concurrently = not is_partitioned()
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_measurements_timestamp",
+            "measurements",
+            ["timestamp"],
+            postgresql_concurrently=concurrently,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_measurements_timestamp_brin", "measurements", postgresql_concurrently=concurrently, if_exists=True
+        )
+        op.create_index(
+            "ix_measurements_sensor_id",
+            "measurements",
+            ["sensor_id"],
+            postgresql_concurrently=concurrently,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_measurements_sensor_id_timestamp", "measurements", postgresql_concurrently=concurrently, if_exists=True
+        )
@@ -0,0 +1,62 @@
+"""Measurement notifications
+
+Revision ID: 5d2f8c4e1a9b
+Revises: 3c5e9a1f7b2d
+Create Date: 2026-10-18 14:03:27.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8c4e1a9b'
+down_revision: Union[str, Sequence[str], None] = '3c5e9a1f7b2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION measurements_notify() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_notify('measurements', json_build_object(
+                    'measurement_id', n.measurement_id,
+                    'sensor_id', n.sensor_id,
+                    'value', n.value,
+                    'timestamp', n.timestamp
+                )::text)
+                FROM (
+                    SELECT DISTINCT ON (sensor_id) * FROM new_measurements ORDER BY sensor_id, timestamp DESC
+                ) AS n;
+            ELSE
+                PERFORM pg_notify('measurements', json_build_object('sensor_id', o.sensor_id, 'deleted', true)::text)
+                FROM (SELECT DISTINCT sensor_id FROM old_measurements) AS o;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE TRIGGER measurements_notify_insert
+            AFTER INSERT ON measurements
+            REFERENCING NEW TABLE AS new_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_notify()
+    """)
+    op.execute("""
+        CREATE OR REPLACE TRIGGER measurements_notify_delete
+            AFTER DELETE ON measurements
+            REFERENCING OLD TABLE AS old_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_notify()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS measurements_notify_delete ON measurements")
+    op.execute("DROP TRIGGER IF EXISTS measurements_notify_insert ON measurements")
+    op.execute("DROP FUNCTION IF EXISTS measurements_notify()")
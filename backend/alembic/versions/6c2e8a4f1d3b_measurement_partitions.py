@@ -0,0 +1,137 @@
+"""Measurement partitions
+
+Revision ID: 6c2e8a4f1d3b
+Revises: 4b8d1f6e2c7a
+Create Date: 2026-10-18 20:12:48.517209
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c2e8a4f1d3b'
+down_revision: Union[str, Sequence[str], None] = '4b8d1f6e2c7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same as services.measurement_partitions.PARTITION_MONTHS_AHEAD
+PARTITION_MONTHS_AHEAD = 3
+
+TRIGGERS = [
+    """
+        CREATE OR REPLACE TRIGGER measurements_rollup
+            AFTER INSERT ON measurements
+            REFERENCING NEW TABLE AS new_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_rollup()
+    """,
+    """
+        CREATE OR REPLACE TRIGGER measurements_rollup_delete
+            AFTER DELETE ON measurements
+            REFERENCING OLD TABLE AS old_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_rollup_delete()
+    """,
+    """
+        CREATE OR REPLACE TRIGGER measurements_notify_insert
+            AFTER INSERT ON measurements
+            REFERENCING NEW TABLE AS new_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_notify()
+    """,
+    """
+        CREATE OR REPLACE TRIGGER measurements_notify_delete
+            AFTER DELETE ON measurements
+            REFERENCING OLD TABLE AS old_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_notify()
+    """,
+]
+
+
+def is_partitioned() -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT EXISTS (SELECT FROM pg_partitioned_table WHERE partrelid = 'measurements'::regclass)")
+    ).scalar()
+
+
+def has_brin_index() -> bool:
+    # Optional index of 4b8d1f6e2c7a, kept by the conversion
+    return op.get_bind().execute(sa.text("SELECT to_regclass('ix_measurements_timestamp_brin') IS NOT NULL")).scalar()
+
+
+def create_measurements_table(old_table: str, partition_by: str = "") -> None:
+    """Renames the measurements table and creates an empty one in its place, the data is copied afterwards."""
+    op.execute(f"ALTER TABLE measurements RENAME TO {old_table}")
+    op.execute(f"ALTER TABLE {old_table} RENAME CONSTRAINT measurements_pkey TO {old_table}_pkey")
+    op.execute(f"""
+        CREATE TABLE measurements (
+            measurement_id INTEGER NOT NULL DEFAULT nextval('measurements_measurement_id_seq'::regclass),
+            sensor_id INTEGER NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            value FLOAT NOT NULL,
+            CONSTRAINT measurements_pkey PRIMARY KEY (measurement_id, timestamp),
+            CONSTRAINT check_id_measurement_positive CHECK (measurement_id >= 0),
+            CONSTRAINT measurements_sensor_id_fkey FOREIGN KEY (sensor_id) REFERENCES sensors (sensor_id)
+        ) {partition_by}
+    """)
+
+
+def fill_measurements_table(old_table: str, brin: bool) -> None:
+    """Moves the measurements to the new table, then indexes it and creates its triggers."""
+    # Before the triggers: the rollups already count these measurements
+    op.execute(
+        f"INSERT INTO measurements (measurement_id, sensor_id, timestamp, value) "
+        f"SELECT measurement_id, sensor_id, timestamp, value FROM {old_table}"
+    )
+    # Otherwise the sequence is dropped with the old table
+    op.execute("ALTER SEQUENCE measurements_measurement_id_seq OWNED BY measurements.measurement_id")
+    op.execute(f"DROP TABLE {old_table}")
+    op.create_index("ix_measurements_sensor_id_timestamp", "measurements", ["sensor_id", "timestamp"])
+    if brin:
+        op.create_index(
+            "ix_measurements_timestamp_brin",
+            "measurements",
+            ["timestamp"],
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        )
+    else:
+        op.create_index("ix_measurements_timestamp", "measurements", ["timestamp"])
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by the app at startup (create_all) are partitioned from the start, and the app creates
+    # the partitions
+    if is_partitioned():
+        return
+    # The measurements can't be written during the conversion: the collectors keep them until the server is back
+    brin = has_brin_index()
+    first = op.get_bind().execute(sa.text("SELECT min(timestamp) FROM measurements")).scalar()
+    create_measurements_table("measurements_unpartitioned", "PARTITION BY RANGE (timestamp)")
+
+    op.execute("CREATE TABLE measurements_default PARTITION OF measurements DEFAULT")
+    now = datetime.now(timezone.utc)
+    month = (first or now).astimezone(timezone.utc)
+    index = month.year * 12 + month.month - 1
+    last = now.year * 12 + now.month - 1 + PARTITION_MONTHS_AHEAD
+    while index <= last:
+        start = datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+        end = datetime((index + 1) // 12, (index + 1) % 12 + 1, 1, tzinfo=timezone.utc)
+        op.execute(
+            f"CREATE TABLE measurements_y{start.year:04d}m{start.month:02d} PARTITION OF measurements "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        index += 1
+
+    fill_measurements_table("measurements_unpartitioned", brin)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    brin = has_brin_index()
+    create_measurements_table("measurements_partitioned")
+    fill_measurements_table("measurements_partitioned", brin)
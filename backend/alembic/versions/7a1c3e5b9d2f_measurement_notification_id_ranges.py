@@ -0,0 +1,74 @@
+"""Measurement notification ID ranges
+
+Revision ID: 7a1c3e5b9d2f
+Revises: 5d2f8c4e1a9b
+Create Date: 2026-10-18 15:21:40.306218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1c3e5b9d2f'
+down_revision: Union[str, Sequence[str], None] = '5d2f8c4e1a9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION measurements_notify() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_notify('measurements', json_build_object(
+                    'measurement_id', n.measurement_id,
+                    'sensor_id', n.sensor_id,
+                    'value', n.value,
+                    'timestamp', n.timestamp,
+                    'first_measurement_id', ids.first_measurement_id,
+                    'last_measurement_id', ids.last_measurement_id
+                )::text)
+                FROM (
+                    SELECT DISTINCT ON (sensor_id) * FROM new_measurements ORDER BY sensor_id, timestamp DESC
+                ) AS n
+                JOIN (
+                    SELECT sensor_id, min(measurement_id) AS first_measurement_id, max(measurement_id) AS last_measurement_id
+                    FROM new_measurements GROUP BY sensor_id
+                ) AS ids USING (sensor_id);
+            ELSE
+                PERFORM pg_notify('measurements', json_build_object('sensor_id', o.sensor_id, 'deleted', true)::text)
+                FROM (SELECT DISTINCT sensor_id FROM old_measurements) AS o;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION measurements_notify() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_notify('measurements', json_build_object(
+                    'measurement_id', n.measurement_id,
+                    'sensor_id', n.sensor_id,
+                    'value', n.value,
+                    'timestamp', n.timestamp
+                )::text)
+                FROM (
+                    SELECT DISTINCT ON (sensor_id) * FROM new_measurements ORDER BY sensor_id, timestamp DESC
+                ) AS n;
+            ELSE
+                PERFORM pg_notify('measurements', json_build_object('sensor_id', o.sensor_id, 'deleted', true)::text)
+                FROM (SELECT DISTINCT sensor_id FROM old_measurements) AS o;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
@@ -0,0 +1,82 @@
+"""Measurement rollups on delete
+
+Revision ID: 9e4b2d6f8a1c
+Revises: 7a1c3e5b9d2f
+Create Date: 2026-10-18 17:02:11.640385
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b2d6f8a1c'
+down_revision: Union[str, Sequence[str], None] = '7a1c3e5b9d2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Min, max and last value cannot be decremented, so the buckets of the deleted rows are recomputed
+    # from the remaining measurements
+    op.execute("""
+        CREATE OR REPLACE FUNCTION measurements_rollup_delete() RETURNS trigger AS $$
+        BEGIN
+            WITH deleted_buckets AS (
+                SELECT DISTINCT
+                    o.sensor_id,
+                    res.resolution,
+                    date_trunc(res.resolution::text, o.timestamp, 'UTC') AS bucket_start
+                FROM old_measurements AS o
+                CROSS JOIN unnest(enum_range(NULL::rollupresolution)) AS res(resolution)
+            )
+            DELETE FROM measurement_rollups AS r
+            USING deleted_buckets AS b
+            WHERE r.sensor_id = b.sensor_id AND r.resolution = b.resolution AND r.bucket_start = b.bucket_start;
+
+            WITH deleted_buckets AS (
+                SELECT DISTINCT
+                    o.sensor_id,
+                    res.resolution,
+                    date_trunc(res.resolution::text, o.timestamp, 'UTC') AS bucket_start
+                FROM old_measurements AS o
+                CROSS JOIN unnest(enum_range(NULL::rollupresolution)) AS res(resolution)
+            )
+            INSERT INTO measurement_rollups
+                (sensor_id, resolution, bucket_start, count, min, max, sum, last_value, last_timestamp)
+            SELECT
+                b.sensor_id,
+                b.resolution,
+                b.bucket_start,
+                count(*),
+                min(m.value),
+                max(m.value),
+                sum(m.value),
+                (array_agg(m.value ORDER BY m.timestamp DESC))[1],
+                max(m.timestamp)
+            FROM deleted_buckets AS b
+            JOIN measurements AS m
+                ON m.sensor_id = b.sensor_id
+                AND m.timestamp >= b.bucket_start
+                AND m.timestamp < b.bucket_start + ('1 ' || b.resolution::text)::interval
+            GROUP BY 1, 2, 3;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE TRIGGER measurements_rollup_delete
+            AFTER DELETE ON measurements
+            REFERENCING OLD TABLE AS old_measurements
+            FOR EACH STATEMENT EXECUTE FUNCTION measurements_rollup_delete()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS measurements_rollup_delete ON measurements")
+    op.execute("DROP FUNCTION IF EXISTS measurements_rollup_delete()")
@@ -0,0 +1,6 @@
+import enum
+
+class ExportFormat(enum.Enum):
+    csv = "csv"
+    parquet = "parquet"
+    arrow = "arrow"
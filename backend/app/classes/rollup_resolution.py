@@ -0,0 +1,13 @@
+import enum
+from datetime import timedelta
+
+class RollupResolution(enum.Enum):
+    minute = "minute"
+    hour = "hour"
+    day = "day"
+
+resolution_width = {
+    RollupResolution.minute: timedelta(minutes=1),
+    RollupResolution.hour: timedelta(hours=1),
+    RollupResolution.day: timedelta(days=1),
+}
@@ -1,20 +1,25 @@
-from sqlalchemy import and_, insert, select, update
+from sqlalchemy import and_, delete, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 from app.classes.activation_condition import ActivationCondition
 from app.classes.actuator_type import ActuatorType
+from .classes.rollup_resolution import RollupResolution, resolution_width
 from .classes.sensor_type import SensorType
 
 from . import models, schemas
 import secrets
 from .security import authentification
 from .security import permissions
+from .services.measurement_cache import last_measurements
+from .services.measurement_triggers import measurement_triggers
 from datetime import datetime, timedelta
-import random, pytz
-from concurrent.futures import ThreadPoolExecutor
+import math, pytz
 
+# Buckets are aligned on this origin so that the same bucket width always yields the same bins
+BUCKET_ORIGIN = datetime(2000, 1, 1, tzinfo=pytz.UTC)
 
 
 def get_prototypes(db: Session, prototype_id: int | None = None):
@@ -79,6 +84,20 @@ def get_sensors(db: Session, prototype_id: int | None = None):
     return db.execute(query).scalars().all()
 
 
+def get_sensor(db: Session, sensor_id: int):
+    """
+    Retrieves a sensor from the database by its ID.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_id (int): The unique identifier of the sensor to retrieve.
+    Returns:
+        models.Sensor | None: The sensor instance if found, otherwise None.
+    """
+    query = select(models.Sensor).where(models.Sensor.sensor_id == sensor_id)
+
+    return db.execute(query).scalars().first()
+
+
 def post_sensor(db: Session, sensor: schemas.SensorBase):
     """
     Inserts a new sensor into the database.
@@ -120,6 +139,34 @@ def get_actuators(db: Session, prototype_id: int):
     return db.execute(request).scalars().all()
 
 
+def get_actuators_with_last_measurement(db: Session, prototype_id: int):
+    """
+    Retrieves all actuators of a prototype along with the latest measurement of their sensor, in a single query.
+    Args:
+        db (Session): SQLAlchemy session.
+        prototype_id (int): The ID of the prototype whose actuators are to be fetched.
+    Returns:
+        list[tuple[models.Actuator, models.Measurement | None]]: Each actuator of the prototype, sorted by ID,
+            with the latest measurement of its sensor, or None if the sensor has no measurements.
+    """
+    last_measurement = (
+        select(models.Measurement)
+        .where(models.Measurement.sensor_id == models.Actuator.sensor_id)
+        .order_by(models.Measurement.timestamp.desc())
+        .limit(1)
+        .lateral()
+    )
+    last_measurement_entity = aliased(models.Measurement, last_measurement)
+    query = (
+        select(models.Actuator, last_measurement_entity)
+        .join(models.Sensor, models.Sensor.sensor_id == models.Actuator.sensor_id)
+        .outerjoin(last_measurement, literal(True))
+        .where(models.Sensor.prototype_id == prototype_id)
+        .order_by(models.Actuator.actuator_id)
+    )
+    return db.execute(query).tuples().all()
+
+
 def get_actuator(db: Session, actuator_id: int):
     """
     Retrieves an actuator from the database by its ID.
@@ -167,6 +214,7 @@ def get_measurements(
 ):
     """
     Retrieves measurements for a given sensor within an optional time range.
+    start_time and end_time skip the monthly partitions outside the range, without them every partition is scanned.
     Args:
         db (Session): SQLAlchemy session.
         sensor_id (int): ID of the sensor to retrieve measurements for.
@@ -191,6 +239,8 @@ def get_measurements_delta(
     db: Session,
     sensor_id: int,
     time_delta: datetime,
+    bucket: timedelta | None = None,
+    max_points: int | None = None,
 ):
     """
     Retrieves measurements for a given sensor within a specified time delta.
@@ -198,34 +248,418 @@ def get_measurements_delta(
         db (Session): SQLAlchemy session.
         sensor_id (int): ID of the sensor to retrieve measurements for.
         time_delta (datetime): Time interval to look back from the current time.
+        bucket (timedelta, optional): If provided, aggregates the measurements in buckets of this width.
+        max_points (int, optional): If provided, aggregates the measurements in at most this many buckets.
     Returns:
-        List[models.Measurement]: List of measurements within the specified time delta.
+        List[models.Measurement] | list[Row]: List of measurements within the specified time delta,
+            or their aggregates (see get_measurement_buckets) if bucket or max_points is provided.
     Raises:
         None
     """
-    end_time = datetime.now()
+    end_time = datetime.now().astimezone()
     start_time = end_time - time_delta
+    if bucket is not None or max_points is not None:
+        return get_measurement_buckets(
+            db=db,
+            sensor_id=sensor_id,
+            start_time=start_time,
+            bucket=bucket,
+            max_points=max_points,
+        )
     return get_measurements(db=db, sensor_id=sensor_id, start_time=start_time)
 
 
+def get_bucket_width(
+    db: Session,
+    sensor_id: int,
+    max_points: int,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+):
+    """
+    Computes a bucket width, in whole seconds, that splits a time range into at most max_points buckets.
+    The width is rounded up to a multiple of a rollup resolution when that costs at most ~10% of the points,
+    so that the aggregation can be served from the rollups.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_id (int): ID of the sensor whose measurements will be aggregated.
+        max_points (int): Maximum number of buckets.
+        start_time (datetime, optional): Start of the time range. Defaults to the oldest measurement.
+        end_time (datetime, optional): End of the time range. Defaults to the newest measurement.
+    Returns:
+        timedelta | None: The bucket width, or None if the sensor has no measurements in the range.
+    """
+    if start_time is None or end_time is None:
+        request = select(
+            func.min(models.Measurement.timestamp), func.max(models.Measurement.timestamp)
+        ).where(models.Measurement.sensor_id == sensor_id)
+        if start_time:
+            request = request.where(models.Measurement.timestamp > start_time)
+        if end_time:
+            request = request.where(models.Measurement.timestamp < end_time)
+        first, last = db.execute(request).one()
+        if first is None:
+            return None
+        start_time = start_time or first
+        end_time = end_time or last
+
+    span = (end_time - start_time).total_seconds()
+    # Buckets are aligned on BUCKET_ORIGIN, so the range can overlap one more bucket than span / width
+    seconds = max(1, math.ceil(span / max(max_points - 1, 1)))
+    for resolution in reversed(RollupResolution):
+        resolution_seconds = int(resolution_width[resolution].total_seconds())
+        if seconds % resolution_seconds == 0 or seconds >= 10 * resolution_seconds:
+            seconds = math.ceil(seconds / resolution_seconds) * resolution_seconds
+            break
+    width = timedelta(seconds=seconds)
+
+    # A single bucket must contain the whole range once aligned, which is impossible if it spans BUCKET_ORIGIN
+    if max_points == 1 and (start_time >= BUCKET_ORIGIN or end_time < BUCKET_ORIGIN):
+        while _floor_to_width(start_time, width) != _floor_to_width(end_time, width):
+            width *= 2
+    return width
+
+
+def _floor_to_width(timestamp: datetime, width: timedelta) -> datetime:
+    """Returns the start of the bucket of the given width, aligned on BUCKET_ORIGIN, containing timestamp."""
+    return BUCKET_ORIGIN + ((timestamp.astimezone() - BUCKET_ORIGIN) // width) * width
+
+
+def _get_rollup_resolution(bucket: timedelta) -> RollupResolution | None:
+    """Returns the coarsest rollup resolution whose buckets each fit in a single bucket of the given width."""
+    for resolution in reversed(RollupResolution):
+        if bucket % resolution_width[resolution] == timedelta(0):
+            return resolution
+    return None
+
+
+def _get_raw_bucket_rows(db: Session, sensor_id: int, bucket: timedelta, *conditions):
+    """Aggregates raw measurements matching the conditions in buckets of the given width."""
+    bucket_start = func.date_bin(bucket, models.Measurement.timestamp, BUCKET_ORIGIN)
+    request = (
+        select(
+            bucket_start.label("timestamp"),
+            func.min(models.Measurement.value).label("min"),
+            func.max(models.Measurement.value).label("max"),
+            func.sum(models.Measurement.value).label("sum"),
+            func.count().label("count"),
+        )
+        .where(models.Measurement.sensor_id == sensor_id, *conditions)
+        .group_by(bucket_start)
+    )
+    return db.execute(request).all()
+
+
+def _get_rollup_bucket_rows(db: Session, sensor_id: int, bucket: timedelta, resolution: RollupResolution, *conditions):
+    """Aggregates the rollups of the given resolution matching the conditions in buckets of the given width."""
+    bucket_start = func.date_bin(bucket, models.MeasurementRollup.bucket_start, BUCKET_ORIGIN)
+    request = (
+        select(
+            bucket_start.label("timestamp"),
+            func.min(models.MeasurementRollup.min).label("min"),
+            func.max(models.MeasurementRollup.max).label("max"),
+            func.sum(models.MeasurementRollup.sum).label("sum"),
+            func.sum(models.MeasurementRollup.count).label("count"),
+        )
+        .where(
+            models.MeasurementRollup.sensor_id == sensor_id,
+            models.MeasurementRollup.resolution == resolution,
+            *conditions,
+        )
+        .group_by(bucket_start)
+    )
+    return db.execute(request).all()
+
+
+def get_measurement_buckets(
+    db: Session,
+    sensor_id: int,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    bucket: timedelta | None = None,
+    max_points: int | None = None,
+):
+    """
+    Aggregates the measurements of a sensor in fixed-width time buckets within an optional time range.
+    The aggregation is done by the database, so the result size only depends on the number of buckets.
+    When the bucket width is a multiple of a rollup resolution, the coarsest such rollups are used for
+    the whole rollup buckets inside the range, and only the partial ones at its edges are read from the
+    raw measurements. The rollups are only used if their triggers exist, which only the migrations create.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_id (int): ID of the sensor to retrieve measurements for.
+        start_time (datetime, optional): Start of the time range (exclusive). Defaults to None.
+        end_time (datetime, optional): End of the time range (exclusive). Defaults to None.
+        bucket (timedelta, optional): Width of the buckets. Required if max_points is not provided.
+        max_points (int, optional): Maximum number of buckets, used to compute the bucket width
+            if bucket is not provided.
+    Returns:
+        list[schemas.MeasurementBucket]: Non-empty buckets ordered by time.
+    Raises:
+        ValueError: If neither bucket nor max_points is provided.
+    """
+    if bucket is None:
+        if max_points is None:
+            raise ValueError("Either bucket or max_points must be provided")
+        bucket = get_bucket_width(db, sensor_id, max_points, start_time, end_time)
+        if bucket is None:
+            return []
+
+    timestamp = models.Measurement.timestamp
+    # Without the triggers, e.g. on a database created by create_all, the rollups are empty
+    resolution = _get_rollup_resolution(bucket) if measurement_triggers.rollups else None
+    rollup_start = rollup_end = None
+    if resolution is not None:
+        # Rollup buckets only partially inside the range are replaced by the raw measurements
+        width = resolution_width[resolution]
+        if start_time:
+            rollup_start = _floor_to_width(start_time, width) + width
+        if end_time:
+            rollup_end = _floor_to_width(end_time, width)
+
+    if resolution is None or (rollup_start and rollup_end and rollup_start >= rollup_end):
+        # The range does not contain a whole rollup bucket
+        conditions = []
+        if start_time:
+            conditions.append(timestamp > start_time)
+        if end_time:
+            conditions.append(timestamp < end_time)
+        rows = _get_raw_bucket_rows(db, sensor_id, bucket, *conditions)
+    else:
+        rollup_conditions = []
+        rows = []
+        if rollup_start:
+            rollup_conditions.append(models.MeasurementRollup.bucket_start >= rollup_start)
+            rows += _get_raw_bucket_rows(db, sensor_id, bucket, timestamp > start_time, timestamp < rollup_start)
+        if rollup_end:
+            rollup_conditions.append(models.MeasurementRollup.bucket_start < rollup_end)
+            rows += _get_raw_bucket_rows(db, sensor_id, bucket, timestamp >= rollup_end, timestamp < end_time)
+        rows += _get_rollup_bucket_rows(db, sensor_id, bucket, resolution, *rollup_conditions)
+
+    buckets: dict[datetime, list] = {}
+    for row in rows:
+        merged = buckets.get(row.timestamp)
+        if merged is None:
+            buckets[row.timestamp] = [row.min, row.max, row.sum, row.count]
+        else:
+            merged[0] = min(merged[0], row.min)
+            merged[1] = max(merged[1], row.max)
+            merged[2] += row.sum
+            merged[3] += row.count
+
+    return [
+        schemas.MeasurementBucket(
+            sensor_id=sensor_id,
+            timestamp=bucket_start,
+            min=value_min,
+            max=value_max,
+            avg=value_sum / count,
+            count=count,
+        )
+        for bucket_start, (value_min, value_max, value_sum, count) in sorted(buckets.items())
+    ]
+
+
+def _rebuild_rollups(
+    db: Session,
+    sensor_id: int | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+):
+    """Recomputes the rollups of the whole days overlapping the time range from the raw measurements, without committing."""
+    day = resolution_width[RollupResolution.day]
+    rollup_conditions = []
+    measurement_conditions = []
+    if sensor_id is not None:
+        rollup_conditions.append(models.MeasurementRollup.sensor_id == sensor_id)
+        measurement_conditions.append(models.Measurement.sensor_id == sensor_id)
+    if start_time:
+        start_time = _floor_to_width(start_time, day)
+        rollup_conditions.append(models.MeasurementRollup.bucket_start >= start_time)
+        measurement_conditions.append(models.Measurement.timestamp >= start_time)
+    if end_time:
+        end_time = _floor_to_width(end_time, day) + day
+        rollup_conditions.append(models.MeasurementRollup.bucket_start < end_time)
+        measurement_conditions.append(models.Measurement.timestamp < end_time)
+
+    db.execute(delete(models.MeasurementRollup).where(*rollup_conditions))
+
+    for resolution in RollupResolution:
+        bucket_start = func.date_trunc(resolution.value, models.Measurement.timestamp, "UTC")
+        aggregates = (
+            select(
+                models.Measurement.sensor_id,
+                literal(resolution, models.MeasurementRollup.resolution.type),
+                bucket_start,
+                func.count(),
+                func.min(models.Measurement.value),
+                func.max(models.Measurement.value),
+                func.sum(models.Measurement.value),
+                array_agg(aggregate_order_by(models.Measurement.value, models.Measurement.timestamp.desc()))[1],
+                func.max(models.Measurement.timestamp),
+            )
+            .where(*measurement_conditions)
+            .group_by(models.Measurement.sensor_id, bucket_start)
+        )
+        db.execute(
+            insert(models.MeasurementRollup).from_select(
+                ["sensor_id", "resolution", "bucket_start", "count", "min", "max", "sum", "last_value", "last_timestamp"],
+                aggregates,
+            )
+        )
+
+
+def rebuild_measurement_rollups(
+    db: Session,
+    sensor_id: int | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+):
+    """
+    Recomputes the measurement rollups from the raw measurements, e.g. to backfill them or after raw
+    measurements were modified outside of the API. Rollups are otherwise kept up to date by the database.
+    The rollups of measurements removed by the retention policies are lost: limit the time range accordingly.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_id (int, optional): If provided, only rebuilds the rollups of this sensor.
+        start_time (datetime, optional): If provided, only rebuilds from the start of the day (UTC) containing it.
+        end_time (datetime, optional): If provided, only rebuilds up to the end of the day (UTC) containing it.
+    Raises:
+        sqlalchemy.exc.SQLAlchemyError: If a database error occurs during the rebuild.
+    """
+    _rebuild_rollups(db, sensor_id=sensor_id, start_time=start_time, end_time=end_time)
+    db.commit()
+
+
+def get_retention_policies(db: Session):
+    """
+    Retrieves the retention policies of all the sensor types that have one.
+    Args:
+        db (Session): SQLAlchemy session.
+    Returns:
+        list[models.RetentionPolicy]: The retention policies.
+    """
+    return db.execute(select(models.RetentionPolicy).order_by(models.RetentionPolicy.sensor_type)).scalars().all()
+
+
+def put_retention_policy(db: Session, sensor_type: SensorType, policy: schemas.RetentionPolicyBase):
+    """
+    Creates or replaces the retention policy of a sensor type.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_type (SensorType): The sensor type whose measurements the policy applies to.
+        policy (schemas.RetentionPolicyBase): Days to keep the raw measurements and each rollup resolution.
+    Returns:
+        models.RetentionPolicy: The retention policy.
+    """
+    retention_policy = db.merge(models.RetentionPolicy(sensor_type=sensor_type, **policy.model_dump()))
+    db.commit()
+    return retention_policy
+
+
+def delete_retention_policy(db: Session, sensor_type: SensorType):
+    """
+    Deletes the retention policy of a sensor type, whose measurements are then kept forever.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_type (SensorType): The sensor type of the policy.
+    Raises:
+        HTTPException: Code 404 if the sensor type has no retention policy.
+    """
+    retention_policy = db.get(models.RetentionPolicy, sensor_type)
+    if retention_policy is None:
+        raise HTTPException(status_code=404, detail="Retention policy not found")
+    db.delete(retention_policy)
+    db.commit()
+
+
+def get_retention_runs(db: Session, limit: int = 20):
+    """
+    Retrieves the latest runs of the retention policies.
+    Args:
+        db (Session): SQLAlchemy session.
+        limit (int, optional): Maximum number of runs to return. Defaults to 20.
+    Returns:
+        list[models.RetentionRun]: The runs, latest first.
+    """
+    return db.execute(
+        select(models.RetentionRun).order_by(models.RetentionRun.run_id.desc()).limit(limit)
+    ).scalars().all()
+
+
+def get_max_measurement_id(db: Session):
+    """
+    Retrieves the greatest measurement ID of the database.
+    Args:
+        db (Session): SQLAlchemy session.
+    Returns:
+        int: The greatest measurement ID, or 0 if there are no measurements.
+    """
+    return db.execute(select(func.max(models.Measurement.measurement_id))).scalar() or 0
+
+
+def get_new_measurements(
+    db: Session,
+    sensor_ids: list[int],
+    after_measurement_id: int,
+    up_to_measurement_id: int | None = None,
+    limit: int | None = None,
+):
+    """
+    Retrieves the measurements of the given sensors whose ID is greater than a given ID.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_ids (list[int]): The IDs of the sensors whose measurements are requested.
+        after_measurement_id (int): Only measurements with a greater ID are returned.
+        up_to_measurement_id (int | None, optional): If provided, only measurements with a lower or equal ID are returned.
+        limit (int | None, optional): Maximum number of measurements to return. Defaults to None.
+    Returns:
+        list[models.Measurement]: The measurements, sorted by ID.
+    """
+    query = (
+        select(models.Measurement)
+        .where(
+            models.Measurement.sensor_id.in_(sensor_ids),
+            models.Measurement.measurement_id > after_measurement_id,
+        )
+        .order_by(models.Measurement.measurement_id)
+    )
+    if up_to_measurement_id is not None:
+        query = query.where(models.Measurement.measurement_id <= up_to_measurement_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return db.execute(query).scalars().all()
+
+
 def get_last_measurement(
     db: Session,
     sensor_id: int,
 ):
     """
-    Retrieves the most recent measurement for a given sensor from the database.
+    Retrieves the most recent measurement for a given sensor, from the last measurement cache when possible,
+    otherwise from the database.
     Args:
         db (Session): SQLAlchemy session.
         sensor_id (int): The ID of the sensor whose latest measurement is requested.
     Returns:
-        models.Measurement | None: The latest measurement for the sensor, or None if not found.
+        schemas.Measurement | None: The latest measurement for the sensor, or None if not found.
     """
+    cached = last_measurements.get(sensor_id)
+    if cached is not None:
+        return cached
+
+    version = last_measurements.version(sensor_id)
     query = (
         select(models.Measurement)
         .where(models.Measurement.sensor_id == sensor_id)
         .order_by(models.Measurement.timestamp.desc())
     )
-    return db.execute(query).scalars().first()
+    result = db.execute(query).scalars().first()
+    if result is None:
+        return None
+    measurement = schemas.Measurement.model_validate(result)
+    last_measurements.fill(measurement, version)
+    return measurement
 
 
 def post_measurement(db: Session, measurement: schemas.MeasurementBase):
@@ -252,10 +686,69 @@ def post_measurement(db: Session, measurement: schemas.MeasurementBase):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Sensor with this id does not exist",
         )
+    inserted = schemas.Measurement.model_validate(result)
     db.commit()
+    last_measurements.update(inserted)
     return result
 
 
+def post_measurements(db: Session, measurements: list[schemas.MeasurementBatchItem]):
+    """
+    Inserts a batch of measurements into the database in a single transaction.
+    Measurements referencing an unknown sensor are rejected individually, the others are
+    written with batched multi-row INSERT statements.
+    Args:
+        db (Session): SQLAlchemy session.
+        measurements (list[schemas.MeasurementBatchItem]): Validated measurements to add to the DB.
+            Measurements without a timestamp are stamped with the time of reception.
+    Returns:
+        schemas.MeasurementBatchResult: The created measurements and the rejected ones.
+    Raises:
+        HTTPException: On integrity error (e.g., sensor deleted during the insert), raises 422 with details.
+    """
+    requested_sensor_ids = {measurement.sensor_id for measurement in measurements}
+    known_sensor_ids = set(
+        db.execute(
+            select(models.Sensor.sensor_id).where(models.Sensor.sensor_id.in_(requested_sensor_ids))
+        ).scalars()
+    )
+
+    received_at = datetime.now().astimezone()
+    rows = []
+    rejected = []
+    for index, measurement in enumerate(measurements):
+        if measurement.sensor_id not in known_sensor_ids:
+            rejected.append(schemas.MeasurementBatchRejection(
+                index=index,
+                sensor_id=measurement.sensor_id,
+                detail="Sensor with this id does not exist",
+            ))
+            continue
+        rows.append({
+            "sensor_id": measurement.sensor_id,
+            "value": measurement.value,
+            "timestamp": measurement.timestamp or received_at,
+        })
+
+    inserted = []
+    if rows:
+        query = insert(models.Measurement).returning(models.Measurement, sort_by_parameter_order=True)
+        try:
+            inserted = db.execute(query, rows).scalars().all()
+        except IntegrityError as err:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Integrity error in db: {err}",
+            )
+        inserted = [schemas.Measurement.model_validate(measurement) for measurement in inserted]
+        db.commit()
+        for measurement in inserted:
+            last_measurements.update(measurement)
+
+    return schemas.MeasurementBatchResult(inserted=inserted, rejected=rejected)
+
+
 def delete_measurement(db: Session, measurement_id: int):
     """
     Deletes the measurement with the given id.
@@ -268,8 +761,10 @@ def delete_measurement(db: Session, measurement_id: int):
     measurement = db.get(models.Measurement, measurement_id)
     if measurement is None:
         raise HTTPException(status_code=404, detail="Measurement not found")
+    sensor_id = measurement.sensor_id
     db.delete(measurement)
     db.commit()
+    last_measurements.invalidate(sensor_id)
 
 
 def post_user(db: Session, username: str, password: str):
@@ -501,125 +996,3 @@ def default_populate_database(db: Session):
         "sensors": sensors,
         "actuator": actuator
     }
-
-def generate_smooth_values(middle:float,rnge:float, nb_meas:int, alpha:float, threshold:float, drift_adjustment:float):
-    """
-    Generates a list of smoothed random values based on a Gaussian distribution and smoothing parameters.
-    Args:
-        middle (float): The mean value around which to generate measurements.
-        rnge (float): The standard deviation for the Gaussian distribution.
-        nb_meas (int): The number of measurements to generate.
-        alpha (float): Smoothing factor (between 0 and 1) for exponential smoothing.
-        threshold (float): Maximum allowed change between consecutive smoothed values.
-        drift_adjustment (float): Factor to adjust drift towards the mean.
-    Returns:
-        list[float]: List of smoothed and threshold-limited random values.
-    """
-    values = []
-    drift_adjustment = 0.20
-    values.append(round(random.gauss(middle,rnge), 2))
-    for i in range(1, nb_meas):
-        new_val = round(random.gauss(middle,rnge),2) + drift_adjustment*(middle-values[i-1])*0.5
-        smooth_value = alpha*new_val + (1-alpha)*values[i-1]
-        if abs(smooth_value - values[i-1]) > threshold:
-            smooth_value = values[i-1] - threshold if smooth_value < values[i-1] else values[i-1] + threshold
-        values.append(round(smooth_value,2))
-    return values
-
-def generate_timestamps(nb_meas:int, rnge:str):
-    """
-    Generates a sorted list of random timestamps within a specified time range.
-    Args:
-        nb_meas (int): Number of timestamps to generate.
-        rnge (str): Time range for the timestamps. Accepted values are "year", "day", or "hour".
-    Returns:
-        list: Sorted list of string representations of randomly generated timestamps within the specified range.
-    Raises:
-        ValueError: If the provided range is not one of "year", "day", or "hour".
-    """
-    timestamps = []
-    for i in range(nb_meas):
-        now = datetime.now(pytz.UTC)
-        if   rnge == "year": startingDate = now - timedelta(days=365)
-        elif rnge == "day": startingDate = now - timedelta(days=1)
-        elif rnge == "hour" : startingDate = now - timedelta(hours=1)
-        delta     = now-startingDate
-        timestamp =  startingDate + timedelta(seconds=random.randint(0, int(delta.total_seconds())))
-        timestamps.append(f"'{timestamp}'")
-    sorted_copy = sorted(timestamps.copy())
-    return sorted_copy
-
-def generate_meas(nb_meas: int, year_ratio: float, day_ratio: float, hour_ratio: float, deviation_percent: float, smoothing_factor: float, drift_adjustment: float, db: Session):
-    """
-    Generates synthetic measurement data for all sensors in the database, distributing measurements across yearly, daily, and hourly intervals.
-    Args:
-        nb_meas (int): Total number of measurements to generate (will be adjusted to be divisible by the number of sensors).
-        year_ratio (float): Proportion of measurements to assign to the yearly interval.
-        day_ratio (float): Proportion of measurements to assign to the daily interval.
-        hour_ratio (float): Proportion of measurements to assign to the hourly interval.
-        deviation_percent (float): Percentage of deviation to apply to the generated values.
-        smoothing_factor (float): Factor controlling the smoothness of the generated values.
-        drift_adjustment (float): Adjustment factor for value drift over time.
-        db (Session): SQLAlchemy session for database access.
-    Returns:
-        list: A list of lists, each containing [sensor_id, value, timestamp] for each generated measurement.
-    Raises:
-        ValueError: If the number of sensors in the database is zero.
-    """
-    request = db.query(models.Sensor).all()
-    nb_sensors = len(request)
-    while nb_meas % nb_sensors != 0: nb_meas += 1
-
-    nb_year_meas = int(nb_meas * year_ratio)
-    nb_day_meas = int(nb_meas * day_ratio)
-    nb_hour_meas = int(nb_meas * hour_ratio)
-    nb_meas_per_sensor = (nb_year_meas + nb_day_meas + nb_hour_meas) // nb_sensors
-
-    def generate_sensor_values(sensor):
-        """
-        Generates simulated sensor values based on sensor thresholds and configuration parameters.
-        Args:
-            sensor: An object representing the sensor, expected to have 'threshold_critically_high', 'threshold_critically_low', and 'sensor_id' attributes.
-        Returns:
-            tuple: A tuple containing the sensor ID and a list of generated smooth values.
-        Raises:
-            AttributeError: If the sensor object does not have the required attributes.
-        """
-        value_range = ((sensor.threshold_critically_high - sensor.threshold_critically_low) * deviation_percent / 2)
-        middle = (sensor.threshold_critically_high + sensor.threshold_critically_low) / 2
-        threshold = value_range / 2
-        return sensor.sensor_id, generate_smooth_values(middle, value_range, nb_meas_per_sensor, smoothing_factor, threshold, drift_adjustment)
-
-    with ThreadPoolExecutor() as executor:
-        values = dict(executor.map(generate_sensor_values, request))
-
-    timestamps = {
-        "year": generate_timestamps(nb_year_meas, "year"),
-        "day": generate_timestamps(nb_day_meas, "day"),
-        "hour": generate_timestamps(nb_hour_meas, "hour")
-    }
-
-    def distribute_meas(nb, time_key):
-        """
-        Distributes measurement values and timestamps across sensors.
-        Args:
-            nb (int): Number of measurements to distribute.
-            time_key (str): Key to access the relevant timestamps.
-        Returns:
-            list: A list of lists, each containing [sensor_id, value, timestamp] for each measurement.
-        Raises:
-            KeyError: If a sensor_id or time_key does not exist in the corresponding dictionary.
-            IndexError: If the indices exceed the available values or timestamps.
-        """
-        index, sensor_index = 0, 0
-        result = []
-        for i in range(nb):
-            result.append([sensor_ids[sensor_index], values[sensor_ids[sensor_index]][index], timestamps[time_key][i]])
-            sensor_index += 1
-            if sensor_index == nb_sensors:
-                index += 1
-                sensor_index = 0
-        return result
-
-    sensor_ids = list(values.keys())
-    return distribute_meas(nb_year_meas, "year") + distribute_meas(nb_day_meas, "day") + distribute_meas(nb_hour_meas, "hour")
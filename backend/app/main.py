@@ -1,25 +1,36 @@
+import asyncio
 import httpx
-from fastapi import FastAPI, Depends, HTTPException, status, Response
+from anyio import to_thread
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, status, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 # from fastapi_utils.openapi import simplify_operation_ids
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
 from typing import Annotated
 from datetime import datetime, timedelta
-import io
 
 from shared.timelapse_models import TimelapseConfig, TimelapseMetadata, TimelapseStatus
 # from jose import JWTError, jwt
 
 
 from . import crud, models, schemas
-from .database import engine, get_db
+from .database import engine, get_db, get_pool_status, get_threadpool_size
+from .classes.export_format import ExportFormat
 from .classes.sensor_type import SensorType
-from .services.actuator import get_actuator_activation
+from .services.actuator import get_actuator_activation, get_actuator_states
+from .services.actuator_hub import actuator_states
 from .services import cam_client as camera_service
-from .services.export_data import export_all_measures_to_csv
+from .services.measurement_listener import measurement_listener
+from .services.measurement_triggers import measurement_triggers
+from .services.measurement_partitions import maintain_measurement_partitions, run_partition_maintenance
+from .services.retention import run_retention, run_retention_periodically
+from .services.synthetic_measurements import generate_measurements
+from .services.measurement_stream import measurement_streams
+from .services.export_data import export_all_measures_to_columnar, export_all_measures_to_csv, gzip_chunks
+from .services.request_metrics import METRICS_CONTENT_TYPE, RequestMetricsMiddleware, request_metrics
 from .security import authentification
 from .security import permissions
 
@@ -28,14 +39,30 @@ models.Base.metadata.create_all(bind=engine)
 
 sensors_data = dict()
 
+# Comment lines sent on idle event streams, so that proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Routes using the database are sync and run in the threadpool, which must not be smaller than the pool
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = get_threadpool_size(limiter.total_tokens)
     db = next(get_db())
+    measurement_triggers.check(db)
+    if not measurement_triggers.rollups:
+        print("[Error] measurement rollup triggers not found, aggregating the raw measurements: apply the migrations")
+    maintain_measurement_partitions(db)
     crud.default_populate_database(db)
+    partition_maintenance = asyncio.create_task(run_partition_maintenance())
+    retention = asyncio.create_task(run_retention_periodically())
+    measurement_listener.start()
     try:
         yield
     finally:
+        partition_maintenance.cancel()
+        retention.cancel()
+        measurement_listener.stop()
         try:
             await camera_service.close_client()
         except Exception:
@@ -53,6 +80,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so that it also times the other middlewares
+app.add_middleware(RequestMetricsMiddleware)
 
 @app.post(
     "/prototypes",
@@ -60,7 +89,7 @@ app.add_middleware(
     # dependencies=[Depends(permissions.needs_prototype_modification_permission)],
     response_model=schemas.Prototype,
 )
-async def post_prototype(
+def post_prototype(
     prototype: schemas.Prototype,
     db: Session = Depends(get_db),
 ):
@@ -69,7 +98,7 @@ async def post_prototype(
 
 
 @app.post("/sensors/", tags=["Sensors"], response_model=schemas.Sensor)
-async def post_sensor(
+def post_sensor(
     sensor: schemas.SensorBase, 
     db: Session = Depends(get_db)
 ):
@@ -79,7 +108,7 @@ async def post_sensor(
     )
 
 @app.get("/sensors/{prototype_id}", tags=["Sensors"], response_model=list[schemas.Sensor])
-async def sensors(
+def sensors(
     prototype_id: int,
     db: Session = Depends(get_db),
 ):
@@ -92,7 +121,7 @@ async def sensors(
     # dependencies=[Depends(permissions.needs_measurements_post_permission)],
     response_model=schemas.Measurement,
 )
-async def post_measurement(
+def post_measurement(
     measurement: schemas.MeasurementBase,
     db: Session = Depends(get_db),
 ):
@@ -100,13 +129,27 @@ async def post_measurement(
         db=db, measurement=measurement
     )
 
+@app.post(
+    "/measurements/batch",
+    tags=["Measurements"],
+    # dependencies=[Depends(permissions.needs_measurements_post_permission)],
+    response_model=schemas.MeasurementBatchResult,
+)
+def post_measurements(
+    measurements: list[schemas.MeasurementBatchItem],
+    db: Session = Depends(get_db),
+):
+    return crud.post_measurements(
+        db=db, measurements=measurements
+    )
+
 @app.post(
     "/actuators",
     tags=["Actuators"],
     dependencies=[],
     response_model=schemas.Actuator,
 )
-async def post_actuator(
+def post_actuator(
     actuator: schemas.ActuatorBase,
     db: Session = Depends(get_db),
 ):
@@ -118,7 +161,7 @@ async def post_actuator(
     dependencies=[],
     response_model=list[schemas.Actuator],
 )
-async def update_actuators(
+def update_actuators(
     actuators: list[schemas.Actuator],
     db: Session = Depends(get_db),
 ):
@@ -130,7 +173,7 @@ async def update_actuators(
     dependencies=[],
     response_model=list[schemas.Sensor]
 )
-async def update_sensors(
+def update_sensors(
     sensors: list[schemas.Sensor],
     db: Session = Depends(get_db),
 ):
@@ -142,7 +185,7 @@ async def update_sensors(
         dependencies=[],
         response_model=schemas.ActuatorActivation,
 )
-async def get_actuator_state(
+def get_actuator_state(
     actuator_id: int,
     db: Session = Depends(get_db)
 ):
@@ -153,24 +196,48 @@ async def get_actuator_state(
 
     return get_actuator_activation(actuator, last_measurement)
 
+@app.get(
+        "/actuators/{actuator_id}/state/stream",
+        tags=["Actuators"],
+        response_class=StreamingResponse,
+)
+def stream_actuator_state(
+    actuator_id: int,
+    db: Session = Depends(get_db)
+):
+    actuator = crud.get_actuator(db=db, actuator_id=actuator_id)
+    if actuator is None:
+        raise HTTPException(status_code=404, detail="Actuator with this ID not found")
+    sensor_id = actuator.sensor_id
+    initial_states = get_actuator_states([(actuator, crud.get_last_measurement(db=db, sensor_id=sensor_id))])
+    # The session is only closed once the response ends: release its connection for the life of the stream
+    db.commit()
+    db.close()
+
+    return StreamingResponse(
+        actuator_states.events(actuator_id, sensor_id, initial_states, SSE_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.patch(
         "/actuators/{actuator_id}/last_activated",
         tags=["Actuators"],
         dependencies=[],
         response_model=schemas.Actuator,
 )
-async def update_actuator_last_activated(actuator_id: int, db: Session = Depends(get_db)):
+def update_actuator_last_activated(actuator_id: int, db: Session = Depends(get_db)):
     return crud.update_actuator_last_activated(db=db, actuator_id=actuator_id)
 
 
 @app.get("/prototypes", tags=["Prototypes"], response_model=list[schemas.Prototype])
-async def prototypes(db: Session = Depends(get_db)):
+def prototypes(db: Session = Depends(get_db)):
     return crud.get_prototypes(db=db)
 
 @app.get(
     "/prototypes/{prototype_id}", tags=["Prototypes"], response_model=schemas.Prototype
 )
-async def prototype(prototype_id: int, db: Session = Depends(get_db)):
+def prototype(prototype_id: int, db: Session = Depends(get_db)):
     prototype = crud.get_prototypes(db=db, prototype_id = prototype_id)
     if len(prototype) > 0:
         return prototype[0]
@@ -182,33 +249,106 @@ async def prototype(prototype_id: int, db: Session = Depends(get_db)):
     tags=["Measurements"],
     response_class=StreamingResponse,
 )
-async def export_all_sensors_to_csv(db: Session = Depends(get_db)):
-    csv_content = export_all_measures_to_csv(db)
+def export_measurements(
+    sensor_id: int | None = None, start_time: datetime | None = None, end_time: datetime | None = None,
+    gzip: bool = False, format: ExportFormat = ExportFormat.csv, db: Session = Depends(get_db)
+):
+    if format != ExportFormat.csv:
+        if gzip:
+            raise HTTPException(status_code=400, detail="gzip is only available for the csv format")
+        media_types = {
+            ExportFormat.parquet: "application/vnd.apache.parquet",
+            ExportFormat.arrow: "application/vnd.apache.arrow.file",
+        }
+        return StreamingResponse(
+            export_all_measures_to_columnar(
+                db, format, sensor_id=sensor_id, start_time=start_time, end_time=end_time
+            ),
+            media_type=media_types[format],
+            headers={"Content-Disposition": f"attachment; filename=all_sensors_measurements.{format.value}"}
+        )
+    csv_chunks = export_all_measures_to_csv(db, sensor_id=sensor_id, start_time=start_time, end_time=end_time)
+    if gzip:
+        return StreamingResponse(
+            gzip_chunks(csv_chunks),
+            media_type="application/gzip",
+            headers={"Content-Disposition": "attachment; filename=all_sensors_measurements.csv.gz"}
+        )
     return StreamingResponse(
-        io.StringIO(csv_content),
+        csv_chunks,
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=all_sensors_measurements.csv"}
     )
 
+@app.get(
+    "/measurements/stream",
+    tags=["Measurements"],
+    response_class=StreamingResponse,
+)
+def stream_measurements(
+    sensor_id: int | None = None, prototype_id: int | None = None, last_measurement_id: int | None = None,
+    last_event_id: Annotated[int | None, Header()] = None, db: Session = Depends(get_db)
+):
+    if (sensor_id is None) == (prototype_id is None):
+        raise HTTPException(status_code=400, detail="You must use either sensor_id or prototype_id")
+    if sensor_id is not None:
+        if crud.get_sensor(db=db, sensor_id=sensor_id) is None:
+            raise HTTPException(status_code=404, detail="Sensor with this ID not found")
+        sensor_ids = [sensor_id]
+    else:
+        sensor_ids = [sensor.sensor_id for sensor in crud.get_sensors(db=db, prototype_id=prototype_id)]
+        if not sensor_ids:
+            raise HTTPException(status_code=404, detail="Prototype with this ID has no sensors")
+    # The session is only closed once the response ends: release its connection for the life of the stream
+    db.commit()
+    db.close()
+    # EventSource sends the ID of the last event it received when reconnecting
+    if last_measurement_id is None:
+        last_measurement_id = last_event_id
+
+    return StreamingResponse(
+        measurement_streams.events(sensor_ids, last_measurement_id, SSE_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get(
     "/measurements/{sensor_id}",
     tags=["Measurements"],
-    response_model=list[schemas.Measurement],
+    response_model=list[schemas.Measurement] | list[schemas.MeasurementBucket],
 )
-async def get_measurement(
-    sensor_id:int, time_delta: timedelta | None = None, start_time: datetime | None = None, 
-    end_time: datetime | None = None,  db: Session = Depends(get_db)
+def get_measurement(
+    sensor_id:int, time_delta: timedelta | None = None, start_time: datetime | None = None,
+    end_time: datetime | None = None, bucket: timedelta | None = None, max_points: int | None = None,
+    db: Session = Depends(get_db)
 ):
     if time_delta and start_time:
         raise HTTPException(status_code=400, detail="You cannot use both time_delta and start_timestamp")
-    
+    if bucket is not None and max_points is not None:
+        raise HTTPException(status_code=400, detail="You cannot use both bucket and max_points")
+    if bucket is not None and bucket <= timedelta(0):
+        raise HTTPException(status_code=400, detail="bucket must be a positive duration")
+    if max_points is not None and max_points <= 0:
+        raise HTTPException(status_code=400, detail="max_points must be positive")
+
     if time_delta:
         measurements = crud.get_measurements_delta(
             db=db,
             sensor_id=sensor_id,
             time_delta=time_delta,
+            bucket=bucket,
+            max_points=max_points,
+        )
+    elif bucket is not None or max_points is not None:
+        measurements = crud.get_measurement_buckets(
+            db=db,
+            sensor_id=sensor_id,
+            start_time=start_time,
+            end_time=end_time,
+            bucket=bucket,
+            max_points=max_points,
         )
-    else: 
+    else:
         measurements = crud.get_measurements(
             db=db,
             sensor_id=sensor_id,
@@ -222,7 +362,7 @@ async def get_measurement(
     tags=["Measurements"],
     response_model=schemas.Measurement,
 )
-async def get_last_measurement(
+def get_last_measurement(
     sensor_id: int, db: Session = Depends(get_db)
 ):
     result = crud.get_last_measurement(db, sensor_id)
@@ -235,29 +375,91 @@ async def get_last_measurement(
         "/measurements/{measurement_id}",
         tags=["Measurements"],
 )
-async def delete_measurement(
+def delete_measurement(
     measurement_id: int, db: Session = Depends(get_db)
 ):
     crud.delete_measurement(db, measurement_id)
 
 
+@app.get("/retention/policies", tags=["Retention"], response_model=list[schemas.RetentionPolicy])
+def get_retention_policies(db: Session = Depends(get_db)):
+    return crud.get_retention_policies(db=db)
+
+
+@app.put("/retention/policies/{sensor_type}", tags=["Retention"], response_model=schemas.RetentionPolicy)
+def put_retention_policy(
+    sensor_type: SensorType,
+    policy: schemas.RetentionPolicyBase,
+    db: Session = Depends(get_db),
+):
+    return crud.put_retention_policy(db=db, sensor_type=sensor_type, policy=policy)
+
+
+@app.delete("/retention/policies/{sensor_type}", tags=["Retention"])
+def delete_retention_policy(sensor_type: SensorType, db: Session = Depends(get_db)):
+    crud.delete_retention_policy(db=db, sensor_type=sensor_type)
+
+
+@app.get("/retention/runs", tags=["Retention"], response_model=list[schemas.RetentionRun])
+def get_retention_runs(limit: int = 20, db: Session = Depends(get_db)):
+    return crud.get_retention_runs(db=db, limit=limit)
+
+
+@app.post("/retention/runs", tags=["Retention"], response_model=schemas.RetentionRun)
+def post_retention_run():
+    """Enforces the retention policies now, instead of waiting for the hourly run."""
+    run = run_retention()
+    if run is None:
+        raise HTTPException(status_code=409, detail="A retention run is already in progress")
+    return run
+
+
+@app.get(
+    "/prototypes/{prototype_id}/actuators/state",
+    tags=["Actuators"],
+    response_model=list[schemas.ActuatorState],
+)
+def get_prototype_actuators_state(prototype_id: int, db: Session = Depends(get_db)):
+    if not crud.get_prototypes(db=db, prototype_id=prototype_id):
+        raise HTTPException(status_code=404, detail="Prototype not found")
+    actuators_and_measurements = crud.get_actuators_with_last_measurement(db=db, prototype_id=prototype_id)
+    return get_actuator_states(actuators_and_measurements)
+
+
 @app.get(
     "/actuators/{prototype_id}",
     tags=["Actuators"],
     response_model=list[schemas.Actuator],
 )
-async def actuator(prototype_id: int, db: Session = Depends(get_db)):
+def actuator(prototype_id: int, db: Session = Depends(get_db)):
     return crud.get_actuators(db=db, prototype_id=prototype_id)
 
 
+# Logical camera to read, e.g. a preview serving smaller frames, the camera of the cam-client by default
+CameraName = Query(None, pattern=camera_service.CAMERA_NAME_PATTERN)
+
+
 @app.get("/picture")
-async def picture():
-    pic: bytes = await camera_service.get_picture()
+async def picture(camera: str | None = CameraName):
+    pic: bytes = await camera_service.get_picture(camera)
     return Response(content=pic, media_type="image/jpeg")
 
+@app.get("/picture/stream", response_class=StreamingResponse)
+async def picture_stream(camera: str | None = CameraName):
+    """
+    Streams the frames of the camera as multipart/x-mixed-replace (MJPEG), relayed from the cam-client as they come.
+    """
+    stream = await camera_service.open_picture_stream(camera)
+    return StreamingResponse(
+        stream.aiter_raw(),
+        media_type=stream.headers["content-type"],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(stream.aclose),
+    )
+
 # auth stuff
 @app.post("/token", response_model=schemas.Token)
-async def login_for_access_token(
+def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Session = Depends(get_db),
 ):
@@ -282,7 +484,7 @@ async def login_for_access_token(
 
 
 @app.post("/users/new/", response_model=schemas.Token)
-async def create_user_access_token(
+def create_user_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Session = Depends(get_db),
 ):
@@ -293,11 +495,11 @@ async def create_user_access_token(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="username already exists",
         ) from exc
-    return await login_for_access_token(form_data, db)
+    return login_for_access_token(form_data, db)
 
 
 @app.post("/users/logout/")
-async def user_log_out(
+def user_log_out(
     token: Annotated[str, Depends(authentification.oauth2_scheme)],
     db: Session = Depends(get_db),
 ):
@@ -314,33 +516,27 @@ async def read_items(token: Annotated[str, Depends(authentification.oauth2_schem
 
 # simplify_operation_ids(app)
 
-@app.post("/Measurement/Random", 
-          tags = ["Measurements"])
-async def post_random_measurements(
-   
-    datas:schemas.RandomMeasurements,
-    db: Session = Depends(get_db)
+@app.post("/Measurement/Random", tags=["Measurements"])
+def post_random_measurements(
+    datas: schemas.RandomMeasurements,
+    db: Session = Depends(get_db),
 ):
     try:
-        db.query(models.Measurement).delete()
-        db.commit()
-        return {"message": "Données remplacées avec succès."}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        measurements = crud.generate_meas(datas.nb_measurements, 
-                                          datas.yearly_measurements_ratio,
-                                          datas.dayly_measurements_ratio,
-                                          datas.hourly_measurements_ratio, 
-                                          datas.deviation_rate, 
-                                          datas.smoothing_factor, 
-                                          datas.drift_adjustment, db)
-        for meas in measurements:
-            db_Measurement = models.Measurement(sensor_id=meas[0], value=meas[1], timestamp=meas[2])
-            db.add(db_Measurement)
-            db.commit()
-            db.refresh(db_Measurement)
+        inserted = generate_measurements(
+            db,
+            datas.nb_measurements,
+            datas.yearly_measurements_ratio,
+            datas.dayly_measurements_ratio,
+            datas.hourly_measurements_ratio,
+            datas.deviation_rate,
+            datas.smoothing_factor,
+            datas.drift_adjustment,
+            replace=datas.replace,
+            seed=datas.seed,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Données remplacées avec succès.", "inserted": inserted}
 
 @app.get(
     "/docs/openapi.json",
@@ -358,6 +554,23 @@ async def openapi_json():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/metrics", tags=["Metrics"], response_class=Response)
+async def metrics():
+    """
+    Returns the latency and SQL statements of the requests of this worker per route, with the state of its
+    database connection pool, in the Prometheus text format.
+    """
+    return Response(content=request_metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/metrics/pool", tags=["Metrics"], response_model=schemas.PoolStatus)
+async def pool_status():
+    """
+    Returns the state of the database connection pool of this worker.
+    """
+    return get_pool_status()
+
+
 # TIMELAPSE
 @app.post("/timelapse/start", response_model=TimelapseStatus)
 async def start_timelapse(config: TimelapseConfig) -> TimelapseStatus:
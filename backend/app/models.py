@@ -9,12 +9,14 @@ from sqlalchemy import (
     ForeignKey,
     Time,
     func,
-    CheckConstraint
+    CheckConstraint,
+    Index,
 )
 import enum
 from .classes.activation_condition import ActivationCondition
 
 from .classes.actuator_type import ActuatorType
+from .classes.rollup_resolution import RollupResolution
 from .database import Base
 from .classes.sensor_type import SensorType
 
@@ -59,18 +61,80 @@ class Sensor(Base):
 class Measurement(Base):
     __tablename__ = "measurements"
 
-    measurement_id = Column(Integer, primary_key=True)
+    measurement_id = Column(Integer, primary_key=True, autoincrement=True)
     sensor_id = Column(
-        Integer, ForeignKey("sensors.sensor_id"), nullable=False, index=True
+        Integer, ForeignKey("sensors.sensor_id"), nullable=False
     )
+    # Part of the primary key because the primary key of a partitioned table must include the partition key
     timestamp = Column(
-        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+        DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now(), index=True
     )
     value = Column(Float, nullable=False)
 
     __table_args__ = (
         CheckConstraint("measurement_id>=0", name="check_id_measurement_positive"),
+        # Measurements are read per sensor, ranged or ordered by time
+        Index("ix_measurements_sensor_id_timestamp", "sensor_id", "timestamp"),
+        # One partition per month, see services.measurement_partitions
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
+    # The ID alone identifies a measurement
+    __mapper_args__ = {"primary_key": [measurement_id]}
+
+
+class MeasurementRollup(Base):
+    """Aggregates of the measurements of a sensor, per UTC-aligned bucket of each resolution."""
+    __tablename__ = "measurement_rollups"
+
+    sensor_id = Column(Integer, ForeignKey("sensors.sensor_id"), primary_key=True)
+    resolution = Column(Enum(RollupResolution), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    count = Column(Integer, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+    sum = Column(Float, nullable=False)
+    last_value = Column(Float, nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+
+
+# Rollups are maintained by the database itself, so that every way of inserting or deleting measurements
+# (single, batch, COPY...) keeps them up to date. The statement-level triggers that maintain them are only
+# created by the Alembic migrations (3c5e9a1f7b2d and 9e4b2d6f8a1c), not by create_all.
+# Likewise, the triggers notifying the workers LISTENing on the "measurements" channel of new and deleted
+# measurements are only created by the migrations 5d2f8c4e1a9b and 7a1c3e5b9d2f.
+
+
+class RetentionPolicy(Base):
+    """Days the measurements of a sensor type are kept, raw and per rollup resolution. Null keeps them forever."""
+    __tablename__ = "retention_policies"
+
+    sensor_type = Column(Enum(SensorType), primary_key=True)
+    raw_days = Column(Integer, nullable=True)
+    minute_days = Column(Integer, nullable=True)
+    hour_days = Column(Integer, nullable=True)
+    day_days = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        CheckConstraint(
+            "raw_days > 0 AND minute_days > 0 AND hour_days > 0 AND day_days > 0",
+            name="check_retention_days_positive",
+        ),
+    )
+
+
+class RetentionRun(Base):
+    """Rows reclaimed by a run of the retention policies."""
+    __tablename__ = "retention_runs"
+
+    run_id = Column(Integer, primary_key=True)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=False)
+    partitions_dropped = Column(Integer, nullable=False)
+    # Measurements of the dropped partitions
+    measurements_dropped = Column(Integer, nullable=False)
+    measurements_deleted = Column(Integer, nullable=False)
+    rollups_deleted = Column(Integer, nullable=False)
+
 
 class Actuator(Base):
     __tablename__ = "actuators"
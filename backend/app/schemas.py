@@ -46,6 +46,61 @@ class Measurement(MeasurementBase):
         from_attributes = True
 
 
+class MeasurementBucket(BaseModel):
+    sensor_id: int
+    timestamp: datetime # start of the bucket
+    min: float
+    max: float
+    avg: float
+    count: int
+
+    class Config:
+        from_attributes = True
+
+
+class MeasurementBatchItem(MeasurementBase):
+    timestamp: datetime | None = None # time of reception if not provided
+
+
+class MeasurementBatchRejection(BaseModel):
+    index: int # position of the rejected measurement in the batch
+    sensor_id: int
+    detail: str
+
+
+class MeasurementBatchResult(BaseModel):
+    inserted: list[Measurement]
+    rejected: list[MeasurementBatchRejection]
+
+
+class RetentionPolicyBase(BaseModel):
+    # Days to keep the raw measurements and the rollups of each resolution, None to keep them forever
+    raw_days: int | None = Field(default=None, gt=0)
+    minute_days: int | None = Field(default=None, gt=0)
+    hour_days: int | None = Field(default=None, gt=0)
+    day_days: int | None = Field(default=None, gt=0)
+
+
+class RetentionPolicy(RetentionPolicyBase):
+    sensor_type: SensorType
+
+    class Config:
+        from_attributes = True
+
+
+class RetentionRun(BaseModel):
+    run_id: int
+    started_at: datetime
+    finished_at: datetime
+    partitions_dropped: int
+    measurements_dropped: int # measurements of the dropped partitions
+    measurements_deleted: int
+    rollups_deleted: int
+
+    class Config:
+        from_attributes = True
+
+
 class ActuatorBase(BaseModel):
     actuator_type: ActuatorType
     sensor_id: int
@@ -73,6 +128,20 @@ class ActuatorActivation(BaseModel):
     class Config:
         from_attributes = True
 
+class ActuatorState(ActuatorActivation):
+    actuator_id: int
+
+class PoolStatus(BaseModel):
+    pool: str # class of the connection pool
+    size: int | None # connections kept open, None when the pool does not keep connections
+    checked_in: int | None
+    checked_out: int | None
+    overflow: int | None # connections opened beyond size
+    checkouts: int
+    timeouts: int # checkouts that gave up waiting for a connection
+    wait_seconds_total: float # time spent getting connections, including opening new ones
+    wait_seconds_max: float
+
 class Picture(BaseModel):
     data: str
 
@@ -104,3 +173,5 @@ class RandomMeasurements(BaseModel):
     deviation_rate:float = 0.20
     smoothing_factor:float = 0.50
     drift_adjustment:float = 0.15
+    replace: bool = True # delete all the measurements first
+    seed: int | None = None # for reproducible measurements
@@ -6,12 +6,13 @@ from pytz import UTC
 
 DISCONNECTED_DELTA = timedelta(days=1)
 
-def get_actuator_activation(actuator: schemas.Actuator, last_measurement: (models.Measurement | None)): 
+def get_actuator_activation(actuator: schemas.Actuator, last_measurement: (models.Measurement | schemas.Measurement | None), now: datetime | None = None): 
     """
     Determines whether an actuator should be activated based on its configuration and the latest measurement.
     Args:
         actuator (schemas.Actuator): The actuator configuration and state.
-        last_measurement (models.Measurement | None): The most recent measurement associated with the actuator, or None if no measurement exists.
+        last_measurement (models.Measurement | schemas.Measurement | None): The most recent measurement associated with the actuator, or None if no measurement exists.
+        now (datetime | None, optional): Time of the decision. Defaults to the current time.
     Returns:
         schemas.ActuatorActivation: An object indicating whether to activate the actuator, the activation status message, duration, and period.
     Raises:
@@ -38,7 +39,8 @@ def get_actuator_activation(actuator: schemas.Actuator, last_measurement: (model
     #####
     # Verify elapsed time since last measurement
     #####
-    now = datetime.now().astimezone()
+    if now is None:
+        now = datetime.now().astimezone()
     last_measure_time_elapsed = now - last_measurement.timestamp
 
     if(last_measure_time_elapsed > DISCONNECTED_DELTA):
@@ -62,3 +64,22 @@ def get_actuator_activation(actuator: schemas.Actuator, last_measurement: (model
 
     return schemas.ActuatorActivation(
         activate=activate, status="OK", duration=actuator.activation_duration, period=actuator.activation_period)
+
+
+def get_actuator_states(actuators_and_measurements: list[tuple[schemas.Actuator, models.Measurement | None]]):
+    """
+    Determines whether each actuator of a group should be activated, at the same instant.
+    Args:
+        actuators_and_measurements (list[tuple[schemas.Actuator, models.Measurement | None]]): Each actuator with
+            the most recent measurement of its sensor, or None if no measurement exists.
+    Returns:
+        list[schemas.ActuatorState]: The activation of each actuator, in the same order, tagged with its ID.
+    """
+    now = datetime.now().astimezone()
+    return [
+        schemas.ActuatorState(
+            actuator_id=actuator.actuator_id,
+            **get_actuator_activation(actuator, last_measurement, now=now).model_dump(),
+        )
+        for actuator, last_measurement in actuators_and_measurements
+    ]
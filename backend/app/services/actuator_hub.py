@@ -0,0 +1,161 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import crud, models, schemas
+from app.database import SessionLocal
+from app.services.actuator import get_actuator_states
+from app.services.measurement_listener import measurement_listener
+
+# Only the latest decisions matter, older ones are dropped when a subscriber falls behind
+SUBSCRIBER_QUEUE_SIZE: int = 8
+
+
+def evaluate_actuators(db: Session, sensor_id: int, actuator_ids: list[int]):
+    """
+    Determines the state of the given actuators from the latest measurement of their sensor.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_id (int): The ID of the sensor that received a new measurement.
+        actuator_ids (list[int]): The IDs of the actuators to evaluate.
+    Returns:
+        list[schemas.ActuatorState]: The state of each actuator still linked to the sensor.
+    """
+    query = select(models.Actuator).where(
+        models.Actuator.actuator_id.in_(actuator_ids), models.Actuator.sensor_id == sensor_id
+    )
+    actuators = db.execute(query).scalars().all()
+    if not actuators:
+        return []
+    last_measurement = crud.get_last_measurement(db, sensor_id)
+    return get_actuator_states([(actuator, last_measurement) for actuator in actuators])
+
+
+class ActuatorStateHub:
+    """
+    Pushes the state of the actuators to their subscribers whenever their sensor receives a new measurement.
+    Each new measurement triggers a single evaluation per actuator, whose result is fanned out to every subscriber
+    of the actuator. Measurements are notified through the measurement listener, so the hub of each worker sees
+    the measurements posted to all workers.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queues: dict[int, set[asyncio.Queue]] = {}
+        self._actuator_sensors: dict[int, int] = {}
+
+    def subscribe(self, actuator_id: int, sensor_id: int) -> asyncio.Queue:
+        """
+        Registers a subscriber for the states of an actuator. Must be called from the event loop.
+        Args:
+            actuator_id (int): The ID of the actuator.
+            sensor_id (int): The ID of the sensor of the actuator.
+        Returns:
+            asyncio.Queue: Queue receiving the schemas.ActuatorState of the actuator.
+        """
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._queues.setdefault(actuator_id, set()).add(queue)
+        self._actuator_sensors[actuator_id] = sensor_id
+        return queue
+
+    def unsubscribe(self, actuator_id: int, queue: asyncio.Queue) -> None:
+        queues = self._queues.get(actuator_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._queues[actuator_id]
+            del self._actuator_sensors[actuator_id]
+
+    def publish(self, states: list[schemas.ActuatorState]) -> None:
+        """
+        Sends each state to every subscriber of its actuator. Must be called from the event loop.
+        Args:
+            states (list[schemas.ActuatorState]): The states to send.
+        """
+        for state in states:
+            for queue in self._queues.get(state.actuator_id, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(state)
+
+    async def evaluate(self, sensor_id: int, actuator_ids: list[int]) -> list[schemas.ActuatorState]:
+        """
+        Determines the state of the given actuators in the threadpool, with a session of its own.
+        Args:
+            sensor_id (int): The ID of the sensor of the actuators.
+            actuator_ids (list[int]): The IDs of the actuators to evaluate.
+        Returns:
+            list[schemas.ActuatorState]: The state of each actuator still linked to the sensor.
+        """
+        def evaluate():
+            with SessionLocal() as db:
+                return evaluate_actuators(db, sensor_id, actuator_ids)
+
+        return await run_in_threadpool(evaluate)
+
+    async def _evaluate_and_publish(self, sensor_id: int, actuator_ids: list[int]) -> None:
+        try:
+            states = await self.evaluate(sensor_id, actuator_ids)
+        except Exception as e:
+            print(f"[Error] actuator states of sensor {sensor_id} could not be evaluated: {e}")
+            return
+        self.publish(states)
+
+    def _schedule(self, sensor_ids: set[int]) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        for sensor_id in sensor_ids:
+            actuator_ids = [
+                actuator_id for actuator_id, actuator_sensor_id in list(self._actuator_sensors.items())
+                if actuator_sensor_id == sensor_id
+            ]
+            if actuator_ids:
+                asyncio.run_coroutine_threadsafe(self._evaluate_and_publish(sensor_id, actuator_ids), self._loop)
+
+    async def events(
+        self, actuator_id: int, sensor_id: int, initial_states: list[schemas.ActuatorState], keepalive_seconds: float,
+    ) -> AsyncIterator[str]:
+        """
+        Server-Sent Events stream of the states of an actuator.
+        Args:
+            actuator_id (int): The ID of the actuator.
+            sensor_id (int): The ID of the sensor of the actuator.
+            initial_states (list[schemas.ActuatorState]): The states to send first.
+            keepalive_seconds (float): Time after which a comment is sent on an idle stream.
+        Yields:
+            str: "state" events and keep-alive comments.
+        """
+        queue = self.subscribe(actuator_id, sensor_id)
+        try:
+            states = initial_states
+            while True:
+                for state in states:
+                    yield f"event: state\ndata: {state.model_dump_json()}\n\n"
+                try:
+                    states = [await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)]
+                except asyncio.TimeoutError:
+                    states = []
+                    # Without the listener or the notify triggers, measurements are not notified: poll instead
+                    if not measurement_listener.notifying:
+                        states = await self.evaluate(sensor_id, [actuator_id])
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(actuator_id, queue)
+
+    def on_listener_connection(self, connected: bool) -> None:
+        # Measurements may have been missed while disconnected
+        if connected:
+            self._schedule(set(self._actuator_sensors.values()))
+
+    def on_measurement(self, payload: dict) -> None:
+        # Deleting the latest measurement changes the state as well
+        self._schedule({payload["sensor_id"]})
+
+
+actuator_states = ActuatorStateHub()
+measurement_listener.subscribe(actuator_states)
@@ -5,10 +5,15 @@ from shared.timelapse_models import TimelapseMetadata, TimelapseConfig, Timelaps
 
 CAM_CLIENT_BASE_URL: str = "http://cam-client:9000"
 PICTURE: str = "/picture"
+PICTURE_STREAM: str = "/picture/stream"
 TIMELAPSE: str = "/timelapse"
+# Names of the logical cameras of the camera daemon, same as in the cam-client
+CAMERA_NAME_PATTERN: str = r"^[A-Za-z0-9_-]{1,64}$"
 
 _client: httpx.AsyncClient | None = None
 TIMEOUT_SECONDS: float = 5.0
+# Longest wait for the next frame of a stream, e.g. while the camera starts
+STREAM_READ_TIMEOUT_SECONDS: float = 30.0
 
 async def get_client() -> httpx.AsyncClient:
     global _client
@@ -24,14 +29,14 @@ def _not_found(detail: str = "Not found."):
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
 
 
-async def _get(path: str, timeout: float | None = None) -> httpx.Response:
+async def _get(path: str, timeout: float | None = None, params: dict | None = None) -> httpx.Response:
     try:
         client = await get_client()
         url = f"{CAM_CLIENT_BASE_URL}{path}"
         if timeout is None:
-            response = await client.get(url)
+            response = await client.get(url, params=params)
         else:
-            response = await client.get(url, timeout=timeout)
+            response = await client.get(url, params=params, timeout=timeout)
         return response
     except (httpx.RequestError, httpx.ConnectError):
         _unavailable()
@@ -58,8 +63,22 @@ async def _delete(path: str) -> httpx.Response:
         _unavailable()
 
 
-async def get_picture() -> bytes:
-    response = await _get(PICTURE)
+def _camera_params(camera: str | None) -> dict:
+    return {} if camera is None else {"camera": camera}
+
+
+async def get_picture(camera: str | None = None) -> bytes:
+    """
+    Retrieves a picture of the camera.
+    Args:
+        camera (str | None, optional): The logical camera to read, e.g. a preview serving smaller frames.
+            Defaults to the camera of the cam-client.
+    Returns:
+        bytes: The JPEG bytes of the picture.
+    Raises:
+        HTTPException: 404 if the camera is unavailable, 503 if the cam-client is.
+    """
+    response = await _get(PICTURE, params=_camera_params(camera))
     if response.status_code == status.HTTP_404_NOT_FOUND:
         _not_found("Camera unavailable.")
     if response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
@@ -73,6 +92,40 @@ async def get_picture() -> bytes:
     return response.content
 
 
+async def open_picture_stream(camera: str | None = None) -> httpx.Response:
+    """
+    Opens the MJPEG stream of the camera. The body of the response is not read: iterate over it with aiter_raw,
+    then close it with aclose.
+    Args:
+        camera (str | None, optional): The logical camera to stream, the camera of the cam-client by default.
+    Returns:
+        httpx.Response: The open response of the cam-client.
+    Raises:
+        HTTPException: 404 if the camera is unavailable, 503 if the cam-client is.
+    """
+    try:
+        client = await get_client()
+        request = client.build_request(
+            "GET",
+            f"{CAM_CLIENT_BASE_URL}{PICTURE_STREAM}",
+            params=_camera_params(camera),
+            timeout=httpx.Timeout(TIMEOUT_SECONDS, read=STREAM_READ_TIMEOUT_SECONDS),
+        )
+        response = await client.send(request, stream=True)
+    except (httpx.RequestError, httpx.ConnectError):
+        _unavailable()
+    if response.is_success:
+        return response
+
+    await response.aread()
+    await response.aclose()
+    if response.status_code == status.HTTP_404_NOT_FOUND:
+        _not_found("Camera unavailable.")
+    if response.text:
+        print(f"[Error] cam-client {PICTURE_STREAM} returned {response.status_code}: {response.text}")
+    _unavailable("Camera service unavailable.")
+
+
 async def start_timelapse(config: TimelapseConfig) -> TimelapseStatus:
     response = await _post(f"{TIMELAPSE}/start", json=config.model_dump())
     if response.status_code == 400:
@@ -1,48 +1,237 @@
 import csv
+import zlib
+from collections.abc import Iterable, Iterator
+from datetime import datetime
 from io import StringIO
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app import models
+from app.classes.export_format import ExportFormat
+from app.classes.sensor_type import SensorType
 
+CSV_HEADER = [
+    "Sensor ID", "Sensor Type", "Sensor Value", "Timestamp",
+    "Threshold Critically Low", "Threshold Low", "Threshold High", "Threshold Critically High"
+]
 
+# Number of rows fetched from the server-side cursor, and written to the output, at a time
+EXPORT_BATCH_SIZE = 5000
 
-def export_all_measures_to_csv(db_session: Session):
+# Sensors with more measurements than this are split in several row groups (or record batches)
+COLUMNAR_MAX_ROWS_PER_GROUP = 1_000_000
+
+# Every batch shares the same dictionary, as required by the Arrow IPC file format
+SENSOR_TYPE_DICTIONARY = pa.array([sensor_type.name for sensor_type in SensorType])
+SENSOR_TYPE_INDICES = {sensor_type: index for index, sensor_type in enumerate(SensorType)}
+
+ARROW_SCHEMA = pa.schema([
+    ("sensor_id", pa.int32()),
+    ("sensor_type", pa.dictionary(pa.int8(), pa.string())),
+    ("value", pa.float64()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("threshold_critically_low", pa.float64()),
+    ("threshold_low", pa.float64()),
+    ("threshold_high", pa.float64()),
+    ("threshold_critically_high", pa.float64()),
+])
+
+
+def _measurements_export_query(
+    sensor_id: int | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+):
+    """Builds the query joining every exported measurement with its sensor, sorted by sensor, then by timestamp."""
+    query = (
+        select(
+            models.Sensor.sensor_id,
+            models.Sensor.sensor_type,
+            models.Measurement.value,
+            models.Measurement.timestamp,
+            models.Sensor.threshold_critically_low,
+            models.Sensor.threshold_low,
+            models.Sensor.threshold_high,
+            models.Sensor.threshold_critically_high,
+        )
+        .join(models.Sensor, models.Sensor.sensor_id == models.Measurement.sensor_id)
+        .order_by(models.Measurement.sensor_id, models.Measurement.timestamp)
+    )
+    if sensor_id is not None:
+        query = query.where(models.Measurement.sensor_id == sensor_id)
+    if start_time:
+        query = query.where(models.Measurement.timestamp > start_time)
+    if end_time:
+        query = query.where(models.Measurement.timestamp < end_time)
+    return query
+
+
+def export_all_measures_to_csv(
+    db_session: Session,
+    sensor_id: int | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+) -> Iterator[str]:
     """
-    Exports all measurements from all sensors into a CSV string sorted by sensor.
+    Exports the measurements of all sensors as CSV chunks sorted by sensor, then by timestamp.
+    The measurements are read in batches through a server-side cursor, so memory use does not grow with the table size.
     Args:
         db_session (Session): SQLAlchemy session used to query the Sensor and Measurement tables.
-    Returns:
+        sensor_id (int | None, optional): If provided, only exports the measurements of this sensor.
+        start_time (datetime | None, optional): Start of the time range (exclusive). Defaults to None.
+        end_time (datetime | None, optional): End of the time range (exclusive). Defaults to None.
+    Yields:
         str: CSV content with columns
              ["Sensor ID", "Sensor Type", "Sensor Value", "Timestamp",
-              "Threshold Critically Low", "Threshold Low", "Threshold High", "Threshold Critically High"].
+              "Threshold Critically Low", "Threshold Low", "Threshold High", "Threshold Critically High"],
+             starting with the header.
     Raises:
         sqlalchemy.exc.SQLAlchemyError: If a database error occurs during queries.
-        AttributeError: If a sensor referenced by a measurement lacks the expected threshold attributes.
     """
-    
-    sensor_ids = db_session.query(models.Sensor.sensor_id).distinct().all()
+    query = _measurements_export_query(sensor_id, start_time, end_time)
+
     csv_output = StringIO()
     csv_writer = csv.writer(csv_output)
-    csv_writer.writerow([
-        "Sensor ID", "Sensor Type", "Sensor Value", "Timestamp",
-        "Threshold Critically Low", "Threshold Low", "Threshold High", "Threshold Critically High"
-    ])
-
-    for sensor_id_tuple in sensor_ids:
-        sensor_id = sensor_id_tuple[0]
-        response = db_session.query(models.Measurement).filter_by(sensor_id=sensor_id)
-        sensor = db_session.query(models.Sensor).filter_by(sensor_id=sensor_id).first()
-        threshold_critically_low = sensor.threshold_critically_low
-        threshold_low = sensor.threshold_low
-        threshold_high = sensor.threshold_high
-        threshold_critically_high = sensor.threshold_critically_high
-
-        for measurement in response:
-            sensor_type = db_session.query(models.Sensor).filter_by(sensor_id=measurement.sensor_id).first().sensor_type.name
-            csv_writer.writerow([
-                sensor_id, sensor_type, measurement.value, measurement.timestamp,
-                threshold_critically_low, threshold_low, threshold_high, threshold_critically_high
-            ])
-
-    csv_content = csv_output.getvalue()
+    csv_writer.writerow(CSV_HEADER)
+    yield csv_output.getvalue()
+
+    result = db_session.execute(query, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+    for rows in result.partitions():
+        csv_output.seek(0)
+        csv_output.truncate()
+        csv_writer.writerows(
+            (row.sensor_id, row.sensor_type.name, row.value, row.timestamp,
+             row.threshold_critically_low, row.threshold_low, row.threshold_high, row.threshold_critically_high)
+            for row in rows
+        )
+        yield csv_output.getvalue()
+
     csv_output.close()
-    return csv_content
\ No newline at end of file
+
+
+def gzip_chunks(chunks: Iterable[str], encoding: str = "utf-8") -> Iterator[bytes]:
+    """
+    Compresses text chunks into a gzip stream, chunk by chunk.
+    Args:
+        chunks (Iterable[str]): Text chunks to compress.
+        encoding (str, optional): Encoding of the text. Defaults to "utf-8".
+    Yields:
+        bytes: The gzip stream, one compressed block per non-empty output of the compressor.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode(encoding))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file-like object collecting what a writer outputs until it is drained."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_sensor_record_batches(db_session: Session, query) -> Iterator[pa.RecordBatch]:
+    """Reads the exported rows through a server-side cursor and groups them in one record batch per sensor."""
+    columns = None
+    current_sensor_id = None
+
+    def to_record_batch():
+        return pa.RecordBatch.from_arrays([
+            pa.array(columns[0], pa.int32()),
+            pa.DictionaryArray.from_arrays(pa.array(columns[1], pa.int8()), SENSOR_TYPE_DICTIONARY),
+            pa.array(columns[2], pa.float64()),
+            pa.array(columns[3], pa.timestamp("us", tz="UTC")),
+            pa.array(columns[4], pa.float64()),
+            pa.array(columns[5], pa.float64()),
+            pa.array(columns[6], pa.float64()),
+            pa.array(columns[7], pa.float64()),
+        ], schema=ARROW_SCHEMA)
+
+    result = db_session.execute(query, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+    for rows in result.partitions():
+        for row in rows:
+            if row.sensor_id != current_sensor_id or len(columns[0]) >= COLUMNAR_MAX_ROWS_PER_GROUP:
+                if columns and columns[0]:
+                    yield to_record_batch()
+                columns = [[] for _ in ARROW_SCHEMA]
+                current_sensor_id = row.sensor_id
+            columns[0].append(row.sensor_id)
+            columns[1].append(SENSOR_TYPE_INDICES[row.sensor_type])
+            columns[2].append(row.value)
+            columns[3].append(row.timestamp)
+            columns[4].append(row.threshold_critically_low)
+            columns[5].append(row.threshold_low)
+            columns[6].append(row.threshold_high)
+            columns[7].append(row.threshold_critically_high)
+
+    if columns and columns[0]:
+        yield to_record_batch()
+
+
+def export_all_measures_to_columnar(
+    db_session: Session,
+    export_format: ExportFormat,
+    sensor_id: int | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+) -> Iterator[bytes]:
+    """
+    Exports the measurements of all sensors as a Parquet or Arrow IPC file, streamed chunk by chunk.
+    Measurements are sorted by sensor, then by timestamp, and each sensor is written as its own row group
+    (Parquet) or record batch (Arrow), with the sensor type dictionary-encoded and microsecond UTC timestamps.
+    Args:
+        db_session (Session): SQLAlchemy session used to query the Sensor and Measurement tables.
+        export_format (ExportFormat): ExportFormat.parquet or ExportFormat.arrow.
+        sensor_id (int | None, optional): If provided, only exports the measurements of this sensor.
+        start_time (datetime | None, optional): Start of the time range (exclusive). Defaults to None.
+        end_time (datetime | None, optional): End of the time range (exclusive). Defaults to None.
+    Yields:
+        bytes: Consecutive chunks of the file, at least one per sensor.
+    Raises:
+        ValueError: If the export format is not a columnar format.
+        sqlalchemy.exc.SQLAlchemyError: If a database error occurs during queries.
+    """
+    sink = _ChunkSink()
+    if export_format == ExportFormat.parquet:
+        writer = pq.ParquetWriter(sink, ARROW_SCHEMA)
+
+        def write_batch(batch: pa.RecordBatch):
+            writer.write_table(pa.Table.from_batches([batch]), row_group_size=batch.num_rows)
+    elif export_format == ExportFormat.arrow:
+        writer = pa.ipc.new_file(sink, ARROW_SCHEMA)
+        write_batch = writer.write_batch
+    else:
+        raise ValueError(f"{export_format} is not a columnar export format")
+
+    query = _measurements_export_query(sensor_id, start_time, end_time)
+    for batch in _iter_sensor_record_batches(db_session, query):
+        write_batch(batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
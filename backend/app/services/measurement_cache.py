@@ -0,0 +1,95 @@
+import threading
+
+from app import schemas
+from app.services.measurement_listener import measurement_listener
+
+
+class LastMeasurementCache:
+    """
+    Latest measurement of each sensor, kept in the memory of the worker.
+    Entries are filled on read, then replaced by newer measurements written by this worker or notified by the
+    database for the other workers, and dropped when measurements of the sensor are deleted.
+    The cache is only used while the measurement listener is notifying, i.e. connected with the notify triggers
+    in place, since it could otherwise miss the writes of the other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._measurements: dict[int, schemas.Measurement] = {}
+        # Incremented on each write to a sensor, so a read started before the write cannot fill a stale entry
+        self._versions: dict[int, int] = {}
+        self._epoch = 0
+        self.enabled = False
+
+    def get(self, sensor_id: int) -> schemas.Measurement | None:
+        """
+        Returns the cached latest measurement of the sensor.
+        Args:
+            sensor_id (int): The ID of the sensor.
+        Returns:
+            schemas.Measurement | None: The latest measurement, or None if it is not cached.
+        """
+        with self._lock:
+            if not self.enabled:
+                return None
+            return self._measurements.get(sensor_id)
+
+    def version(self, sensor_id: int) -> tuple[int, int]:
+        """
+        Returns the version of the sensor's entry, to take before reading its latest measurement from the database.
+        Args:
+            sensor_id (int): The ID of the sensor.
+        Returns:
+            tuple[int, int]: Opaque version to give to fill().
+        """
+        with self._lock:
+            return self._epoch, self._versions.get(sensor_id, 0)
+
+    def fill(self, measurement: schemas.Measurement, version: tuple[int, int]) -> None:
+        """
+        Caches the latest measurement read from the database, unless the sensor was written since the read started.
+        Args:
+            measurement (schemas.Measurement): The latest measurement of its sensor.
+            version (tuple[int, int]): The version returned by version() before the read.
+        """
+        with self._lock:
+            if self.enabled and version == (self._epoch, self._versions.get(measurement.sensor_id, 0)):
+                self._measurements[measurement.sensor_id] = measurement
+
+    def update(self, measurement: schemas.Measurement) -> None:
+        """
+        Replaces the cached measurement of the sensor if the given one is newer.
+        Args:
+            measurement (schemas.Measurement): A measurement that was just inserted.
+        """
+        with self._lock:
+            self._versions[measurement.sensor_id] = self._versions.get(measurement.sensor_id, 0) + 1
+            cached = self._measurements.get(measurement.sensor_id)
+            if cached is not None and measurement.timestamp >= cached.timestamp:
+                self._measurements[measurement.sensor_id] = measurement
+
+    def invalidate(self, sensor_id: int) -> None:
+        """
+        Drops the cached measurement of the sensor.
+        Args:
+            sensor_id (int): The ID of the sensor whose measurements were deleted.
+        """
+        with self._lock:
+            self._versions[sensor_id] = self._versions.get(sensor_id, 0) + 1
+            self._measurements.pop(sensor_id, None)
+
+    def on_listener_connection(self, connected: bool) -> None:
+        with self._lock:
+            self._measurements.clear()
+            self._epoch += 1
+            self.enabled = connected
+
+    def on_measurement(self, payload: dict) -> None:
+        if payload.get("deleted"):
+            self.invalidate(payload["sensor_id"])
+        else:
+            self.update(schemas.Measurement.model_validate(payload))
+
+
+last_measurements = LastMeasurementCache()
+measurement_listener.subscribe(last_measurements)
@@ -0,0 +1,125 @@
+import json
+import select
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+
+from app.database import LISTEN_DATABASE_URL
+from app.services.measurement_triggers import MEASUREMENT_TRIGGERS_QUERY, measurement_triggers
+
+MEASUREMENTS_CHANNEL: str = "measurements"
+POLL_TIMEOUT_SECONDS: float = 1.0
+RECONNECT_DELAY_SECONDS: float = 5.0
+# Interval between the checks of the notify triggers while they are missing, e.g. until the migrations are applied
+TRIGGERS_CHECK_SECONDS: float = 60.0
+
+
+class MeasurementListener:
+    """
+    Background thread LISTENing to the "measurements" channel, on which the database triggers publish the
+    latest measurement of each sensor inserted by a statement (and the sensors whose measurements were deleted).
+    Notifications are only sent on commit, so every worker sees the writes of all the others, in commit order.
+    The triggers are only created by the migrations: the listener is only notifying once it found them.
+    Subscribers implement:
+        on_listener_connection(connected: bool): Called when the listener starts being notified, once connected
+            with the notify triggers in place, and when it loses its connection. Notifications may have been
+            missed while it was not notifying.
+        on_measurement(payload: dict): Called with the decoded JSON payload of each notification.
+    """
+
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.connected = False
+        # Connected, and the notify triggers exist
+        self.notifying = False
+
+    def subscribe(self, subscriber) -> None:
+        self._subscribers.append(subscriber)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="measurement-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _set_notifying(self, notifying: bool) -> None:
+        self.notifying = notifying
+        for subscriber in self._subscribers:
+            try:
+                subscriber.on_listener_connection(notifying)
+            except Exception as e:
+                print(f"[Error] measurement listener subscriber failed: {e}")
+
+    def _dispatch(self, payload: dict) -> None:
+        for subscriber in self._subscribers:
+            try:
+                subscriber.on_measurement(payload)
+            except Exception as e:
+                print(f"[Error] measurement listener subscriber failed: {e}")
+
+    def _listen(self, connection) -> None:
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {MEASUREMENTS_CHANNEL}")
+        self.connected = True
+
+        next_check = 0.0
+        while not self._stop.is_set():
+            if not self.notifying and time.monotonic() >= next_check:
+                if self._has_notify_triggers(connection):
+                    self._set_notifying(True)
+                else:
+                    if next_check == 0.0:
+                        print("[Error] measurement listener found no notify triggers, apply the migrations")
+                    next_check = time.monotonic() + TRIGGERS_CHECK_SECONDS
+            readable, _, _ = select.select([connection], [], [], POLL_TIMEOUT_SECONDS)
+            if not readable:
+                continue
+            connection.poll()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                self._dispatch(json.loads(notification.payload))
+
+    @staticmethod
+    def _has_notify_triggers(connection) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute(MEASUREMENT_TRIGGERS_QUERY)
+            measurement_triggers.update(name for name, in cursor.fetchall())
+        return measurement_triggers.notify
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Keepalives detect a dead server, which an idle LISTEN connection would otherwise never notice
+                connection = psycopg2.connect(
+                    self._dsn, keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3
+                )
+            except psycopg2.Error as e:
+                print(f"[Error] measurement listener could not connect: {e}")
+                self._stop.wait(RECONNECT_DELAY_SECONDS)
+                continue
+
+            try:
+                self._listen(connection)
+            except (psycopg2.Error, OSError) as e:
+                print(f"[Error] measurement listener lost its connection: {e}")
+            finally:
+                self.connected = False
+                if self.notifying:
+                    self._set_notifying(False)
+                connection.close()
+            self._stop.wait(RECONNECT_DELAY_SECONDS)
+
+
+measurement_listener = MeasurementListener(LISTEN_DATABASE_URL)
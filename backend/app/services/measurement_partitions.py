@@ -0,0 +1,155 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+
+# Partitions are created this many months in advance, so that inserts never wait for one
+PARTITION_MONTHS_AHEAD: int = 3
+PARTITION_MAINTENANCE_INTERVAL: timedelta = timedelta(days=1)
+DEFAULT_PARTITION: str = "measurements_default"
+PARTITION_NAME = re.compile(r"^measurements_y(\d{4})m(\d{2})$")
+
+
+def month_start(timestamp: datetime) -> datetime:
+    """Returns the start of the UTC month of a timezone aware timestamp."""
+    return timestamp.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Returns the start of the month that is a number of months after the start of a month."""
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"measurements_y{month.year:04d}m{month.month:02d}"
+
+
+def get_measurement_partitions(db: Session) -> dict[str, datetime]:
+    """
+    Lists the monthly partitions of the measurements table, the default partition excluded.
+    Args:
+        db (Session): SQLAlchemy session.
+    Returns:
+        dict[str, datetime]: The start of the month of each partition, by partition name.
+    """
+    names = db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = 'measurements'::regclass"
+    )).scalars()
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[name] = datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+    return partitions
+
+
+def _lock_partitions(db: Session) -> None:
+    # Workers maintain the partitions concurrently at startup
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('measurement_partitions'))"))
+
+
+def create_measurement_partitions(db: Session, start: datetime, end: datetime) -> list[str]:
+    """
+    Creates the missing monthly partitions of the measurements between two timestamps, and the default partition
+    which receives the measurements of the months without a partition.
+    Measurements of a new month already stored in the default partition are moved to the new partition.
+    Args:
+        db (Session): SQLAlchemy session.
+        start (datetime): A timestamp of the first month to partition.
+        end (datetime): End of the range to partition (exclusive).
+    Returns:
+        list[str]: The names of the partitions created.
+    """
+    _lock_partitions(db)
+    db.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF measurements DEFAULT"))
+    existing = get_measurement_partitions(db)
+    created = []
+    month = month_start(start)
+    while month < end:
+        next_month = add_months(month, 1)
+        name = partition_name(month)
+        if name not in existing:
+            # A partition can't be attached while the default partition holds measurements of its range:
+            # the measurements are moved first. Statement triggers only fire on the parent table, so moving them
+            # neither updates the rollups nor notifies the listeners.
+            db.execute(text(f"CREATE TABLE {name} (LIKE measurements INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            db.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                    "WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ),
+                {"start": month, "end": next_month},
+            )
+            db.execute(text(
+                f"ALTER TABLE measurements ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+            ))
+            created.append(name)
+        month = next_month
+    db.commit()
+    return created
+
+
+def drop_measurement_partitions(db: Session, before: datetime) -> dict[str, int]:
+    """
+    Drops the monthly partitions whose measurements are all older than a timestamp: the retention of the
+    measurements costs a detach and a drop instead of a bulk DELETE. The rollups are kept.
+    Args:
+        db (Session): SQLAlchemy session.
+        before (datetime): Partitions ending at or before this timestamp are dropped.
+    Returns:
+        dict[str, int]: The number of measurements dropped, by partition name.
+    """
+    _lock_partitions(db)
+    dropped = {}
+    for name, month in sorted(get_measurement_partitions(db).items(), key=lambda partition: partition[1]):
+        if add_months(month, 1) > before:
+            continue
+        sensor_counts = db.execute(text(f"SELECT sensor_id, count(*) FROM {name} GROUP BY sensor_id")).all()
+        # The delete triggers don't fire on DROP: notify the workers as they would, so that they invalidate
+        # the cached last measurement of the sensors
+        for sensor_id, _ in sensor_counts:
+            db.execute(
+                text(
+                    "SELECT pg_notify('measurements', "
+                    "json_build_object('sensor_id', :sensor_id, 'deleted', true)::text)"
+                ),
+                {"sensor_id": sensor_id},
+            )
+        db.execute(text(f"ALTER TABLE measurements DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        dropped[name] = sum(count for _, count in sensor_counts)
+    db.commit()
+    return dropped
+
+
+def maintain_measurement_partitions(db: Session) -> list[str]:
+    """
+    Creates the partitions of the current month and of the next PARTITION_MONTHS_AHEAD months.
+    Args:
+        db (Session): SQLAlchemy session.
+    Returns:
+        list[str]: The names of the partitions created.
+    """
+    month = month_start(datetime.now(timezone.utc))
+    return create_measurement_partitions(db, month, add_months(month, PARTITION_MONTHS_AHEAD + 1))
+
+
+async def run_partition_maintenance(interval: timedelta = PARTITION_MAINTENANCE_INTERVAL) -> None:
+    """Maintains the partitions periodically, until cancelled."""
+    while True:
+        await asyncio.sleep(interval.total_seconds())
+        try:
+            with SessionLocal() as db:
+                await run_in_threadpool(maintain_measurement_partitions, db)
+        except Exception as e:
+            print(f"[Error] measurement partition maintenance failed: {e}")
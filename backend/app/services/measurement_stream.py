@@ -0,0 +1,171 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from app import crud, schemas
+from app.database import SessionLocal
+from app.services.measurement_listener import measurement_listener
+
+# A subscriber further behind than this many notifications has its stream ended, and resumes from its last measurement
+SUBSCRIBER_QUEUE_SIZE: int = 64
+# Number of measurements read at a time when sending the backlog of a stream
+BACKLOG_BATCH_SIZE: int = 1000
+
+
+class MeasurementStreamHub:
+    """
+    Streams the new measurements of each sensor to its subscribers.
+    Each notification of the measurement listener is read from the database once, then fanned out to every
+    subscriber of the sensor. Streams are ended when the listener connects or disconnects, since notifications
+    may have been missed: clients resume them from the last measurement they received.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queues: dict[int, set[asyncio.Queue]] = {}
+
+    def subscribe(self, sensor_ids: list[int]) -> asyncio.Queue:
+        """
+        Registers a subscriber for the new measurements of the given sensors. Must be called from the event loop.
+        Args:
+            sensor_ids (list[int]): The IDs of the sensors.
+        Returns:
+            asyncio.Queue: Queue receiving lists of schemas.Measurement, then None when the stream must end.
+        """
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        for sensor_id in sensor_ids:
+            self._queues.setdefault(sensor_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, sensor_ids: list[int], queue: asyncio.Queue) -> None:
+        for sensor_id in sensor_ids:
+            queues = self._queues.get(sensor_id)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self._queues[sensor_id]
+
+    @staticmethod
+    def _end(queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def publish(self, sensor_id: int, measurements: list[schemas.Measurement]) -> None:
+        """
+        Sends new measurements to every subscriber of their sensor. Must be called from the event loop.
+        Args:
+            sensor_id (int): The ID of the sensor.
+            measurements (list[schemas.Measurement]): The new measurements of the sensor.
+        """
+        for queue in self._queues.get(sensor_id, ()):
+            if queue.full():
+                self._end(queue)
+            else:
+                queue.put_nowait(measurements)
+
+    def end_all(self) -> None:
+        """Ends every stream. Must be called from the event loop."""
+        for queue in {queue for queues in self._queues.values() for queue in queues}:
+            self._end(queue)
+
+    def fetch(
+        self, sensor_ids: list[int], after_measurement_id: int,
+        up_to_measurement_id: int | None = None, limit: int | None = None,
+    ) -> list[schemas.Measurement]:
+        with SessionLocal() as db:
+            measurements = crud.get_new_measurements(
+                db, sensor_ids, after_measurement_id, up_to_measurement_id=up_to_measurement_id, limit=limit
+            )
+            return [schemas.Measurement.model_validate(measurement) for measurement in measurements]
+
+    def max_measurement_id(self) -> int:
+        with SessionLocal() as db:
+            return crud.get_max_measurement_id(db)
+
+    async def _fetch_and_publish(self, sensor_id: int, first_measurement_id: int, last_measurement_id: int) -> None:
+        try:
+            measurements = await run_in_threadpool(
+                self.fetch, [sensor_id], first_measurement_id - 1, last_measurement_id
+            )
+        except Exception as e:
+            print(f"[Error] new measurements of sensor {sensor_id} could not be read: {e}")
+            return
+        if measurements:
+            self.publish(sensor_id, measurements)
+
+    def on_listener_connection(self, connected: bool) -> None:
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.end_all)
+
+    def on_measurement(self, payload: dict) -> None:
+        sensor_id = payload["sensor_id"]
+        if payload.get("deleted") or sensor_id not in self._queues:
+            return
+        if self._loop is None or self._loop.is_closed():
+            return
+        first_measurement_id = payload.get("first_measurement_id", payload["measurement_id"])
+        last_measurement_id = payload.get("last_measurement_id", payload["measurement_id"])
+        asyncio.run_coroutine_threadsafe(
+            self._fetch_and_publish(sensor_id, first_measurement_id, last_measurement_id), self._loop
+        )
+
+    async def events(
+        self, sensor_ids: list[int], last_measurement_id: int | None, keepalive_seconds: float,
+    ) -> AsyncIterator[str]:
+        """
+        Server-Sent Events stream of the new measurements of the given sensors.
+        Args:
+            sensor_ids (list[int]): The IDs of the sensors.
+            last_measurement_id (int | None): If provided, the measurements with a greater ID are sent first.
+            keepalive_seconds (float): Time after which a comment is sent on an idle stream.
+        Yields:
+            str: "measurement" events, whose id is the measurement ID, and keep-alive comments.
+        """
+        queue = self.subscribe(sensor_ids)
+        try:
+            if last_measurement_id is None:
+                last_measurement_id = await run_in_threadpool(self.max_measurement_id)
+            else:
+                while True:
+                    backlog = await run_in_threadpool(
+                        self.fetch, sensor_ids, last_measurement_id, limit=BACKLOG_BATCH_SIZE
+                    )
+                    for measurement in backlog:
+                        yield _measurement_event(measurement)
+                    if backlog:
+                        last_measurement_id = backlog[-1].measurement_id
+                    if len(backlog) < BACKLOG_BATCH_SIZE:
+                        break
+            # Notifications received before this point may contain measurements that were already sent
+            skip_up_to = last_measurement_id
+
+            while True:
+                try:
+                    measurements = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+                except asyncio.TimeoutError:
+                    measurements = []
+                    # Without the listener or the notify triggers, measurements are not notified: poll instead
+                    if not measurement_listener.notifying:
+                        measurements = await run_in_threadpool(self.fetch, sensor_ids, last_measurement_id)
+                    yield ": keep-alive\n\n"
+                if measurements is None:
+                    return
+                for measurement in measurements:
+                    if measurement.measurement_id <= skip_up_to:
+                        continue
+                    last_measurement_id = max(last_measurement_id, measurement.measurement_id)
+                    yield _measurement_event(measurement)
+        finally:
+            self.unsubscribe(sensor_ids, queue)
+
+
+def _measurement_event(measurement: schemas.Measurement) -> str:
+    return f"id: {measurement.measurement_id}\nevent: measurement\ndata: {measurement.model_dump_json()}\n\n"
+
+
+measurement_streams = MeasurementStreamHub()
+measurement_listener.subscribe(measurement_streams)
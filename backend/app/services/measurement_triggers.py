@@ -0,0 +1,42 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Triggers of the measurements table created by the migrations, but not by create_all at startup
+NOTIFY_TRIGGERS = frozenset({"measurements_notify_insert", "measurements_notify_delete"})
+ROLLUP_TRIGGERS = frozenset({"measurements_rollup", "measurements_rollup_delete"})
+MEASUREMENT_TRIGGERS_QUERY = (
+    "SELECT tgname FROM pg_trigger WHERE tgrelid = 'measurements'::regclass AND NOT tgisinternal"
+)
+
+
+class MeasurementTriggers:
+    """
+    Triggers found on the measurements table, checked at startup and whenever the measurement listener connects.
+    Without the notify triggers nothing is notified, and without the rollup triggers the rollups stay empty:
+    the features relying on them fall back to polling and to the raw measurements.
+    """
+
+    def __init__(self):
+        self.names: frozenset[str] = frozenset()
+
+    def update(self, names) -> None:
+        self.names = frozenset(names)
+
+    def check(self, db: Session) -> None:
+        """
+        Reads the triggers of the measurements table.
+        Args:
+            db (Session): SQLAlchemy session.
+        """
+        self.update(db.execute(text(MEASUREMENT_TRIGGERS_QUERY)).scalars())
+
+    @property
+    def notify(self) -> bool:
+        return NOTIFY_TRIGGERS <= self.names
+
+    @property
+    def rollups(self) -> bool:
+        return ROLLUP_TRIGGERS <= self.names
+
+
+measurement_triggers = MeasurementTriggers()
@@ -0,0 +1,175 @@
+import bisect
+import threading
+import time
+
+from app.database import QueryStats, get_pool_status, query_stats, request_query_stats
+
+# Upper bounds of the buckets of the histograms
+DURATION_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Content type of the Prometheus text format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Distribution of observed values, counted in cumulative buckets as Prometheus histograms are.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # the last one counts the values above every bucket
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bucket, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class RequestMetrics:
+    """
+    Latency and SQL statements of the requests of this worker, per method and route.
+    Routes are identified by their path template, e.g. /measurements/{sensor_id}, so that the number of series
+    stays bounded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.durations: dict[tuple[str, str], Histogram] = {}
+        self.query_counts: dict[tuple[str, str], Histogram] = {}
+        self.query_durations: dict[tuple[str, str], Histogram] = {}
+
+    def record(self, method: str, route: str, status: int, seconds: float, queries: QueryStats):
+        """
+        Records a request.
+        Args:
+            method (str): HTTP method of the request.
+            route (str): Path template of the route, or "unmatched".
+            status (int): Status code of the response, 500 if the request failed before sending one.
+            seconds (float): Time taken to handle the request and send its response, body included.
+            queries (QueryStats): SQL statements executed for the request.
+        """
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            if key not in self.durations:
+                self.durations[key] = Histogram(DURATION_BUCKETS)
+                self.query_counts[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.query_durations[key] = Histogram(DURATION_BUCKETS)
+            self.durations[key].observe(seconds)
+            self.query_counts[key].observe(queries.count)
+            self.query_durations[key].observe(queries.seconds_total)
+
+    def render(self) -> str:
+        """
+        Formats the metrics of the requests, of the SQL statements and of the connection pool of this worker in the
+        Prometheus text format.
+        Returns:
+            str: The metrics.
+        """
+        lines = [
+            "# HELP aquapoly_http_requests_total Requests handled, per route and status code.",
+            "# TYPE aquapoly_http_requests_total counter",
+        ]
+        with self._lock:
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'aquapoly_http_requests_total{{{_labels(method, route)},status="{status}"}} {count}')
+            histograms = [
+                ("aquapoly_http_request_duration_seconds", "Time to handle requests, response body included.",
+                 self.durations),
+                ("aquapoly_http_request_db_queries", "SQL statements executed per request.", self.query_counts),
+                ("aquapoly_http_request_db_query_duration_seconds", "Time spent executing SQL statements per request.",
+                 self.query_durations),
+            ]
+            for name, description, series in histograms:
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for (method, route), histogram in sorted(series.items()):
+                    lines += histogram.lines(name, _labels(method, route))
+
+        with query_stats._lock:
+            queries = [
+                ("aquapoly_db_queries_total", "counter", "SQL statements executed.", query_stats.count),
+                ("aquapoly_db_query_duration_seconds_total", "counter", "Time spent executing SQL statements.",
+                 query_stats.seconds_total),
+                ("aquapoly_db_query_duration_seconds_max", "gauge", "Longest SQL statement.", query_stats.seconds_max),
+            ]
+        pool = get_pool_status()
+        gauges = queries + [
+            ("aquapoly_db_pool_size", "gauge", "Connections kept open by the pool.", pool["size"]),
+            ("aquapoly_db_pool_checked_in", "gauge", "Idle connections of the pool.", pool["checked_in"]),
+            ("aquapoly_db_pool_checked_out", "gauge", "Connections in use.", pool["checked_out"]),
+            ("aquapoly_db_pool_overflow", "gauge", "Connections opened beyond the size of the pool.", pool["overflow"]),
+            ("aquapoly_db_pool_checkouts_total", "counter", "Connections taken from the pool.", pool["checkouts"]),
+            ("aquapoly_db_pool_timeouts_total", "counter", "Checkouts that gave up waiting for a connection.",
+             pool["timeouts"]),
+            ("aquapoly_db_pool_wait_seconds_total", "counter", "Time spent getting connections.",
+             pool["wait_seconds_total"]),
+            ("aquapoly_db_pool_wait_seconds_max", "gauge", "Longest wait for a connection.",
+             pool["wait_seconds_max"]),
+        ]
+        for name, metric_type, description, value in gauges:
+            # The counts of connections are None without a QueuePool
+            if value is not None:
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording the latency and the SQL statements of each HTTP request in request_metrics.
+    Requests are timed until the last chunk of their response body is sent, so streamed exports are measured whole.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        queries = QueryStats()
+        token = request_query_stats.set(queries)
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_query_stats.reset(token)
+            route = scope.get("route")
+            request_metrics.record(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - started,
+                queries,
+            )
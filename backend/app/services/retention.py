@@ -0,0 +1,147 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.classes.rollup_resolution import RollupResolution
+from app.classes.sensor_type import SensorType
+from app.database import engine
+from app.services.measurement_partitions import drop_measurement_partitions
+
+# Rows deleted per transaction, so that no transaction holds its locks for long
+RETENTION_BATCH_SIZE: int = 5000
+RETENTION_INTERVAL: timedelta = timedelta(hours=1)
+
+
+def _delete_in_batches(
+    db: Session,
+    model,
+    primary_key: list,
+    conditions: list,
+    batch_size: int,
+    keep_rollups: bool = False,
+) -> int:
+    """Deletes the rows of a model matching the conditions, committing every batch_size rows."""
+    deleted = 0
+    while True:
+        if keep_rollups:
+            # See the trigger measurements_rollup_delete (migration 2f7b9d3e5a8c)
+            db.execute(text("SET LOCAL aquapoly.keep_rollups = 'on'"))
+        batch = select(*primary_key).where(*conditions).limit(batch_size)
+        result = db.execute(
+            delete(model).where(tuple_(*primary_key).in_(batch)).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def enforce_retention_policies(
+    db: Session,
+    now: datetime | None = None,
+    batch_size: int = RETENTION_BATCH_SIZE,
+) -> models.RetentionRun:
+    """
+    Removes the raw measurements and the rollups older than the retention policies of their sensor type.
+    The rollups of the removed measurements are kept, so that the history stays available at a lower resolution.
+    The partitions past the raw retention of every sensor type are dropped, the other measurements are deleted
+    in batches.
+    Args:
+        db (Session): SQLAlchemy session.
+        now (datetime | None, optional): Time the retention periods are counted from. Defaults to now.
+        batch_size (int, optional): Maximum number of rows deleted per transaction.
+    Returns:
+        models.RetentionRun: The rows reclaimed by the run, saved in the database.
+    """
+    started_at = datetime.now(timezone.utc)
+    now = now or started_at
+    # Copied, as the commit of each batch expires the models
+    policies = [
+        schemas.RetentionPolicy.model_validate(policy)
+        for policy in db.execute(select(models.RetentionPolicy)).scalars()
+    ]
+    run = models.RetentionRun(
+        started_at=started_at, partitions_dropped=0, measurements_dropped=0, measurements_deleted=0, rollups_deleted=0
+    )
+
+    raw_days = [policy.raw_days for policy in policies]
+    if len(raw_days) == len(SensorType) and None not in raw_days:
+        dropped = drop_measurement_partitions(db, now - timedelta(days=max(raw_days)))
+        run.partitions_dropped = len(dropped)
+        run.measurements_dropped = sum(dropped.values())
+
+    for policy in policies:
+        sensor_ids = select(models.Sensor.sensor_id).where(models.Sensor.sensor_type == policy.sensor_type)
+        if policy.raw_days is not None:
+            run.measurements_deleted += _delete_in_batches(
+                db,
+                models.Measurement,
+                [models.Measurement.measurement_id, models.Measurement.timestamp],
+                [
+                    models.Measurement.sensor_id.in_(sensor_ids),
+                    models.Measurement.timestamp < now - timedelta(days=policy.raw_days),
+                ],
+                batch_size,
+                keep_rollups=True,
+            )
+        rollup_days = {
+            RollupResolution.minute: policy.minute_days,
+            RollupResolution.hour: policy.hour_days,
+            RollupResolution.day: policy.day_days,
+        }
+        for resolution, days in rollup_days.items():
+            if days is None:
+                continue
+            run.rollups_deleted += _delete_in_batches(
+                db,
+                models.MeasurementRollup,
+                [
+                    models.MeasurementRollup.sensor_id,
+                    models.MeasurementRollup.resolution,
+                    models.MeasurementRollup.bucket_start,
+                ],
+                [
+                    models.MeasurementRollup.sensor_id.in_(sensor_ids),
+                    models.MeasurementRollup.resolution == resolution,
+                    models.MeasurementRollup.bucket_start < now - timedelta(days=days),
+                ],
+                batch_size,
+            )
+
+    run.finished_at = datetime.now(timezone.utc)
+    db.add(run)
+    db.commit()
+    return run
+
+
+def run_retention() -> models.RetentionRun | None:
+    """
+    Enforces the retention policies unless another worker is already doing it.
+    Returns:
+        models.RetentionRun | None: The rows reclaimed by the run, None if another run is in progress.
+    """
+    # The advisory lock belongs to the connection: the session keeps the same one across its batches
+    with engine.connect() as connection, Session(bind=connection, expire_on_commit=False) as db:
+        if not db.execute(text("SELECT pg_try_advisory_lock(hashtext('measurement_retention'))")).scalar():
+            return None
+        try:
+            run = enforce_retention_policies(db)
+        finally:
+            db.rollback()
+            db.execute(text("SELECT pg_advisory_unlock(hashtext('measurement_retention'))"))
+            db.commit()
+    return run
+
+
+async def run_retention_periodically(interval: timedelta = RETENTION_INTERVAL) -> None:
+    """Enforces the retention policies periodically, until cancelled."""
+    while True:
+        await asyncio.sleep(interval.total_seconds())
+        try:
+            await run_in_threadpool(run_retention)
+        except Exception as e:
+            print(f"[Error] measurement retention failed: {e}")
@@ -0,0 +1,220 @@
+import struct
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.measurement_partitions import create_measurement_partitions
+
+# Time columns generated and copied at once: the memory used is about 60 bytes per measurement
+CHUNK_MEASUREMENTS: int = 1_000_000
+
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+# Row of the binary COPY format: field count, then the length and big-endian value of each field
+COPY_ROW = np.dtype([
+    ("fields", ">i2"),
+    ("sensor_id_length", ">i4"),
+    ("sensor_id", ">i4"),
+    ("timestamp_length", ">i4"),
+    ("timestamp", ">i8"), # microseconds since PG_EPOCH
+    ("value_length", ">i4"),
+    ("value", ">f8"),
+])
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+
+
+def recurrence(x: np.ndarray, decay: float, initial: np.ndarray) -> np.ndarray:
+    """
+    Computes y[t] = decay * y[t - 1] + x[t] along the last axis without a loop over t, from the closed form
+    y[t] = decay^(t + 1) * (initial + sum(x[k] / decay^(k + 1) for k <= t)), in blocks short enough for the powers
+    of decay to stay in the range of floats.
+    Args:
+        x (np.ndarray): Inputs, one row per series.
+        decay (float): Weight of the previous output, between 0 and 1.
+        initial (np.ndarray): Output before the first input, one per series.
+    Returns:
+        np.ndarray: The outputs, same shape as x.
+    """
+    if decay == 1:
+        return initial[..., None] + np.cumsum(x, axis=-1)
+    if decay == 0:
+        return x.astype(float)
+    # decay^-block must not overflow
+    block = int(max(1, min(4096, 300 / -np.log10(decay))))
+    y = np.empty(x.shape)
+    previous = initial.astype(float)
+    for start in range(0, x.shape[-1], block):
+        end = min(start + block, x.shape[-1])
+        powers = decay ** np.arange(1, end - start + 1)
+        y[..., start:end] = powers * (previous[..., None] + np.cumsum(x[..., start:end] / powers, axis=-1))
+        previous = y[..., end - 1]
+    return y
+
+
+class SyntheticMeasurements:
+    """
+    Random walks of the values of sensors, generated in chunks of consecutive samples.
+    Each step is Gaussian, exponentially smoothed by smoothing_factor and clamped to threshold, the maximum
+    change between two samples. The walk is pulled back towards the middle of the critical thresholds by
+    drift_adjustment, and the values are clamped to the critical thresholds.
+    """
+
+    def __init__(
+        self,
+        sensors: list[models.Sensor],
+        deviation_rate: float,
+        smoothing_factor: float,
+        drift_adjustment: float,
+        rng: np.random.Generator,
+    ):
+        low = np.array([sensor.threshold_critically_low for sensor in sensors], dtype=float)
+        high = np.array([sensor.threshold_critically_high for sensor in sensors], dtype=float)
+        self.low, self.high = low, high
+        self.middle = (high + low) / 2
+        self.spread = (high - low) * deviation_rate / 2
+        self.threshold = self.spread / 2
+        self.smoothing_factor = smoothing_factor
+        self.drift_adjustment = drift_adjustment
+        self.rng = rng
+        self.step = np.zeros(len(sensors))
+        self.offset = rng.normal(0, self.spread)
+
+    def next(self, count: int) -> np.ndarray:
+        """
+        Generates the next samples of every sensor.
+        Args:
+            count (int): Number of samples per sensor.
+        Returns:
+            np.ndarray: The values, one row per sensor, rounded to 2 decimals.
+        """
+        noise = self.rng.normal(0, 1, (len(self.middle), count)) * self.threshold[:, None]
+        alpha = self.smoothing_factor
+        steps = recurrence(alpha * noise, 1 - alpha, self.step)
+        self.step = steps[:, -1]
+        steps = np.clip(steps, -self.threshold[:, None], self.threshold[:, None])
+        offsets = recurrence(steps, 1 - self.drift_adjustment / 2, self.offset)
+        self.offset = offsets[:, -1]
+        return np.round(np.clip(self.middle[:, None] + offsets, self.low[:, None], self.high[:, None]), 2)
+
+
+def stratified_timestamps(start: datetime, end: datetime, count: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Spreads sorted random timestamps over a time range: one uniformly drawn in each of count equal slices.
+    Args:
+        start (datetime): Start of the time range.
+        end (datetime): End of the time range.
+        count (int): Number of timestamps.
+        rng (np.random.Generator): Random generator.
+    Returns:
+        np.ndarray: Microseconds since PG_EPOCH.
+    """
+    start_us = (start - PG_EPOCH) // timedelta(microseconds=1)
+    span_us = (end - start) // timedelta(microseconds=1)
+    return start_us + ((np.arange(count) + rng.random(count)) * span_us / max(count, 1)).astype(np.int64)
+
+
+def copy_measurements(db: Session, sensor_ids: np.ndarray, timestamps: np.ndarray, values: np.ndarray) -> None:
+    """
+    Inserts measurements with a binary COPY. The statement triggers fire once for all of them.
+    Args:
+        db (Session): SQLAlchemy session.
+        sensor_ids (np.ndarray): Sensor of each measurement.
+        timestamps (np.ndarray): Microseconds since PG_EPOCH of each measurement.
+        values (np.ndarray): Value of each measurement.
+    """
+    rows = np.empty(len(sensor_ids), dtype=COPY_ROW)
+    rows["fields"] = 3
+    rows["sensor_id_length"] = 4
+    rows["sensor_id"] = sensor_ids
+    rows["timestamp_length"] = 8
+    rows["timestamp"] = timestamps
+    rows["value_length"] = 8
+    rows["value"] = values
+    data = BytesIO(COPY_HEADER + rows.tobytes() + COPY_TRAILER)
+    with db.connection().connection.cursor() as cursor:
+        cursor.copy_expert("COPY measurements (sensor_id, timestamp, value) FROM STDIN WITH (FORMAT binary)", data)
+
+
+def generate_measurements(
+    db: Session,
+    nb_measurements: int,
+    yearly_ratio: float,
+    daily_ratio: float,
+    hourly_ratio: float,
+    deviation_rate: float,
+    smoothing_factor: float,
+    drift_adjustment: float,
+    replace: bool = False,
+    seed: int | None = None,
+    chunk_measurements: int = CHUNK_MEASUREMENTS,
+) -> int:
+    """
+    Generates synthetic measurements of all the sensors of the database and loads them with COPY, in chunks
+    committed one by one. The measurements are spread over the last year, day and hour according to the ratios,
+    the measurements of each period being inserted in timestamp order.
+    Args:
+        db (Session): SQLAlchemy session.
+        nb_measurements (int): Number of measurements to generate, over all sensors.
+        yearly_ratio (float): Proportion of the measurements spread over the last year.
+        daily_ratio (float): Proportion of the measurements spread over the last day.
+        hourly_ratio (float): Proportion of the measurements spread over the last hour.
+        deviation_rate (float): Spread of the values, relative to the range of the critical thresholds.
+        smoothing_factor (float): Weight of each new random step, between 0 (constant steps) and 1 (no smoothing).
+        drift_adjustment (float): Pull of the values towards the middle of the critical thresholds, between 0 and 1.
+        replace (bool, optional): Whether to delete all the measurements and rollups first, with a TRUNCATE.
+        seed (int | None, optional): Seed of the random generator, for reproducible data.
+        chunk_measurements (int, optional): Maximum number of measurements copied per transaction.
+    Returns:
+        int: The number of measurements inserted.
+    Raises:
+        ValueError: If the database has no sensors.
+    """
+    sensors = db.execute(select(models.Sensor).order_by(models.Sensor.sensor_id)).scalars().all()
+    if not sensors:
+        raise ValueError("The database has no sensors to generate measurements for")
+    rng = np.random.default_rng(seed)
+    walks = SyntheticMeasurements(sensors, deviation_rate, smoothing_factor, drift_adjustment, rng)
+    sensor_ids = np.array([sensor.sensor_id for sensor in sensors], dtype=np.int32)
+    now = datetime.now(timezone.utc)
+
+    if replace:
+        # Much faster than a DELETE, but the delete triggers don't fire: notify the workers as they would
+        db.execute(text("TRUNCATE measurements, measurement_rollups"))
+        for sensor_id in sensor_ids:
+            db.execute(
+                text(
+                    "SELECT pg_notify('measurements', "
+                    "json_build_object('sensor_id', :sensor_id, 'deleted', true)::text)"
+                ),
+                {"sensor_id": int(sensor_id)},
+            )
+        db.commit()
+    create_measurement_partitions(db, now - timedelta(days=365), now)
+
+    inserted = 0
+    periods = [
+        (timedelta(days=365), yearly_ratio),
+        (timedelta(days=1), daily_ratio),
+        (timedelta(hours=1), hourly_ratio),
+    ]
+    for period, ratio in periods:
+        per_sensor = int(nb_measurements * ratio) // len(sensors)
+        timestamps = stratified_timestamps(now - period, now, per_sensor, rng)
+        chunk = max(1, chunk_measurements // len(sensors))
+        for start in range(0, per_sensor, chunk):
+            values = walks.next(min(chunk, per_sensor - start))
+            count = values.shape[1]
+            # Interleaved by timestamp, as the sensors send them
+            copy_measurements(
+                db,
+                np.tile(sensor_ids, count),
+                np.repeat(timestamps[start:start + count], len(sensors)),
+                values.T.ravel(),
+            )
+            db.commit()
+            inserted += values.size
+    return inserted
@@ -0,0 +1,56 @@
+"""
+Fills a database with synthetic measurements of its sensors, e.g. for capacity testing.
+
+The measurements are generated and loaded with COPY by chunks of a million, see
+app.services.synthetic_measurements. The database must be migrated and have sensors: start the backend once.
+
+    python -m benchmarks.seed_measurements --rows 50000000 --replace
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.schemas import RandomMeasurements
+from app.services.synthetic_measurements import generate_measurements
+
+
+def main():
+    defaults = RandomMeasurements()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=SQLALCHEMY_DATABASE_URL, help="database to fill, the app's by default")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="measurements to insert, over all sensors")
+    parser.add_argument("--yearly-ratio", type=float, default=defaults.yearly_measurements_ratio)
+    parser.add_argument("--daily-ratio", type=float, default=defaults.dayly_measurements_ratio)
+    parser.add_argument("--hourly-ratio", type=float, default=defaults.hourly_measurements_ratio)
+    parser.add_argument("--deviation-rate", type=float, default=defaults.deviation_rate)
+    parser.add_argument("--smoothing-factor", type=float, default=defaults.smoothing_factor)
+    parser.add_argument("--drift-adjustment", type=float, default=defaults.drift_adjustment)
+    parser.add_argument("--replace", action="store_true", help="delete all the measurements and rollups first")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    began = time.perf_counter()
+    with Session(engine) as db:
+        inserted = generate_measurements(
+            db,
+            args.rows,
+            args.yearly_ratio,
+            args.daily_ratio,
+            args.hourly_ratio,
+            args.deviation_rate,
+            args.smoothing_factor,
+            args.drift_adjustment,
+            replace=args.replace,
+            seed=args.seed,
+        )
+    seconds = time.perf_counter() - began
+    print(f"Inserted {inserted} measurements in {seconds:.0f} s ({inserted / seconds:.0f} rows/s)")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
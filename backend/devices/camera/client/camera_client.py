@@ -1,7 +1,24 @@
+import asyncio
 import os
 from socket import socket, AF_UNIX, SOCK_STREAM
+from struct import Struct
+from threading import Lock
 import time
 from pathlib import Path
+from typing import AsyncIterator
+
+# Protocol of the camera sockets, see the README of the camera daemon
+REQUEST = Struct(">4sBBQ") # magic, protocol version, command, sequence number
+REQUEST_MAGIC = b"CAMR"
+PROTOCOL_VERSION = 1
+SUBSCRIBE = 1
+NEXT = 2
+SINCE = 3
+FRAME_HEADER = Struct(">BQI") # status, sequence number, length of the frame
+FRAME_OK = 0
+FRAME_NO_FRAME = 1
+# The daemon answers within 5 seconds, with a frame or without one
+RESPONSE_TIMEOUT: float = 10
 
 class CameraSocketNotFoundError(BrokenPipeError):
     pass
@@ -17,28 +34,135 @@ class CameraClient:
     def __init__(self, camera_name: str):
         self.sock_path: Path = Path(self.CAMERA_SOCK_DIR / f"{camera_name}.sock")
         self.last_image: tuple[bytes, float] | None = None
+        # Connection kept open between requests, shared by the threads of the client
+        self._sock: socket | None = None
+        self._lock = Lock()
+        self._header = bytearray(FRAME_HEADER.size)
+        self._buffer = bytearray()
     
     def _ensure_socket(self):
         if self.sock_path is None or not self.sock_path.exists():
             raise CameraSocketNotFoundError(self.sock_path)
 
     @staticmethod
-    def _read_exact(sock: socket, n: int) -> bytes:
-        data = b""
-        while len(data) < n:
-            chunk = sock.recv(n - len(data))
-            if not chunk:
+    def _recv_into(sock: socket, view: memoryview):
+        received = 0
+        while received < len(view):
+            count = sock.recv_into(view[received:])
+            if count == 0:
                 raise CameraNotAvailableError()
-            data += chunk
-        return data
-    
+            received += count
+
+    def _connect(self) -> socket:
+        sock = socket(AF_UNIX, SOCK_STREAM)
+        sock.settimeout(RESPONSE_TIMEOUT)
+        try:
+            sock.connect(str(self.sock_path))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _exchange(self, command: int, seq: int) -> tuple[int, int, memoryview]:
+        """Sends a request over the open connection and reads the frame into the buffer of the client."""
+        self._sock.sendall(REQUEST.pack(REQUEST_MAGIC, PROTOCOL_VERSION, command, seq))
+        self._recv_into(self._sock, memoryview(self._header))
+        status, frame_seq, size = FRAME_HEADER.unpack(self._header)
+        if size > len(self._buffer):
+            # Room for the slightly larger frames that usually follow
+            self._buffer = bytearray(size * 2)
+        frame = memoryview(self._buffer)[:size]
+        self._recv_into(self._sock, frame)
+        return status, frame_seq, frame
+
+    def _request(self, command: int, seq: int = 0) -> tuple[int, bytes]:
+        """
+        Requests a frame over the connection kept open to the camera socket, opening it again if the daemon closed it.
+        Returns:
+            The sequence number and the bytes of the frame.
+        Raises:
+            CameraNotAvailableError: If the camera gave no frame.
+        """
+        self._ensure_socket()
+        with self._lock:
+            reused = self._sock is not None
+            if not reused:
+                self._sock = self._connect()
+            try:
+                status, frame_seq, frame = self._exchange(command, seq)
+            except OSError:
+                self._close()
+                if not reused:
+                    raise
+                # The daemon restarted or dropped the connection since the previous request
+                self._sock = self._connect()
+                try:
+                    status, frame_seq, frame = self._exchange(command, seq)
+                except OSError:
+                    self._close()
+                    raise
+
+            if status == FRAME_NO_FRAME:
+                raise CameraNotAvailableError()
+            if status != FRAME_OK:
+                self._close()
+                raise CameraNotAvailableError()
+            return frame_seq, bytes(frame)
+
     def _fetch_frame(self) -> bytes:
-        """Connect to camera socket and retrieve one frame."""
+        """Retrieves the first frame captured after the call."""
+        _, frame = self._request(NEXT)
+        return frame
+
+    def next_frame(self, after_seq: int = 0) -> tuple[int, bytes]:
+        """
+        Retrieves the latest frame newer than after_seq, without waiting if the camera already captured one.
+        Args:
+            after_seq: The sequence number of the last frame received, 0 for any frame.
+        Returns:
+            The sequence number and the bytes of the frame.
+        Raises:
+            PermissionError: If the container is ill-defined for socket access.
+            CameraSocketNotFoundError: If no camera socket is mounted.
+            CameraNotAvailableError: If the camera gave no frame.
+        """
+        return self._request(SINCE, after_seq)
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """
+        Yields each new frame of the camera, over a single connection to its socket.
+        Once the first frame is received, the frames the camera does not give in time are skipped.
+        Raises:
+            PermissionError: If the container is ill-defined for socket access.
+            CameraSocketNotFoundError: If no camera socket is mounted.
+            CameraNotAvailableError: If the camera gives no first frame, or the daemon ends the stream.
+        """
         self._ensure_socket()
-        with socket(AF_UNIX, SOCK_STREAM) as s:
-            s.connect(str(self.sock_path))
-            size = int.from_bytes(CameraClient._read_exact(s, 4), "big")
-            return CameraClient._read_exact(s, size)
+        reader, writer = await asyncio.open_unix_connection(str(self.sock_path))
+        try:
+            writer.write(REQUEST.pack(REQUEST_MAGIC, PROTOCOL_VERSION, SUBSCRIBE, 0))
+            await writer.drain()
+            streaming = False
+            while True:
+                try:
+                    status, _, size = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                    frame = await reader.readexactly(size)
+                except asyncio.IncompleteReadError:
+                    raise CameraNotAvailableError()
+                if status == FRAME_NO_FRAME and streaming:
+                    # A gap in the capture: the daemon keeps waiting for the next frame
+                    continue
+                if status != FRAME_OK:
+                    raise CameraNotAvailableError()
+                streaming = True
+                yield frame
+        finally:
+            writer.close()
 
     def capture(self) -> bytes:
         """Always fetches a fresh frame directly from the camera socket."""
@@ -66,11 +190,16 @@ class CameraClient:
         return self.last_image[0]
 
 # Can be used as a singleton
-# In the future, more cameras could be supported
+# The other logical cameras, e.g. one serving smaller frames for previews, are requested by name
+
+# Names of logical cameras, whose socket is <name>.sock in CAMERA_SOCK_DIR
+CAMERA_NAME_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+# Socket of the daemon that is not a camera
+CONTROL_NAME = "control"
 
 def _load_camera_name() -> str:
     name: str = os.getenv("CAMERA_NAME")
-    warning: str | None = "cannot be 'control'" if name == "control" else "is not set" if name is None else None
+    warning: str | None = f"cannot be '{CONTROL_NAME}'" if name == CONTROL_NAME else "is not set" if name is None else None
     if warning:
         print(f"Warning: CAMERA_NAME environment variable {warning}, defaulting to 'camera0'")
         name = "camera0"
@@ -1,22 +1,45 @@
-from fastapi import FastAPI, HTTPException, Response
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
 
 from shared.timelapse_models import TimelapseMetadata
-from camera_client import CameraClient, CameraSocketNotFoundError, CameraNotAvailableError, CAMERA_NAME
+from camera_client import (
+    CameraClient, CameraSocketNotFoundError, CameraNotAvailableError, CAMERA_NAME, CAMERA_NAME_PATTERN, CONTROL_NAME
+)
 from timelapse_client import TimelapseClient, TimelapseConfig, TimelapseStatus
 
 app = FastAPI()
 
 camera_client = CameraClient(CAMERA_NAME)
 timelapse_client = TimelapseClient(camera_client)
+# Clients of the other logical cameras requested so far
+camera_clients: dict[str, CameraClient] = {}
+
+STREAM_BOUNDARY = "frame"
+CameraName = Query(None, pattern=CAMERA_NAME_PATTERN, description="Logical camera to read, CAMERA_NAME by default.")
+
+
+def _get_camera(name: str | None) -> CameraClient | None:
+    """Returns the client of a logical camera, CAMERA_NAME by default, or None if the daemon has no such camera."""
+    if name is None or name == CAMERA_NAME:
+        return camera_client
+    client = camera_clients.get(name)
+    if client is None:
+        client = CameraClient(name)
+        if name == CONTROL_NAME or not client.sock_path.exists():
+            return None
+        client = camera_clients.setdefault(name, client)
+    return client
 
 
 # --- Camera ---
 
 @app.get("/picture")
-def picture():
+def picture(camera: str | None = CameraName):
+    client = _get_camera(camera)
+    if client is None:
+        return Response(content="Unknown camera.", status_code=404)
     try:
-        image_bytes: bytes = camera_client.get_image()
+        image_bytes: bytes = client.get_image()
         return Response(content=image_bytes, media_type="image/png")
     except PermissionError as e:
         print(f"[Error] /picture permission error: {e}")
@@ -27,6 +50,46 @@ def picture():
     except CameraNotAvailableError as e:
         return Response(content=str(e), status_code=404)
 
+@app.get("/picture/stream")
+async def picture_stream(camera: str | None = CameraName):
+    """Streams the frames of the camera as they are captured, as multipart/x-mixed-replace (MJPEG)."""
+    client = _get_camera(camera)
+    if client is None:
+        return Response(content="Unknown camera.", status_code=404)
+    frames = client.stream()
+    # Errors before the first frame get the status codes of /picture
+    try:
+        first_frame: bytes = await anext(frames)
+    except PermissionError as e:
+        print(f"[Error] /picture/stream permission error: {e}")
+        return Response(content="Camera service unavailable.", status_code=503)
+    except CameraSocketNotFoundError as e:
+        print(f"[Error] /picture/stream camera socket not found: {e}")
+        return Response(content="Camera service unavailable.", status_code=503)
+    except CameraNotAvailableError as e:
+        return Response(content=str(e), status_code=404)
+    except ConnectionError as e:
+        print(f"[Error] /picture/stream connection error: {e}")
+        return Response(content="Camera service unavailable.", status_code=503)
+
+    async def parts():
+        frame = first_frame
+        try:
+            while True:
+                headers = f"--{STREAM_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(frame)}\r\n\r\n"
+                yield headers.encode() + frame + b"\r\n"
+                frame = await anext(frames)
+        except (CameraNotAvailableError, ConnectionError):
+            pass  # the viewer keeps the last frame
+        finally:
+            await frames.aclose()
+
+    return StreamingResponse(
+        parts(),
+        media_type=f"multipart/x-mixed-replace; boundary={STREAM_BOUNDARY}",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/health")
 def health():
     return {"status": "healthy"}
@@ -3,6 +3,7 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 from ..camera_client import CameraClient, CameraSocketNotFoundError, CameraNotAvailableError
+from .. import main
 
 FAKE_IMAGE = b'plant image'
 
@@ -55,4 +56,50 @@ def test_get_picture_permission_error(client: TestClient):
     """Test /picture returns 503 on permission error."""
     with patch.object(CameraClient, 'get_image', side_effect=PermissionError("denied")):
         response = client.get("/picture")
-    assert response.status_code == 503
\ No newline at end of file
+    assert response.status_code == 503
+
+async def fake_stream():
+    yield FAKE_IMAGE
+    yield b'next plant image'
+    raise main.CameraNotAvailableError("camera stopped")
+
+
+async def unavailable_stream():
+    raise main.CameraNotAvailableError("no camera")
+    yield
+
+
+def test_get_picture_stream(client: TestClient):
+    """Test /picture/stream sends the frames as multipart parts until the camera stops."""
+    with patch.object(main.camera_client, 'stream', fake_stream):
+        response = client.get("/picture/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "multipart/x-mixed-replace; boundary=frame"
+    assert response.content.count(b"--frame\r\nContent-Type: image/jpeg\r\n") == 2
+    assert f"Content-Length: {len(FAKE_IMAGE)}\r\n\r\n".encode() + FAKE_IMAGE in response.content
+
+
+def test_get_picture_stream_camera_unavailable(client: TestClient):
+    """Test /picture/stream returns 404 when the camera gives no frame."""
+    with patch.object(main.camera_client, 'stream', unavailable_stream):
+        response = client.get("/picture/stream")
+    assert response.status_code == 404
+
+
+def test_get_picture_other_camera(client: TestClient, tmp_path):
+    """Test /picture reads the logical camera given by name, e.g. a preview with smaller frames."""
+    (tmp_path / "preview.sock").touch()
+    with patch.dict(main.camera_clients, clear=True), patch.object(main.CameraClient, 'CAMERA_SOCK_DIR', tmp_path), \
+            patch.object(main.CameraClient, 'get_image', autospec=True, return_value=FAKE_IMAGE) as get_image:
+        response = client.get("/picture", params={"camera": "preview"})
+    assert response.status_code == 200
+    assert get_image.call_args.args[0].sock_path == tmp_path / "preview.sock"
+
+
+@pytest.mark.parametrize("camera, status_code", [("missing", 404), ("control", 404), ("../preview", 422)])
+def test_get_picture_unknown_camera(client: TestClient, tmp_path, camera: str, status_code: int):
+    """Test /picture and /picture/stream reject the names of cameras the daemon does not serve."""
+    (tmp_path / "control.sock").touch()
+    with patch.object(main.CameraClient, 'CAMERA_SOCK_DIR', tmp_path):
+        assert client.get("/picture", params={"camera": camera}).status_code == status_code
+        assert client.get("/picture/stream", params={"camera": camera}).status_code == status_code
@@ -1,7 +1,13 @@
+import asyncio
 import time
 import pytest
+from socket import socket, AF_UNIX, SOCK_STREAM
+from threading import Thread
 from unittest.mock import patch
-from ..camera_client import CameraClient, CameraSocketNotFoundError, CameraNotAvailableError
+from ..camera_client import (
+    CameraClient, CameraSocketNotFoundError, CameraNotAvailableError, FRAME_HEADER, FRAME_NO_FRAME, FRAME_OK, NEXT,
+    REQUEST, SINCE, SUBSCRIBE
+)
 
 FAKE_FRAME = b'encoded_dummy_image_data'
 NEW_FRAME = b'new_image_data'
@@ -52,4 +58,77 @@ def test_get_image_no_cache_no_camera(camera: CameraClient):
     camera.last_image = None
     with patch.object(camera, 'capture', side_effect=CameraNotAvailableError()):
         with pytest.raises(CameraNotAvailableError):
-            camera.get_image()
\ No newline at end of file
+            camera.get_image()
+
+
+def _serve(
+    sock_path, responses: list[tuple[int, int, bytes]], requests: list, subscribe: bool = False
+) -> tuple[socket, Thread]:
+    """Answers the requests of a single connection with the given frames, all of them to a subscribe."""
+    server = socket(AF_UNIX, SOCK_STREAM)
+    server.bind(str(sock_path))
+    server.listen(1)
+
+    def run():
+        conn, _ = server.accept()
+        with conn:
+            for status, seq, frame in responses:
+                if not subscribe or not requests:
+                    requests.append(REQUEST.unpack(conn.recv(REQUEST.size)))
+                conn.sendall(FRAME_HEADER.pack(status, seq, len(frame)) + frame)
+
+    thread = Thread(target=run, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def test_requests_share_one_connection(camera: CameraClient, tmp_path):
+    """Should send each request over the connection kept open since the first one."""
+    camera.sock_path = tmp_path / "c.sock"
+    requests = []
+    server, thread = _serve(camera.sock_path, [(FRAME_OK, 7, FAKE_FRAME), (FRAME_OK, 8, NEW_FRAME)], requests)
+    with server:
+        assert camera._fetch_frame() == FAKE_FRAME
+        assert camera.next_frame(after_seq=7) == (8, NEW_FRAME)
+        thread.join(timeout=1)
+    assert [(command, seq) for _, _, command, seq in requests] == [(NEXT, 0), (SINCE, 7)]
+
+
+def test_request_without_frame(camera: CameraClient, tmp_path):
+    """Should raise when the camera gives no frame in time."""
+    camera.sock_path = tmp_path / "c.sock"
+    server, thread = _serve(camera.sock_path, [(FRAME_NO_FRAME, 3, b"")], [])
+    with server:
+        with pytest.raises(CameraNotAvailableError):
+            camera._fetch_frame()
+        thread.join(timeout=1)
+
+
+async def _read_stream(camera: CameraClient, count: int) -> list[bytes]:
+    frames = camera.stream()
+    try:
+        return [await anext(frames) for _ in range(count)]
+    finally:
+        await frames.aclose()
+
+
+def test_stream_skips_missing_frames(camera: CameraClient, tmp_path):
+    """Should keep streaming when the camera gives no frame in time after the first one."""
+    camera.sock_path = tmp_path / "c.sock"
+    requests = []
+    responses = [(FRAME_OK, 1, FAKE_FRAME), (FRAME_NO_FRAME, 1, b""), (FRAME_OK, 2, NEW_FRAME)]
+    server, thread = _serve(camera.sock_path, responses, requests, subscribe=True)
+    with server:
+        assert asyncio.run(_read_stream(camera, 2)) == [FAKE_FRAME, NEW_FRAME]
+        thread.join(timeout=1)
+    assert [command for _, _, command, _ in requests] == [SUBSCRIBE]
+
+
+def test_stream_without_first_frame(camera: CameraClient, tmp_path):
+    """Should raise when the camera gives no first frame in time."""
+    camera.sock_path = tmp_path / "c.sock"
+    server, thread = _serve(camera.sock_path, [(FRAME_NO_FRAME, 0, b"")], [], subscribe=True)
+    with server:
+        with pytest.raises(CameraNotAvailableError):
+            asyncio.run(_read_stream(camera, 1))
+        thread.join(timeout=1)
@@ -2,6 +2,7 @@
 import os
 import time
 import signal
+from itertools import takewhile
 from pathlib import Path
 from socket import socket, AF_UNIX, SOCK_STREAM
 from threading import Thread, Lock
@@ -9,6 +10,7 @@ from typing import Dict
 
 from camera_paths import SOCK_DIR, CONTROL_SOCKET
 from camera_commands import CameraCommand as Command
+from camera_profile import CameraProfile
 from physical_camera import PhysicalCamera
 from logical_camera import LogicalCamera
 
@@ -75,10 +77,13 @@ class CameraDaemon:
             data = conn.recv(1024).decode().strip()
             if not data:
                 return
-            parts = data.split(maxsplit=2)
+            parts = data.split()
             cmd = parts[0]
-            arg0 = parts[1] if len(parts) > 1 else None
-            arg1 = parts[2] if len(parts) > 2 else None
+            # Options such as --width 320 follow the arguments
+            args = list(takewhile(lambda part: not part.startswith("--"), parts[1:]))[:2]
+            options = parts[1 + len(args):]
+            arg0 = args[0] if len(args) > 0 else None
+            arg1 = args[1] if len(args) > 1 else None
             response = ""
 
             with self.lock:
@@ -89,7 +94,11 @@ class CameraDaemon:
                         else:
                             logical_name: str = arg0
                             phys_dev: str = arg1 or logical_name
-                            response = self._create_logical_camera(logical_name, phys_dev)
+                            try:
+                                profile = CameraProfile.parse(options)
+                                response = self._create_logical_camera(logical_name, phys_dev, profile)
+                            except ValueError as e:
+                                response = str(e)
 
                     case Command.REWIRE:
                         if not arg0 or not arg1:
@@ -127,13 +136,13 @@ class CameraDaemon:
         self.physical_cameras[phys_dev] = phys_cam
         return phys_cam
     
-    def _create_logical_camera(self, logical_name: str, phys_dev: str) -> str:
+    def _create_logical_camera(self, logical_name: str, phys_dev: str, profile: CameraProfile) -> str:
         if logical_name in self.logical_cameras:
             return f"Logical camera {logical_name} already exists"
 
         phys_cam: PhysicalCamera = self._get_or_create_physical_camera(phys_dev)
 
-        log_cam = LogicalCamera(logical_name, phys_cam, sock_dir=self.sock_dir)
+        log_cam = LogicalCamera(logical_name, phys_cam, sock_dir=self.sock_dir, profile=profile)
         self.logical_cameras[logical_name] = log_cam
         log_cam.run()
         return f"Logical camera created: {log_cam}"
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+# Quality of the frames encoded by the daemon when a profile only sets their size
+DEFAULT_JPEG_QUALITY: int = 85
+
+@dataclass(frozen=True)
+class CameraProfile:
+    """
+    Size and JPEG quality of the frames served by a logical camera.
+    Frames are scaled down to fit in width x height, keeping their aspect ratio, and never scaled up.
+    The default profile serves the frames of the physical camera as they are.
+    """
+    width: int | None = None
+    height: int | None = None
+    quality: int | None = None
+
+    OPTIONS = ("width", "height", "quality")
+
+    @classmethod
+    def parse(cls, tokens: list[str]) -> "CameraProfile":
+        """Parses options such as ["--width", "320", "--quality", "60"]. Raises ValueError if they are invalid."""
+        values = {}
+        if len(tokens) % 2:
+            raise ValueError(f"Missing value for option {tokens[-1]}")
+        for option, value in zip(tokens[::2], tokens[1::2]):
+            name = option.removeprefix("--")
+            if not option.startswith("--") or name not in cls.OPTIONS:
+                raise ValueError(f"Unknown option {option}, expected --width, --height or --quality")
+            if not value.isdigit() or int(value) == 0:
+                raise ValueError(f"{option} must be a positive integer")
+            values[name] = int(value)
+        if values.get("quality", 1) > 100:
+            raise ValueError("--quality must be between 1 and 100")
+        return cls(**values)
+
+    def is_native(self) -> bool:
+        return self.width is None and self.height is None and self.quality is None
+
+    def render(self, jpeg: bytes, source_size: tuple[int, int] | None) -> bytes | None:
+        """
+        Encodes a frame of the physical camera for this profile.
+        Args:
+            jpeg: The frame of the physical camera.
+            source_size: Its width and height, if known, to decode it directly at a reduced size.
+        Returns:
+            The JPEG bytes of the frame for this profile, or None if it could not be decoded or encoded.
+        """
+        if self.is_native():
+            return jpeg
+
+        # libjpeg decodes at 1/2, 1/4 or 1/8 of the size much faster than at full size
+        flag = cv2.IMREAD_COLOR
+        if source_size is not None:
+            scale = self._scale(*source_size)
+            for reduction, reduced_flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                            (2, cv2.IMREAD_REDUCED_COLOR_2)):
+                if scale * reduction <= 1:
+                    flag = reduced_flag
+                    break
+        frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), flag)
+        if frame is None:
+            return None
+
+        height, width = frame.shape[:2]
+        scale = self._scale(width, height)
+        if scale < 1:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+        ret, buf = cv2.imencode(
+            ".jpg",
+            frame,
+            [int(cv2.IMWRITE_JPEG_QUALITY), self.quality or DEFAULT_JPEG_QUALITY]
+        )
+        return buf.tobytes() if ret else None
+
+    def _scale(self, width: int, height: int) -> float:
+        scales = [1.0]
+        if self.width:
+            scales.append(self.width / width)
+        if self.height:
+            scales.append(self.height / height)
+        return min(scales)
+
+    def __str__(self) -> str:
+        if self.is_native():
+            return "native"
+        size = f"{self.width or '*'}x{self.height or '*'}" if self.width or self.height else "native size"
+        return f"{size}, quality {self.quality or DEFAULT_JPEG_QUALITY}"
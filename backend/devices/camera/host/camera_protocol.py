@@ -0,0 +1,29 @@
+import os
+from enum import IntEnum
+from struct import Struct
+
+# Requests sent by clients on the camera sockets: magic, protocol version, command, sequence number.
+# A connection carries any number of requests, each answered by one frame, until a subscribe or until the client
+# closes it. Clients that send no request within LEGACY_REQUEST_TIMEOUT get one frame, prefixed with its 4-byte
+# length only, and the connection is closed
+REQUEST = Struct(">4sBBQ")
+REQUEST_MAGIC = b"CAMR"
+PROTOCOL_VERSION = 1
+# Legacy clients wait this long before they are served, and clients sending their request later are served as legacy
+# ones
+LEGACY_REQUEST_TIMEOUT: float = float(os.environ.get("CAMERA_LEGACY_REQUEST_TIMEOUT") or 0.05)
+
+# Header of each frame sent in response: status, sequence number, length of the JPEG bytes that follow
+FRAME_HEADER = Struct(">BQI")
+
+
+class CameraRequest(IntEnum):
+    SUBSCRIBE = 1  # every new frame, until the client closes the connection
+    NEXT = 2  # the first frame captured after the request
+    SINCE = 3  # the latest frame newer than the sequence number of the request, without waiting if there is one
+
+
+class FrameStatus(IntEnum):
+    OK = 0
+    NO_FRAME = 1  # the camera gave no frame in time: no bytes follow, the sequence number is the latest one
+    BAD_REQUEST = 2  # unknown magic, version or command, the connection is closed
@@ -0,0 +1,24 @@
+from collections import deque
+from threading import Condition
+
+
+class FrameBuffer:
+    """Ring buffer of the last encoded frames of a camera, numbered in capture order."""
+    def __init__(self, size: int = 4):
+        self.frames: deque[tuple[int, bytes]] = deque(maxlen=size)
+        self.seq = 0  # sequence number of the latest frame, 0 before the first one
+        self.condition = Condition()
+
+    def put(self, frame: bytes) -> int:
+        with self.condition:
+            self.seq += 1
+            self.frames.append((self.seq, frame))
+            self.condition.notify_all()
+            return self.seq
+
+    def wait_newer(self, seq: int, timeout: float | None = None) -> tuple[int, bytes] | None:
+        """Waits for a frame newer than seq and returns the latest one, or None on timeout."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.seq > seq, timeout):
+                return None
+            return self.frames[-1]
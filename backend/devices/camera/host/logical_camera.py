@@ -1,22 +1,34 @@
 import os
 from pathlib import Path
+from select import select
 from socket import socket, AF_UNIX, SOCK_STREAM
 from threading import Thread
 
+from camera_profile import CameraProfile
+from camera_protocol import (
+    FRAME_HEADER, LEGACY_REQUEST_TIMEOUT, PROTOCOL_VERSION, REQUEST, REQUEST_MAGIC, CameraRequest, FrameStatus
+)
 from physical_camera import PhysicalCamera
 
 class LogicalCamera:
-    """Serves frames from a physical camera over a UNIX socket on demand."""
-    def __init__(self, logical_name: str, physical_camera: PhysicalCamera, sock_dir: Path):
+    """Serves the frames of a physical camera over a UNIX socket, at the size and quality of its profile."""
+    def __init__(
+        self,
+        logical_name: str,
+        physical_camera: PhysicalCamera,
+        sock_dir: Path,
+        profile: CameraProfile = CameraProfile(),
+    ):
         self.logical_name = logical_name
         self.physical_camera = physical_camera
+        self.profile = profile
         self.sock_dir = sock_dir
         self.sock_path = sock_dir / f"{logical_name}.sock"
 
         self.server = socket(AF_UNIX, SOCK_STREAM)
         self.server.bind(str(self.sock_path))
         os.chmod(self.sock_path, 0o660)
-        self.server.listen(1)
+        self.server.listen(16)
 
         self.running = False
         self.thread = Thread(target=self._serve_loop, daemon=True)
@@ -59,13 +71,91 @@ class LogicalCamera:
 
     def _handle_client(self, conn: socket):
         try:
-            frame = self.physical_camera.capture_frame()
-            if frame:
-                conn.sendall(len(frame).to_bytes(4, "big") + frame)
+            # Legacy clients get the first frame captured after they connected
+            seq = self.physical_camera.request_frames()
+            readable, _, _ = select([conn], [], [], LEGACY_REQUEST_TIMEOUT)
+            if not readable:
+                # Concurrent connections share the frames of the capture thread of the physical camera
+                captured = self.physical_camera.next_frame(after_seq=seq, profile=self.profile)
+                if captured:
+                    _, frame = captured
+                    conn.sendall(len(frame).to_bytes(4, "big") + frame)
+                return
+            self._serve_requests(conn)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client left
         except Exception as e:
             print(f"[LogicalCamera {self.logical_name}] Send error: {e}")
         finally:
             conn.close()
 
+    def _serve_requests(self, conn: socket):
+        """Answers the requests of a client, one frame each, until it closes the connection or subscribes."""
+        request = bytearray(REQUEST.size)
+        view = memoryview(request)
+        while self.running and self._recv_request(conn, view):
+            magic, version, command, seq = REQUEST.unpack(request)
+            if magic != REQUEST_MAGIC or version != PROTOCOL_VERSION:
+                self._send_frame(conn, FrameStatus.BAD_REQUEST, 0)
+                return
+
+            camera = self.physical_camera
+            if command == CameraRequest.SUBSCRIBE:
+                self._stream(conn)
+                return
+            if command == CameraRequest.NEXT:
+                captured = camera.next_frame(profile=self.profile)
+            elif command == CameraRequest.SINCE:
+                # A sequence number ahead of the camera comes from the one a rewire replaced
+                after_seq = seq if seq <= camera.frames.seq else None
+                captured = camera.next_frame(after_seq=after_seq, profile=self.profile)
+            else:
+                self._send_frame(conn, FrameStatus.BAD_REQUEST, 0)
+                return
+
+            if captured is None:
+                self._send_frame(conn, FrameStatus.NO_FRAME, camera.frames.seq)
+            else:
+                self._send_frame(conn, FrameStatus.OK, *captured)
+
+    @staticmethod
+    def _recv_request(conn: socket, view: memoryview) -> bool:
+        """Reads a request into view. Returns False if the client closed the connection before sending one."""
+        received = 0
+        while received < len(view):
+            count = conn.recv_into(view[received:])
+            if count == 0:
+                if received:
+                    raise ConnectionResetError("Incomplete request")
+                return False
+            received += count
+        return True
+
+    @staticmethod
+    def _send_frame(conn: socket, status: FrameStatus, seq: int, frame: bytes = b""):
+        """Sends a frame after its header without copying it into a single buffer."""
+        header = FRAME_HEADER.pack(status, seq, len(frame))
+        sent = conn.sendmsg([header, frame])
+        if sent < len(header):
+            conn.sendall(header[sent:])
+            sent = len(header)
+        conn.sendall(memoryview(frame)[sent - len(header):])
+
+    def _stream(self, conn: socket):
+        """Sends every new frame, skipping the ones captured while the client was still reading the previous one."""
+        camera = None
+        seq = 0
+        while self.running:
+            if camera is not self.physical_camera:
+                # Sequence numbers belong to the physical camera, which a rewire replaces
+                camera = self.physical_camera
+                seq = camera.request_frames()
+            captured = camera.next_frame(after_seq=seq, profile=self.profile)
+            if captured is None:
+                self._send_frame(conn, FrameStatus.NO_FRAME, seq)
+                continue
+            seq, frame = captured
+            self._send_frame(conn, FrameStatus.OK, seq, frame)
+
     def __str__(self) -> str:
-        return f"{self.logical_name} ---> {self.physical_camera}"
\ No newline at end of file
+        return f"{self.logical_name} ---> {self.physical_camera} ({self.profile})"
\ No newline at end of file
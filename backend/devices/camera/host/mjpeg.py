@@ -0,0 +1,71 @@
+SOI = b"\xff\xd8"
+DHT = 0xC4
+SOS = 0xDA
+# Start of frame markers, which hold the size of the image: 0xC0 to 0xCF but DHT, JPG and DAC
+SOF = set(range(0xC0, 0xD0)) - {DHT, 0xC8, 0xCC}
+
+
+def _huffman_table(table_class: int, table_id: int, bits: list[int], values: list[int]) -> bytes:
+    return bytes([table_class << 4 | table_id, *bits, *values])
+
+
+def _runs(*ranges: tuple[int, int]) -> list[int]:
+    return [value for first, last in ranges for value in range(first, last + 1)]
+
+
+# Standard tables of the JPEG specification (ITU T.81, annex K.3), which MJPEG frames of UVC cameras usually omit
+STANDARD_HUFFMAN_TABLES: bytes = b"".join([
+    _huffman_table(0, 0, [0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0], list(range(12))),
+    _huffman_table(1, 0, [0, 2, 1, 3, 3, 2, 4, 3, 5, 5, 4, 4, 0, 0, 1, 0x7D], [
+        0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06, 0x13, 0x51, 0x61, 0x07,
+        0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xA1, 0x08, 0x23, 0x42, 0xB1, 0xC1, 0x15, 0x52, 0xD1, 0xF0,
+        0x24, 0x33, 0x62, 0x72, 0x82, 0x09, 0x0A, 0x16, 0x17, 0x18, 0x19, 0x1A, 0x25, 0x26, 0x27, 0x28,
+        0x29, 0x2A,
+        *_runs((0x34, 0x3A), (0x43, 0x4A), (0x53, 0x5A), (0x63, 0x6A), (0x73, 0x7A), (0x83, 0x8A), (0x92, 0x9A),
+               (0xA2, 0xAA), (0xB2, 0xBA), (0xC2, 0xCA), (0xD2, 0xDA), (0xE1, 0xEA), (0xF1, 0xFA)),
+    ]),
+    _huffman_table(0, 1, [0, 3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0], list(range(12))),
+    _huffman_table(1, 1, [0, 2, 1, 2, 4, 4, 3, 4, 7, 5, 4, 4, 0, 1, 2, 0x77], [
+        0x00, 0x01, 0x02, 0x03, 0x11, 0x04, 0x05, 0x21, 0x31, 0x06, 0x12, 0x41, 0x51, 0x07, 0x61, 0x71,
+        0x13, 0x22, 0x32, 0x81, 0x08, 0x14, 0x42, 0x91, 0xA1, 0xB1, 0xC1, 0x09, 0x23, 0x33, 0x52, 0xF0,
+        0x15, 0x62, 0x72, 0xD1, 0x0A, 0x16, 0x24, 0x34, 0xE1, 0x25, 0xF1, 0x17, 0x18, 0x19, 0x1A, 0x26,
+        0x27, 0x28, 0x29, 0x2A,
+        *_runs((0x35, 0x3A), (0x43, 0x4A), (0x53, 0x5A), (0x63, 0x6A), (0x73, 0x7A), (0x82, 0x8A), (0x92, 0x9A),
+               (0xA2, 0xAA), (0xB2, 0xBA), (0xC2, 0xCA), (0xD2, 0xDA), (0xE2, 0xEA), (0xF2, 0xFA)),
+    ]),
+])
+DHT_SEGMENT: bytes = (
+    bytes([0xFF, DHT]) + (len(STANDARD_HUFFMAN_TABLES) + 2).to_bytes(2, "big") + STANDARD_HUFFMAN_TABLES
+)
+
+
+def is_jpeg(data: bytes) -> bool:
+    return data[:2] == SOI
+
+
+def with_huffman_tables(jpeg: bytes) -> bytes:
+    """Inserts the standard Huffman tables before the scan of a JPEG frame without any, so that all decoders read it."""
+    pos = 2
+    while pos + 4 <= len(jpeg) and jpeg[pos] == 0xFF:
+        marker = jpeg[pos + 1]
+        if marker == DHT:
+            return jpeg
+        if marker == SOS:
+            return jpeg[:pos] + DHT_SEGMENT + jpeg[pos:]
+        pos += 2 + int.from_bytes(jpeg[pos + 2:pos + 4], "big")
+    return jpeg
+
+
+def jpeg_size(jpeg: bytes) -> tuple[int, int] | None:
+    """Returns the width and height of a JPEG frame, read from its header, or None if it has none."""
+    pos = 2
+    while pos + 9 <= len(jpeg) and jpeg[pos] == 0xFF:
+        marker = jpeg[pos + 1]
+        if marker in SOF:
+            height = int.from_bytes(jpeg[pos + 5:pos + 7], "big")
+            width = int.from_bytes(jpeg[pos + 7:pos + 9], "big")
+            return width, height
+        if marker == SOS:
+            return None
+        pos += 2 + int.from_bytes(jpeg[pos + 2:pos + 4], "big")
+    return None
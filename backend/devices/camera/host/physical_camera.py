@@ -1,43 +1,150 @@
 import cv2
-from threading import Lock
+import time
+from threading import Condition, Lock, Thread
+
+from camera_profile import DEFAULT_JPEG_QUALITY, CameraProfile
+from frame_buffer import FrameBuffer
+from mjpeg import is_jpeg, jpeg_size, with_huffman_tables
+
+# The capture stops after this many seconds without a request for a frame, and resumes on the next one
+CAPTURE_IDLE_TIMEOUT: float = 10
+# Seconds to wait before reopening a device that returned no frame, e.g. unplugged
+REOPEN_DELAY: float = 1
+# Seconds a request waits for a frame before giving up
+FRAME_TIMEOUT: float = 5
+MJPG = cv2.VideoWriter_fourcc(*'MJPG')
 
 class PhysicalCamera:
-    def __init__(self, device_path: str):
+    """
+    Captures frames from a device in a thread of its own, while they are requested, and keeps the latest
+    encoded ones in a ring buffer shared by all the logical cameras on the device.
+    In passthrough mode, the JPEG frames of MJPEG devices are kept as they are, without decoding and encoding them
+    again. The daemon falls back to encoding the frames itself when the device delivers another format.
+    Frames requested with a profile are encoded once per frame and profile, then shared by the logical cameras
+    with the same profile.
+    """
+    def __init__(self, device_path: str, passthrough: bool = True):
         self.device_path = device_path
+        self.passthrough = passthrough
         self.lock = Lock()
-        self.cap = cv2.VideoCapture(device_path, cv2.CAP_V4L2)
-        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.cap = self._open()
         self.count = 0
 
-    def capture_frame(self) -> bytes | None:
-        with self.lock:
-            # Flush stale frame
-            self.cap.grab()
+        self.frames = FrameBuffer()
+        # Latest frame encoded for each profile, with its sequence number
+        self.variants: dict[CameraProfile, tuple[int, bytes]] = {}
+        self.variant_locks: dict[CameraProfile, Lock] = {}
+        self.demand = Condition()
+        self.last_request = float("-inf")
+        self.running = True
+        self.thread = Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+
+    def _open(self) -> cv2.VideoCapture:
+        cap = cv2.VideoCapture(self.device_path, cv2.CAP_V4L2)
+        cap.set(cv2.CAP_PROP_FOURCC, MJPG)
+        cap.set(cv2.CAP_PROP_FPS, 30)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # Without conversion to BGR, the V4L2 backend returns the buffers of the device as they are
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 0 if self.passthrough else 1)
+        return cap
+
+    def request_frames(self) -> int:
+        """Resumes the capture if it is idle, and returns the sequence number of the latest frame."""
+        with self.demand:
+            self.last_request = time.monotonic()
+            self.demand.notify()
+            return self.frames.seq
+
+    def next_frame(
+        self, after_seq: int | None = None, timeout: float = FRAME_TIMEOUT, profile: CameraProfile = CameraProfile()
+    ) -> tuple[int, bytes] | None:
+        """
+        Returns the latest frame newer than after_seq, waiting for it if needed.
+        By default, waits for a frame captured after the call, as fresh as a capture of its own.
+        Returns the sequence number and the JPEG bytes of the frame for the profile, or None if none came before
+        the timeout.
+        """
+        seq = self.request_frames()
+        if after_seq is None:
+            after_seq = seq
+        captured = self.frames.wait_newer(after_seq, timeout)
+        if captured is None or profile.is_native():
+            return captured
+
+        seq, frame = captured
+        # The consumers of a profile wait for the one encoding the frame, then share it
+        variant_lock = self.variant_locks.setdefault(profile, Lock())
+        with variant_lock:
+            variant = self.variants.get(profile)
+            if variant is None or variant[0] < seq:
+                encoded = profile.render(frame, jpeg_size(frame))
+                if encoded is None:
+                    return None
+                variant = (seq, encoded)
+                self.variants[profile] = variant
+            return variant
 
-            ret, frame = self.cap.read()
-            if not ret:
-                return None
+    def _capture_loop(self):
+        idle = True
+        while self.running:
+            with self.demand:
+                if time.monotonic() - self.last_request > CAPTURE_IDLE_TIMEOUT:
+                    idle = True
+                    self.demand.wait()
+                    continue
 
-            ret, buf = cv2.imencode(
-                ".jpg",
-                frame,
-                [int(cv2.IMWRITE_JPEG_QUALITY), 85]
-            )
-            if not ret:
-                return None
+            with self.lock:
+                if not self.running:
+                    break
+                if idle:
+                    # Flush the frame left in the driver while idle
+                    self.cap.grab()
+                    idle = False
+                frame = self._capture_frame()
 
-            return buf.tobytes()
+            if frame is not None:
+                self.frames.put(frame)
+                continue
+
+            time.sleep(REOPEN_DELAY)
+            with self.lock:
+                if self.running:
+                    self.cap.release()
+                    self.cap = self._open()
+
+    def _capture_frame(self) -> bytes | None:
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+
+        if self.passthrough:
+            data = frame.tobytes()
+            if is_jpeg(data):
+                return with_huffman_tables(data)
+            print(f"[PhysicalCamera {self.device_path}] Device does not deliver JPEG frames, encoding them instead")
+            # The device is opened again with the conversion to BGR
+            self.passthrough = False
+            return None
+
+        ret, buf = cv2.imencode(
+            ".jpg",
+            frame,
+            [int(cv2.IMWRITE_JPEG_QUALITY), DEFAULT_JPEG_QUALITY]
+        )
+        if not ret:
+            return None
+
+        return buf.tobytes()
 
     def increase_logical_camera_count(self):
         self.count += 1
-    
+
     def decrease_logical_camera_count(self):
         self.count -= 1
         if self.count <= 0:
             self.count = 0
-    
+
     def empty(self) -> bool:
         return self.count == 0
 
@@ -45,5 +152,8 @@ class PhysicalCamera:
         return self.device_path
 
     def shutdown(self):
+        with self.demand:
+            self.running = False
+            self.demand.notify()
         with self.lock:
-            self.cap.release()
\ No newline at end of file
+            self.cap.release()
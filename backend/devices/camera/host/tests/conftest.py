@@ -0,0 +1,61 @@
+import socket
+import threading
+
+import pytest
+
+from camera_profile import CameraProfile
+from frame_buffer import FrameBuffer
+from logical_camera import LogicalCamera
+
+# Short enough for the tests that wait for a missing frame
+FRAME_TIMEOUT = 0.2
+
+
+class FakePhysicalCamera:
+    """Physical camera whose frames are put in its buffer by the tests."""
+    def __init__(self):
+        self.frames = FrameBuffer()
+        self.count = 0
+
+    def request_frames(self) -> int:
+        return self.frames.seq
+
+    def next_frame(self, after_seq=None, timeout=FRAME_TIMEOUT, profile=CameraProfile()):
+        seq = self.request_frames()
+        return self.frames.wait_newer(seq if after_seq is None else after_seq, timeout)
+
+    def put_later(self, frame: bytes, delay: float = 0.05) -> threading.Timer:
+        timer = threading.Timer(delay, self.frames.put, args=(frame,))
+        timer.start()
+        return timer
+
+    def increase_logical_camera_count(self):
+        self.count += 1
+
+    def decrease_logical_camera_count(self):
+        self.count -= 1
+
+
+@pytest.fixture
+def physical_camera():
+    return FakePhysicalCamera()
+
+
+@pytest.fixture
+def logical_camera(physical_camera, tmp_path):
+    camera = LogicalCamera("test", physical_camera, tmp_path)
+    camera.running = True
+    yield camera
+    camera.teardown()
+
+
+@pytest.fixture
+def connection(logical_camera):
+    """Client end of a connection served by the logical camera."""
+    client, server = socket.socketpair()
+    client.settimeout(2)
+    thread = threading.Thread(target=logical_camera._handle_client, args=(server,))
+    thread.start()
+    yield client
+    client.close()
+    thread.join(timeout=2)
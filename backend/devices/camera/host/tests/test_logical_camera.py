@@ -0,0 +1,73 @@
+import socket
+
+import pytest
+
+from camera_protocol import FRAME_HEADER, PROTOCOL_VERSION, REQUEST, REQUEST_MAGIC, CameraRequest, FrameStatus
+
+FRAME = b"\xff\xd8frame"
+NEW_FRAME = b"\xff\xd8new frame"
+
+
+def request(conn: socket.socket, command: int, seq: int = 0, magic: bytes = REQUEST_MAGIC,
+            version: int = PROTOCOL_VERSION) -> tuple[int, int, bytes]:
+    conn.sendall(REQUEST.pack(magic, version, command, seq))
+    status, frame_seq, size = FRAME_HEADER.unpack(conn.recv(FRAME_HEADER.size, socket.MSG_WAITALL))
+    return status, frame_seq, conn.recv(size, socket.MSG_WAITALL) if size else b""
+
+
+def test_next(connection, physical_camera):
+    """Should answer with the first frame captured after the request, over the same connection each time."""
+    physical_camera.frames.put(FRAME)
+    physical_camera.put_later(NEW_FRAME)
+    assert request(connection, CameraRequest.NEXT) == (FrameStatus.OK, 2, NEW_FRAME)
+
+    physical_camera.put_later(FRAME)
+    assert request(connection, CameraRequest.NEXT) == (FrameStatus.OK, 3, FRAME)
+
+
+def test_since(connection, physical_camera):
+    """Should answer at once with the latest frame newer than the sequence number, or with no frame in time."""
+    physical_camera.frames.put(FRAME)
+    physical_camera.frames.put(NEW_FRAME)
+    assert request(connection, CameraRequest.SINCE, 0) == (FrameStatus.OK, 2, NEW_FRAME)
+    assert request(connection, CameraRequest.SINCE, 2) == (FrameStatus.NO_FRAME, 2, b"")
+
+    # Sequence number of the physical camera a rewire replaced
+    physical_camera.put_later(FRAME)
+    assert request(connection, CameraRequest.SINCE, 10) == (FrameStatus.OK, 3, FRAME)
+
+
+def test_subscribe(connection, physical_camera):
+    """Should send each new frame after a subscribe."""
+    physical_camera.put_later(FRAME)
+    connection.sendall(REQUEST.pack(REQUEST_MAGIC, PROTOCOL_VERSION, CameraRequest.SUBSCRIBE, 0))
+    for seq, frame in [(1, FRAME), (2, NEW_FRAME)]:
+        status, frame_seq, size = FRAME_HEADER.unpack(connection.recv(FRAME_HEADER.size, socket.MSG_WAITALL))
+        assert (status, frame_seq, connection.recv(size, socket.MSG_WAITALL)) == (FrameStatus.OK, seq, frame)
+        physical_camera.put_later(NEW_FRAME)
+
+
+@pytest.mark.parametrize("magic, version, command", [
+    (b"JPEG", PROTOCOL_VERSION, CameraRequest.NEXT),
+    (REQUEST_MAGIC, PROTOCOL_VERSION + 1, CameraRequest.NEXT),
+    (REQUEST_MAGIC, PROTOCOL_VERSION, 99),
+])
+def test_bad_request(connection, magic: bytes, version: int, command: int):
+    """Should answer a bad request, then close the connection."""
+    assert request(connection, command, magic=magic, version=version) == (FrameStatus.BAD_REQUEST, 0, b"")
+    assert connection.recv(1) == b""
+
+
+def test_incomplete_request(connection):
+    """Should close the connection without answering a request cut short."""
+    connection.sendall(REQUEST.pack(REQUEST_MAGIC, PROTOCOL_VERSION, CameraRequest.NEXT, 0)[:5])
+    connection.shutdown(socket.SHUT_WR)
+    assert connection.recv(1) == b""
+
+
+def test_legacy(connection, physical_camera):
+    """Should send one length-prefixed frame to a client that sends no request, then close the connection."""
+    physical_camera.put_later(FRAME, delay=0.1)
+    size = int.from_bytes(connection.recv(4, socket.MSG_WAITALL), "big")
+    assert connection.recv(size, socket.MSG_WAITALL) == FRAME
+    assert connection.recv(1) == b""
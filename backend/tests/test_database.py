@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.orm import Session
+from fastapi.testclient import TestClient
+
+from app import database
+from app.database import (
+    InstrumentedNullPool, InstrumentedQueuePool, QueryStats, get_pool_status, get_threadpool_size, query_stats,
+    request_query_stats,
+)
+
+
+def test_instrumented_queue_pool():
+    """Test InstrumentedQueuePool records the checkouts and the ones that timed out"""
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1)
+    connection = engine.connect()
+    status = get_pool_status(engine.pool)
+    assert status["pool"] == "InstrumentedQueuePool", "Should report the class of the pool"
+    assert status["size"] == 1 and status["checked_out"] == 1 and status["checked_in"] == 0, "Should count the checked out connection"
+    assert status["checkouts"] == 1 and status["timeouts"] == 0, "Should count the checkout"
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    status = get_pool_status(engine.pool)
+    assert status["checkouts"] == 2 and status["timeouts"] == 1, "Should count the checkout that timed out"
+    assert status["wait_seconds_max"] >= 0.1, "Should record the time spent waiting for a connection"
+    assert status["wait_seconds_total"] >= status["wait_seconds_max"], "Should add up the waits"
+
+    connection.close()
+    status = get_pool_status(engine.pool)
+    assert status["checked_out"] == 0 and status["checked_in"] == 1, "Should count the connection returned to the pool"
+    engine.dispose()
+
+
+def test_instrumented_null_pool():
+    """Test InstrumentedNullPool records the checkouts without counting connections"""
+    engine = create_engine("sqlite://", poolclass=InstrumentedNullPool)
+    with engine.connect():
+        pass
+    status = get_pool_status(engine.pool)
+    assert status["pool"] == "InstrumentedNullPool", "Should report the class of the pool"
+    assert status["size"] is None and status["checked_out"] is None, "Should not count connections without a QueuePool"
+    assert status["checkouts"] == 1, "Should count the checkout"
+
+
+def test_get_pool_status(client: TestClient):
+    """Test /metrics/pool endpoint to get the state of the connection pool"""
+    response = client.get("/metrics/pool")
+    assert response.status_code == 200, f"Should return 200, got {response.status_code}"
+    assert response.json()["pool"] == "InstrumentedQueuePool", "Should describe the pool of the engine"
+
+
+def test_request_query_stats(db_session: Session):
+    """Test the statements of the engine are recorded for the worker and for the current request"""
+    db_session.execute(text("SELECT 0")) # begins the transaction
+    executed = query_stats.count
+    stats = QueryStats()
+    token = request_query_stats.set(stats)
+    try:
+        db_session.execute(text("SELECT 1"))
+        db_session.execute(text("SELECT 2"))
+    finally:
+        request_query_stats.reset(token)
+    db_session.execute(text("SELECT 3"))
+
+    assert stats.count == 2, "Should count the statements executed during the request"
+    assert stats.seconds_total >= stats.seconds_max > 0, "Should time the statements"
+    assert query_stats.count >= executed + 3, "Should count the statements of the worker"
+
+
+@pytest.mark.parametrize("pool_size, max_overflow, expected", [(50, 10, 60), (5, 10, 40), (5, -1, 40), (0, 10, 40)])
+def test_get_threadpool_size(pool_size: int, max_overflow: int, expected: int):
+    """Test the threadpool only grows to the connections of a bounded pool, and never shrinks below the default"""
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=pool_size, max_overflow=max_overflow)
+    assert get_threadpool_size(40, engine.pool) == expected
+
+
+def test_get_threadpool_size_setting(monkeypatch):
+    """Test THREADPOOL_SIZE overrides the size of the threadpool, and the null pool keeps the default"""
+    engine = create_engine("sqlite://", poolclass=InstrumentedNullPool)
+    assert get_threadpool_size(40, engine.pool) == 40
+    monkeypatch.setattr(database, "THREADPOOL_SIZE", 8)
+    assert get_threadpool_size(40, engine.pool) == 8
@@ -1,3 +1,4 @@
+import datetime
 import time
 from fastapi.testclient import TestClient
 import pytest
@@ -107,6 +108,46 @@ def test_get_actuator_state_non_existent(client: TestClient, db_session: Session
     assert response.status_code == 404, f"Should return 404 for not found, got {response.status_code}"
 
 
+# GET /prototypes/{prototype_id}/actuators/state
+def test_get_prototype_actuators_state(client: TestClient, db_session: Session, dummy_actuators: list[models.Actuator]):
+    """Test /prototypes/{prototype_id}/actuators/state endpoint to get the state of every actuator of a prototype"""
+    prototype_id = db_session.get(models.Sensor, dummy_actuators[0].sensor_id).prototype_id
+    db_session.query(models.Actuator).filter_by(actuator_id=dummy_actuators[0].actuator_id).first().activation_period = 0.5
+    time.sleep(1)
+    now = datetime.datetime.now().astimezone()
+    db_session.add(models.Measurement(sensor_id=dummy_actuators[0].sensor_id, value=0.5, timestamp=now - datetime.timedelta(minutes=1)))
+    db_session.add(models.Measurement(sensor_id=dummy_actuators[0].sensor_id, value=100, timestamp=now))
+
+    response = client.get(f"/prototypes/{prototype_id}/actuators/state")
+    assert response.status_code == 200, f"Should return 200, got {response.status_code}"
+    states = response.json()
+    assert [state["actuator_id"] for state in states] == sorted(actuator.actuator_id for actuator in dummy_actuators), "Should return every actuator of the prototype, sorted by ID"
+
+    states = {state["actuator_id"]: state for state in states}
+    for actuator in dummy_actuators:
+        expected = client.get(f"/actuators/{actuator.actuator_id}/state").json()
+        assert states[actuator.actuator_id]["activate"] == expected["activate"], "Should match the state of the single actuator endpoint"
+        assert states[actuator.actuator_id]["status"] == expected["status"], "Should match the status of the single actuator endpoint"
+    assert states[dummy_actuators[0].actuator_id]["activate"] == True, "Actuator should use the latest measurement of its sensor"
+
+
+def test_get_prototype_actuators_state_empty(client: TestClient, db_session: Session, dummy_prototype: models.Prototype):
+    """Test /prototypes/{prototype_id}/actuators/state endpoint for a prototype without actuators"""
+    response = client.get(f"/prototypes/{dummy_prototype.prototype_id}/actuators/state")
+    assert response.status_code == 200, f"Should return 200, got {response.status_code}"
+    assert response.json() == [], "Should return an empty list"
+
+
+def test_get_prototype_actuators_state_not_found(client: TestClient, db_session: Session, dummy_prototype: models.Prototype):
+    """Test /prototypes/{prototype_id}/actuators/state endpoint for a non-existent prototype"""
+    prototype_id = dummy_prototype.prototype_id
+    db_session.delete(dummy_prototype)
+    db_session.flush()
+
+    response = client.get(f"/prototypes/{prototype_id}/actuators/state")
+    assert response.status_code == 404, f"Should return 404 for a non-existent prototype, got {response.status_code}"
+
+
 # POST /actuators
 def test_post_actuator(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], dummy_actuators: list[models.Actuator]):
     """Test /actuators endpoint to add an actuator"""
@@ -231,4 +272,12 @@ def test_patch_actuator_last_activated_invalid_actuator(client: TestClient, db_s
     """Test /actuators/{actuator_id}/last_activated endpoint with an invalid actuator"""
 
     response = client.patch(f"/actuators/ten/last_activated")
-    assert response.status_code == 422, f"Should return 422 for unprocessable content, got {response.status_code}"
\ No newline at end of file
+    assert response.status_code == 422, f"Should return 422 for unprocessable content, got {response.status_code}"
+
+# GET /actuators/{actuator_id}/state/stream
+def test_stream_actuator_state_non_existent(client: TestClient, db_session: Session, dummy_actuators: list[models.Actuator]):
+    """Test /actuators/{actuator_id}/state/stream endpoint with a non existent actuator"""
+    db_session.delete(dummy_actuators[0])
+
+    response = client.get(f"/actuators/{dummy_actuators[0].actuator_id}/state/stream")
+    assert response.status_code == 404, f"Should return 404 for not found, got {response.status_code}"
@@ -0,0 +1,77 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.services import cam_client
+
+STREAM_CONTENT_TYPE = "multipart/x-mixed-replace; boundary=frame"
+STREAM_BODY = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 4\r\n\r\njpeg\r\n"
+
+
+@pytest.fixture
+def cam_client_response(monkeypatch):
+    """Answers the requests to the cam-client with the response set by the test"""
+    responses = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        responses["path"] = request.url.path
+        responses["params"] = dict(request.url.params)
+        if isinstance(responses["response"], Exception):
+            raise responses["response"]
+        return responses["response"]
+
+    monkeypatch.setattr(cam_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield responses
+
+
+async def stream_parts():
+    """Body of the cam-client, sent as it streams it"""
+    yield STREAM_BODY
+    yield STREAM_BODY
+
+
+# GET /picture/stream
+def test_picture_stream(client: TestClient, cam_client_response: dict):
+    """Test /picture/stream relays the MJPEG stream of the cam-client"""
+    cam_client_response["response"] = httpx.Response(
+        200, headers={"content-type": STREAM_CONTENT_TYPE}, content=stream_parts()
+    )
+    response = client.get("/picture/stream")
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert cam_client_response["path"] == cam_client.PICTURE_STREAM, "Should request the stream of the cam-client"
+    assert response.headers["content-type"] == STREAM_CONTENT_TYPE, "Should keep the boundary of the cam-client"
+    assert response.content == STREAM_BODY * 2, "Should relay the parts as they are"
+
+
+@pytest.mark.parametrize("cam_client_status, expected_status", [(404, 404), (503, 503), (500, 503)])
+def test_picture_stream_error(client: TestClient, cam_client_response: dict, cam_client_status: int, expected_status: int):
+    """Test /picture/stream maps the errors of the cam-client"""
+    cam_client_response["response"] = httpx.Response(cam_client_status, content=b"Camera service unavailable.")
+    response = client.get("/picture/stream")
+    assert response.status_code == expected_status, f"Should return {expected_status}, got {response.status_code}"
+
+
+def test_picture_stream_cam_client_down(client: TestClient, cam_client_response: dict):
+    """Test /picture/stream returns 503 when the cam-client cannot be reached"""
+    cam_client_response["response"] = httpx.ConnectError("Connection refused")
+    response = client.get("/picture/stream")
+    assert response.status_code == 503, f"Should return 503, got {response.status_code}"
+
+
+@pytest.mark.parametrize("path", ["/picture", "/picture/stream"])
+def test_picture_other_camera(client: TestClient, cam_client_response: dict, path: str):
+    """Test /picture and /picture/stream request the logical camera given by name, e.g. a smaller preview"""
+    for params in [{"camera": "preview"}, {}]:
+        cam_client_response["response"] = httpx.Response(
+            200, headers={"content-type": STREAM_CONTENT_TYPE}, content=stream_parts()
+        )
+        response = client.get(path, params=params)
+        assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+        assert cam_client_response["params"] == params, "Should forward the camera to the cam-client, if any"
+
+
+@pytest.mark.parametrize("path", ["/picture", "/picture/stream"])
+def test_picture_invalid_camera(client: TestClient, cam_client_response: dict, path: str):
+    """Test /picture and /picture/stream reject names that are not logical camera names"""
+    response = client.get(path, params={"camera": "../control"})
+    assert response.status_code == 422, f"Should return 422, got {response.status_code}"
+    assert "path" not in cam_client_response, "Should not request the cam-client"
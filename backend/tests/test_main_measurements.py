@@ -1,7 +1,15 @@
+import csv
+import gzip
+import io
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from fastapi.testclient import TestClient
 import pytest
+from sqlalchemy import delete, func, select
 from sqlalchemy.orm import Session
 from app import models
+from app.services.measurement_triggers import ROLLUP_TRIGGERS, measurement_triggers
 
 # GET /measurements/{sensor_id}/last
 def test_get_last_measurement(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
@@ -127,6 +135,160 @@ def test_get_measurements_multiple(client: TestClient, db_session: Session, dumm
     assert len(response.json()) == num_measurements, f"Expected {num_measurements} measurements but got {len(response.json())}"
 
 
+def test_get_measurements_bucket(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/{sensor_id} endpoint aggregating measurements in time buckets"""
+    for timestamp, value in [
+        ('2000-01-01T01:01:00Z', 1.0),
+        ('2000-01-01T01:20:00Z', 3.0),
+        ('2000-01-01T01:59:00Z', 5.0),
+        ('2000-01-01T03:30:00Z', 10.0),
+    ]:
+        db_session.add(models.Measurement(sensor_id=dummy_sensors[0].sensor_id, timestamp=timestamp, value=value))
+
+    response = client.get(f"/measurements/{dummy_sensors[0].sensor_id}", params={"bucket": "PT1H"})
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    buckets = response.json()
+    assert len(buckets) == 2, "Should only return non-empty buckets"
+    assert buckets[0]["timestamp"].startswith("2000-01-01T01:00:00"), "Bucket should start on the hour"
+    assert (buckets[0]["min"], buckets[0]["max"], buckets[0]["avg"], buckets[0]["count"]) == (1.0, 5.0, 3.0, 3)
+    assert (buckets[1]["min"], buckets[1]["max"], buckets[1]["avg"], buckets[1]["count"]) == (10.0, 10.0, 10.0, 1)
+
+
+@pytest.mark.parametrize("max_points", [1, 2, 10, 100])
+def test_get_measurements_max_points(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], max_points):
+    """Test /measurements/{sensor_id} endpoint bounding the number of returned buckets"""
+    for minute in range(0, 300, 3):
+        db_session.add(models.Measurement(
+            sensor_id=dummy_sensors[0].sensor_id,
+            timestamp=f"2000-01-01T{minute // 60:02}:{minute % 60:02}:17Z",
+            value=float(minute),
+        ))
+
+    response = client.get(f"/measurements/{dummy_sensors[0].sensor_id}", params={"max_points": max_points})
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    buckets = response.json()
+    assert 0 < len(buckets) <= max_points, f"Should return at most {max_points} buckets, got {len(buckets)}"
+    assert sum(bucket["count"] for bucket in buckets) == 100, "Buckets should account for every measurement"
+
+
+def test_get_measurements_bucket_time_delta(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], dummy_measurements: list[models.Measurement]):
+    """Test /measurements/{sensor_id} endpoint aggregating measurements within a time delta"""
+    response = client.get(f"/measurements/{dummy_sensors[0].sensor_id}", params={"time_delta": "P1D", "max_points": 10})
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert len(response.json()) == 1, "Should aggregate the recent measurement in one bucket"
+    assert response.json()[0]["count"] == 1, "Bucket should contain the recent measurement"
+
+
+def test_get_measurements_bucket_no_measurements(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/{sensor_id} endpoint aggregating a sensor without measurements"""
+    response = client.get(f"/measurements/{dummy_sensors[0].sensor_id}", params={"max_points": 10})
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert len(response.json()) == 0, "Should respond with zero buckets"
+
+
+@pytest.mark.parametrize("rollups", [True, False])
+def test_get_measurements_bucket_partial_range(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], monkeypatch, rollups):
+    """Test /measurements/{sensor_id} endpoint aggregating a range that starts and ends within rollup buckets, with and without the rollup triggers"""
+    monkeypatch.setattr(measurement_triggers, "names", ROLLUP_TRIGGERS if rollups else frozenset())
+    for hour in range(24):
+        for minute in (0, 30):
+            db_session.add(models.Measurement(
+                sensor_id=dummy_sensors[0].sensor_id,
+                timestamp=f"2000-01-01T{hour:02}:{minute:02}:00Z",
+                value=float(hour),
+            ))
+    if not rollups:
+        # As on a database created by create_all, whose rollups are never filled
+        db_session.flush()
+        db_session.execute(delete(models.MeasurementRollup).where(models.MeasurementRollup.sensor_id == dummy_sensors[0].sensor_id))
+
+    response = client.get(f"/measurements/{dummy_sensors[0].sensor_id}", params={
+        "bucket": "PT6H",
+        "start_time": "2000-01-01T02:15:00Z",
+        "end_time": "2000-01-01T21:45:00Z",
+    })
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    buckets = response.json()
+    assert [bucket["count"] for bucket in buckets] == [7, 12, 12, 8], "Measurements outside the range should be excluded"
+    assert (buckets[0]["min"], buckets[0]["max"]) == (2.0, 5.0), "First bucket should start at the start of the range"
+    assert (buckets[-1]["min"], buckets[-1]["max"]) == (18.0, 21.0), "Last bucket should end at the end of the range"
+    assert buckets[1]["avg"] == 8.5, "Average should be computed over the whole bucket"
+
+
+def test_post_measurements_updates_rollups(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that inserting measurements updates the rollups of every resolution"""
+    measurements = [
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 1.0, "timestamp": "2000-01-01T01:01:10Z"},
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 5.0, "timestamp": "2000-01-01T01:01:50Z"},
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 3.0, "timestamp": "2000-01-01T01:30:00Z"},
+    ]
+    client.post("/measurements/batch", json=measurements)
+    client.post("/measurements/batch", json=[{"sensor_id": dummy_sensors[0].sensor_id, "value": 0.0, "timestamp": "2000-01-01T00:10:00Z"}])
+
+    rollups = db_session.query(models.MeasurementRollup).filter_by(sensor_id=dummy_sensors[0].sensor_id).all()
+    counts = {resolution: [r.count for r in rollups if r.resolution == resolution] for resolution in models.RollupResolution}
+    assert sorted(counts[models.RollupResolution.minute]) == [1, 1, 2], "Should have one rollup per minute"
+    assert sorted(counts[models.RollupResolution.hour]) == [1, 3], "Should have one rollup per hour"
+    assert counts[models.RollupResolution.day] == [4], "Should have one rollup for the day"
+
+    day = next(r for r in rollups if r.resolution == models.RollupResolution.day)
+    assert (day.min, day.max, day.sum) == (0.0, 5.0, 9.0), "Day rollup should aggregate every measurement"
+    assert day.last_value == 3.0, "Last value should be the value of the most recent measurement"
+
+
+def test_delete_measurement_updates_rollups(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that deleting a measurement recomputes the rollups containing it"""
+    response = client.post("/measurements/batch", json=[
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 1.0, "timestamp": "2000-01-01T01:01:10Z"},
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 5.0, "timestamp": "2000-01-01T01:01:50Z"},
+    ])
+    deleted_id = response.json()["inserted"][1]["measurement_id"]
+
+    response = client.delete(f"/measurements/{deleted_id}")
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+
+    rollups = db_session.query(models.MeasurementRollup).filter_by(sensor_id=dummy_sensors[0].sensor_id).all()
+    assert len(rollups) == len(models.RollupResolution), "Should have one rollup per resolution"
+    for rollup in rollups:
+        assert (rollup.count, rollup.max, rollup.last_value) == (1, 1.0, 1.0), "Deleted measurement should not be aggregated"
+
+
+def test_bulk_delete_measurements_updates_rollups(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that deleting several measurements in one statement recomputes or removes their rollups"""
+    client.post("/measurements/batch", json=[
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 1.0, "timestamp": "2000-01-01T01:01:10Z"},
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 5.0, "timestamp": "2000-01-01T01:01:50Z"},
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 3.0, "timestamp": "2000-01-02T01:00:00Z"},
+        {"sensor_id": dummy_sensors[1].sensor_id, "value": 2.0, "timestamp": "2000-01-01T01:01:20Z"},
+    ])
+
+    db_session.query(models.Measurement).filter(
+        models.Measurement.sensor_id == dummy_sensors[0].sensor_id,
+        models.Measurement.value >= 3.0,
+    ).delete()
+
+    rollups = db_session.query(models.MeasurementRollup).filter_by(sensor_id=dummy_sensors[0].sensor_id).all()
+    assert len(rollups) == len(models.RollupResolution), "Rollups of the emptied buckets should be removed"
+    for rollup in rollups:
+        assert (rollup.count, rollup.sum, rollup.max) == (1, 1.0, 1.0), "Deleted measurements should not be aggregated"
+    other = db_session.query(models.MeasurementRollup).filter_by(sensor_id=dummy_sensors[1].sensor_id).all()
+    assert [rollup.count for rollup in other] == [1] * len(models.RollupResolution), "Rollups of other sensors should be kept"
+
+    db_session.query(models.Measurement).filter(models.Measurement.sensor_id == dummy_sensors[0].sensor_id).delete()
+    assert db_session.query(models.MeasurementRollup).filter_by(sensor_id=dummy_sensors[0].sensor_id).count() == 0, "Should remove every rollup of the deleted measurements"
+
+
+@pytest.mark.parametrize("params", [
+    {"bucket": "PT1H", "max_points": 10},
+    {"bucket": "PT0S"},
+    {"max_points": 0},
+])
+def test_get_measurements_invalid_bucket(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], params):
+    """Test /measurements/{sensor_id} endpoint with invalid aggregation parameters"""
+    response = client.get(f"/measurements/{dummy_sensors[0].sensor_id}", params=params)
+    assert response.status_code == 400, f"Should return 400 for bad request, got {response.status_code}"
+
+
 # POST /measurements
 def test_post_measurement(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
     """Test /measurements endpoint to add a measurement"""
@@ -175,4 +337,216 @@ def test_post_measurement_missing_data(client: TestClient, db_session: Session,
     
     for measurement in measurements:
         response = client.post("/measurements", json=measurement)
-        assert response.status_code == 422, f"Should return 422 for unprocessable entity, got {response.status_code}"
\ No newline at end of file
+        assert response.status_code == 422, f"Should return 422 for unprocessable entity, got {response.status_code}"
+
+# POST /measurements/batch
+def test_post_measurements_batch(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/batch endpoint to add several measurements at once"""
+    measurements = [
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 1.0, "timestamp": "2000-01-01T01:01:00.100000Z"},
+        {"sensor_id": dummy_sensors[1].sensor_id, "value": 2.0},
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 3.0, "timestamp": "2000-01-01T01:02:00.100000Z"},
+    ]
+
+    response = client.post("/measurements/batch", json=measurements)
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    data = response.json()
+    assert len(data["rejected"]) == 0, "Should not reject any measurement"
+    assert [m["value"] for m in data["inserted"]] == [1.0, 2.0, 3.0], "Inserted measurements should keep the batch order"
+    assert data["inserted"][0]["timestamp"].startswith("2000-01-01T01:01:00.1"), "Client-side timestamp should be kept"
+    assert data["inserted"][1]["timestamp"] is not None, "Timestamp should default to the time of reception"
+
+    stored = db_session.query(models.Measurement).filter_by(sensor_id=dummy_sensors[0].sensor_id).count()
+    assert stored == 2, f"Should store 2 measurements for the first sensor, got {stored}"
+
+
+def test_post_measurements_batch_unknown_sensor(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/batch endpoint rejects measurements of unknown sensors without aborting the batch"""
+    unknown_sensor_id = dummy_sensors[0].sensor_id
+    db_session.delete(dummy_sensors[0]) # Ensure sensor does not exist
+
+    measurements = [
+        {"sensor_id": dummy_sensors[1].sensor_id, "value": 1.0},
+        {"sensor_id": unknown_sensor_id, "value": 2.0},
+        {"sensor_id": dummy_sensors[2].sensor_id, "value": 3.0},
+    ]
+
+    response = client.post("/measurements/batch", json=measurements)
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    data = response.json()
+    assert len(data["inserted"]) == 2, "Should insert the measurements of existing sensors"
+    assert len(data["rejected"]) == 1, "Should reject the measurement of the unknown sensor"
+    assert data["rejected"][0]["index"] == 1, "Should report the position of the rejected measurement"
+    assert data["rejected"][0]["sensor_id"] == unknown_sensor_id, "Should report the unknown sensor id"
+
+
+def test_post_measurements_batch_empty(client: TestClient, db_session: Session):
+    """Test /measurements/batch endpoint with an empty batch"""
+    response = client.post("/measurements/batch", json=[])
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert response.json() == {"inserted": [], "rejected": []}, "Should neither insert nor reject anything"
+
+
+def test_post_measurements_batch_invalid_value(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/batch endpoint with an invalid measurement"""
+    measurements = [
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": 1.0},
+        {"sensor_id": dummy_sensors[0].sensor_id, "value": "invalid_value"},
+    ]
+
+    response = client.post("/measurements/batch", json=measurements)
+    assert response.status_code == 422, f"Should return 422 for unprocessable entity, got {response.status_code}"
+
+
+# GET /measurements/export
+def test_export_measurements(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], dummy_measurements: list[models.Measurement]):
+    """Test /measurements/export endpoint streams every measurement as CSV"""
+    response = client.get("/measurements/export")
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert response.headers["content-type"].startswith("text/csv"), "Should respond with CSV"
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0][0] == "Sensor ID", "First row should be the header"
+    exported = [row for row in rows[1:] if int(row[0]) in {sensor.sensor_id for sensor in dummy_sensors}]
+    assert len(exported) == len(dummy_measurements), "Should export every measurement of the sensors"
+    sensor_types = {str(sensor.sensor_id): sensor.sensor_type.name for sensor in dummy_sensors}
+    for row in exported:
+        assert row[1] == sensor_types[row[0]], "Sensor type should match the sensor of the measurement"
+
+
+def test_export_measurements_filters(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/export endpoint with sensor and time range filters"""
+    for sensor in dummy_sensors[:2]:
+        for timestamp in ['2000-01-01T01:01:00Z', '2002-01-01T01:01:00Z', '2004-01-01T01:01:00Z']:
+            db_session.add(models.Measurement(sensor_id=sensor.sensor_id, timestamp=timestamp, value=1.0))
+
+    response = client.get("/measurements/export", params={
+        "sensor_id": dummy_sensors[0].sensor_id,
+        "start_time": "2001-01-01T01:01:00Z",
+        "end_time": "2003-01-01T01:01:00Z",
+    })
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert len(rows) == 2, "Should export the header and the only matching measurement"
+    assert rows[1][0] == str(dummy_sensors[0].sensor_id), "Should only export the requested sensor"
+    assert rows[1][3].startswith("2002-01-01"), "Should only export the requested time range"
+
+
+def test_export_measurements_gzip(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], dummy_measurements: list[models.Measurement]):
+    """Test /measurements/export endpoint with gzip compression"""
+    response = client.get("/measurements/export", params={"sensor_id": dummy_sensors[0].sensor_id, "gzip": True})
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert response.headers["content-type"] == "application/gzip", "Should respond with a gzip file"
+
+    rows = list(csv.reader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert len(rows) == 2, "Should export the header and the measurement of the sensor"
+
+
+def test_export_measurements_parquet(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/export endpoint with the parquet format"""
+    for sensor in dummy_sensors[:2]:
+        for timestamp in ['2000-01-01T01:01:00Z', '2000-01-01T01:02:00Z']:
+            db_session.add(models.Measurement(sensor_id=sensor.sensor_id, timestamp=timestamp, value=2.5))
+    sensor_ids = sorted(sensor.sensor_id for sensor in dummy_sensors[:2])
+
+    response = client.get("/measurements/export", params={"format": "parquet", "end_time": "2001-01-01T00:00:00Z"})
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert response.headers["content-type"] == "application/vnd.apache.parquet", "Should respond with a parquet file"
+
+    parquet_file = pq.ParquetFile(io.BytesIO(response.content))
+    table = parquet_file.read()
+    table = table.filter(pc.is_in(table.column("sensor_id"), pa.array(sensor_ids, pa.int32())))
+    assert table.num_rows == 4, "Should export every measurement of the sensors"
+    assert table.schema.field("sensor_type").type == pa.dictionary(pa.int8(), pa.string()), "Sensor type should be dictionary-encoded"
+    assert table.schema.field("timestamp").type == pa.timestamp("us", tz="UTC"), "Timestamps should be in microseconds UTC"
+    assert table.column("sensor_id").to_pylist() == [sensor_ids[0]] * 2 + [sensor_ids[1]] * 2, "Should sort by sensor"
+    group_sensor_ids = [
+        parquet_file.metadata.row_group(i).column(0).statistics.min for i in range(parquet_file.num_row_groups)
+    ]
+    assert len(group_sensor_ids) == len(set(group_sensor_ids)), "Each sensor should be written in its own row group"
+
+
+def test_export_measurements_arrow(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], dummy_measurements: list[models.Measurement]):
+    """Test /measurements/export endpoint with the arrow format"""
+    response = client.get("/measurements/export", params={"format": "arrow", "sensor_id": dummy_sensors[0].sensor_id})
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+
+    table = pa.ipc.open_file(io.BytesIO(response.content)).read_all()
+    assert table.num_rows == 1, "Should export the measurement of the sensor"
+    assert table.column("sensor_type").to_pylist() == [dummy_sensors[0].sensor_type.name], "Sensor type should match"
+    assert table.column("value").to_pylist() == [dummy_measurements[0].value], "Value should match"
+
+    response = client.get("/measurements/export", params={"format": "arrow", "gzip": True})
+    assert response.status_code == 400, f"Should return 400 Bad Request with gzip, got {response.status_code}"
+
+
+# GET /measurements/stream
+def test_stream_measurements_invalid(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/stream endpoint with invalid arguments"""
+    response = client.get("/measurements/stream")
+    assert response.status_code == 400, f"Should return 400 without sensor or prototype, got {response.status_code}"
+
+    response = client.get("/measurements/stream", params={"sensor_id": dummy_sensors[0].sensor_id, "prototype_id": dummy_sensors[0].prototype_id})
+    assert response.status_code == 400, f"Should return 400 with both sensor and prototype, got {response.status_code}"
+
+
+def test_stream_measurements_not_found(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test /measurements/stream endpoint with a non existent sensor"""
+    db_session.delete(dummy_sensors[0])
+
+    response = client.get("/measurements/stream", params={"sensor_id": dummy_sensors[0].sensor_id})
+    assert response.status_code == 404, f"Should return 404 for not found, got {response.status_code}"
+
+
+def test_stream_measurements_backlog(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], monkeypatch: pytest.MonkeyPatch):
+    """Test /measurements/stream endpoint resuming from the last measurement received"""
+    from app import crud, schemas
+    from app.services.measurement_stream import measurement_streams
+
+    def fetch(sensor_ids, after_measurement_id, up_to_measurement_id=None, limit=None):
+        measurements = crud.get_new_measurements(db_session, sensor_ids, after_measurement_id, up_to_measurement_id, limit)
+        return [schemas.Measurement.model_validate(measurement) for measurement in measurements]
+
+    subscribe = measurement_streams.subscribe
+
+    def subscribe_and_end(sensor_ids):
+        # End the stream right after the backlog, so that the response completes
+        queue = subscribe(sensor_ids)
+        queue.put_nowait(None)
+        return queue
+
+    monkeypatch.setattr(measurement_streams, "fetch", fetch)
+    monkeypatch.setattr(measurement_streams, "subscribe", subscribe_and_end)
+
+    measurements = [models.Measurement(sensor_id=dummy_sensors[0].sensor_id, value=value) for value in [1.0, 2.0, 3.0]]
+    db_session.add_all(measurements + [models.Measurement(sensor_id=dummy_sensors[1].sensor_id, value=4.0)])
+    db_session.flush()
+    measurement_ids = [measurement.measurement_id for measurement in measurements]
+    sensor_id, prototype_id = dummy_sensors[0].sensor_id, dummy_sensors[0].prototype_id
+
+    response = client.get("/measurements/stream", params={"prototype_id": prototype_id}, headers={"Last-Event-ID": str(measurement_ids[0])})
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert response.headers["content-type"].startswith("text/event-stream"), "Should respond with an event stream"
+    events = [event for event in response.text.split("\n\n") if event]
+    ids = [int(event.split("\n")[0].removeprefix("id: ")) for event in events]
+    assert ids == sorted(ids), "Should send the measurements in order"
+    assert measurement_ids[0] not in ids, "Should not send the last measurement received"
+    assert set(measurement_ids[1:]) <= set(ids), "Should send the following measurements of the prototype"
+    assert len(ids) == 3, "Should send every following measurement of the prototype sensors"
+
+    response = client.get("/measurements/stream", params={"sensor_id": sensor_id, "last_measurement_id": measurement_ids[1]})
+    events = [event for event in response.text.split("\n\n") if event]
+    assert len(events) == 1 and "event: measurement" in events[0], "Should only send the measurements after last_measurement_id"
+
+
+# POST /Measurement/Random
+def test_post_random_measurements(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], dummy_measurements: list[models.Measurement]):
+    """Test /Measurement/Random endpoint to replace the measurements with synthetic ones"""
+    measurement_ids = [measurement.measurement_id for measurement in dummy_measurements]
+    response = client.post("/Measurement/Random", json={"nb_measurements": 1000, "seed": 1})
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+
+    count = db_session.execute(select(func.count()).select_from(models.Measurement)).scalar()
+    assert count == response.json()["inserted"], "Only the synthetic measurements should remain"
+    previous = select(models.Measurement).where(models.Measurement.measurement_id.in_(measurement_ids))
+    assert not db_session.execute(previous).all(), "Previous measurements should be deleted"
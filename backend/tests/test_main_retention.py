@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+
+# PUT /retention/policies/{sensor_type}
+def test_put_retention_policy(client: TestClient, db_session: Session):
+    """Test that a retention policy is created, then replaced"""
+    response = client.put("/retention/policies/temperature", json={"raw_days": 30, "minute_days": 365})
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    assert response.json() == {
+        "sensor_type": "temperature", "raw_days": 30, "minute_days": 365, "hour_days": None, "day_days": None
+    }, "Response should be the policy"
+
+    client.put("/retention/policies/temperature", json={"raw_days": 60})
+    policies = client.get("/retention/policies").json()
+    assert {
+        "sensor_type": "temperature", "raw_days": 60, "minute_days": None, "hour_days": None, "day_days": None
+    } in policies, "Policy should be replaced"
+
+
+def test_put_retention_policy_invalid_days(client: TestClient, db_session: Session):
+    """Test that retention periods must be positive"""
+    response = client.put("/retention/policies/temperature", json={"raw_days": 0})
+    assert response.status_code == 422, f"Expected status code 422, got {response.status_code}"
+
+
+# DELETE /retention/policies/{sensor_type}
+def test_delete_retention_policy(client: TestClient, db_session: Session):
+    """Test that a retention policy is deleted, and that deleting it again fails"""
+    client.put("/retention/policies/ph", json={"raw_days": 30})
+
+    response = client.delete("/retention/policies/ph")
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    assert "ph" not in [policy["sensor_type"] for policy in client.get("/retention/policies").json()]
+
+    response = client.delete("/retention/policies/ph")
+    assert response.status_code == 404, f"Expected status code 404, got {response.status_code}"
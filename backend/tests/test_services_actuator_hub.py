@@ -0,0 +1,88 @@
+import asyncio
+import datetime
+import pytest
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.services.actuator_hub import ActuatorStateHub, SUBSCRIBER_QUEUE_SIZE, evaluate_actuators
+from app.services.measurement_listener import measurement_listener
+
+
+def make_state(actuator_id: int, activate: bool = True):
+    return schemas.ActuatorState(actuator_id=actuator_id, activate=activate, status="OK", duration=1.0, period=1.0)
+
+
+# Test evaluate_actuators
+def test_evaluate_actuators(db_session: Session, dummy_actuators: list[models.Actuator]):
+    """Test that evaluate_actuators evaluates the actuators of the sensor with its latest measurement"""
+    sensor_id = dummy_actuators[0].sensor_id
+    db_session.add(models.Measurement(sensor_id=sensor_id, value=100, timestamp=datetime.datetime.now().astimezone()))
+    actuator_ids = [actuator.actuator_id for actuator in dummy_actuators]
+
+    states = evaluate_actuators(db_session, sensor_id, actuator_ids)
+    expected_ids = sorted(actuator.actuator_id for actuator in dummy_actuators if actuator.sensor_id == sensor_id)
+    assert sorted(state.actuator_id for state in states) == expected_ids, "Should only evaluate the actuators of the sensor"
+    assert all(isinstance(state, schemas.ActuatorState) for state in states), "Should return ActuatorState"
+
+
+def test_evaluate_actuators_unknown(db_session: Session, dummy_actuators: list[models.Actuator]):
+    """Test evaluate_actuators with actuators that are not linked to the sensor"""
+    states = evaluate_actuators(db_session, dummy_actuators[0].sensor_id, [-1])
+    assert states == [], "Should not evaluate unknown actuators"
+
+
+# Test ActuatorStateHub
+@pytest.mark.asyncio
+async def test_hub_fan_out():
+    """Test that a published state reaches every subscriber of its actuator"""
+    hub = ActuatorStateHub()
+    first = hub.subscribe(1, sensor_id=10)
+    second = hub.subscribe(1, sensor_id=10)
+    other = hub.subscribe(2, sensor_id=20)
+
+    hub.publish([make_state(1)])
+    assert first.get_nowait().actuator_id == 1, "First subscriber should receive the state"
+    assert second.get_nowait().actuator_id == 1, "Second subscriber should receive the same state"
+    assert other.empty(), "Subscribers of other actuators should not receive the state"
+
+    hub.unsubscribe(1, first)
+    hub.publish([make_state(1)])
+    assert first.empty(), "Unsubscribed queue should not receive states"
+    assert not second.empty(), "Remaining subscriber should still receive states"
+
+
+@pytest.mark.asyncio
+async def test_hub_slow_subscriber():
+    """Test that a subscriber falling behind only loses its oldest states"""
+    hub = ActuatorStateHub()
+    queue = hub.subscribe(1, sensor_id=10)
+
+    for _ in range(SUBSCRIBER_QUEUE_SIZE):
+        hub.publish([make_state(1, activate=False)])
+    hub.publish([make_state(1, activate=True)])
+
+    states = [queue.get_nowait() for _ in range(queue.qsize())]
+    assert len(states) == SUBSCRIBER_QUEUE_SIZE, "Queue should stay bounded"
+    assert states[-1].activate == True, "Latest state should be kept"
+
+
+@pytest.mark.asyncio
+async def test_hub_events_poll_without_notify_triggers(db_session: Session, dummy_actuators: list[models.Actuator], monkeypatch):
+    """Test that a state stream polls the database while the listener is connected but the notify triggers are missing"""
+    monkeypatch.setattr(measurement_listener, "connected", True)
+    monkeypatch.setattr(measurement_listener, "notifying", False)
+    actuator = dummy_actuators[0]
+    hub = ActuatorStateHub()
+    evaluated = []
+
+    async def evaluate(sensor_id, actuator_ids):
+        evaluated.append(actuator_ids)
+        return evaluate_actuators(db_session, sensor_id, actuator_ids)
+
+    monkeypatch.setattr(hub, "evaluate", evaluate)
+    events = hub.events(actuator.actuator_id, actuator.sensor_id, [make_state(actuator.actuator_id)], keepalive_seconds=0.1)
+    sent = [await asyncio.wait_for(anext(events), timeout=1) for _ in range(3)]
+    assert sent[0].startswith("event: state\n"), "Should send the initial state first"
+    assert sent[1] == ": keep-alive\n\n", "Should send a keep-alive when the stream is idle"
+    assert sent[2].startswith("event: state\n"), "Should send the polled state"
+    assert evaluated == [[actuator.actuator_id]], "Should evaluate the actuator once per keep-alive"
+    await events.aclose()
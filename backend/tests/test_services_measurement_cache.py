@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+import pytest
+from app import models, schemas
+from app.services.measurement_cache import LastMeasurementCache, last_measurements
+
+TIMESTAMP = datetime.fromisoformat("2000-01-01T01:01:00+00:00")
+
+
+def make_measurement(measurement_id: int, timestamp: datetime, sensor_id: int = 1, value: float = 1.0):
+    return schemas.Measurement(measurement_id=measurement_id, sensor_id=sensor_id, value=value, timestamp=timestamp)
+
+
+@pytest.fixture
+def cache():
+    cache = LastMeasurementCache()
+    cache.on_listener_connection(True)
+    yield cache
+
+
+@pytest.fixture
+def enabled_last_measurements():
+    """Enable the global cache as if the measurement listener was connected"""
+    last_measurements.on_listener_connection(True)
+    yield last_measurements
+    last_measurements.on_listener_connection(False)
+
+
+def test_cache_disabled_without_listener():
+    """Test that the cache is not used while the listener is disconnected"""
+    cache = LastMeasurementCache()
+    cache.fill(make_measurement(1, TIMESTAMP), cache.version(1))
+    assert cache.get(1) is None, "Cache should not be used without listener"
+
+
+def test_cache_fill_and_update(cache: LastMeasurementCache):
+    """Test that the cache keeps the newest measurement of each sensor"""
+    cache.fill(make_measurement(1, TIMESTAMP), cache.version(1))
+    assert cache.get(1).measurement_id == 1, "Cache should return the filled measurement"
+
+    cache.update(make_measurement(2, TIMESTAMP + timedelta(minutes=1)))
+    assert cache.get(1).measurement_id == 2, "Cache should keep the newer measurement"
+
+    cache.update(make_measurement(3, TIMESTAMP - timedelta(minutes=1)))
+    assert cache.get(1).measurement_id == 2, "Cache should ignore older measurements"
+
+    cache.update(make_measurement(4, TIMESTAMP, sensor_id=2))
+    assert cache.get(2) is None, "Cache should not guess the latest measurement of uncached sensors"
+
+
+def test_cache_stale_fill(cache: LastMeasurementCache):
+    """Test that a read started before a write cannot fill the cache"""
+    version = cache.version(1)
+    cache.update(make_measurement(2, TIMESTAMP + timedelta(minutes=1)))
+    cache.fill(make_measurement(1, TIMESTAMP), version)
+    assert cache.get(1) is None, "Stale read should not be cached"
+
+
+def test_cache_notifications(cache: LastMeasurementCache):
+    """Test the handling of the database notifications"""
+    cache.fill(make_measurement(1, TIMESTAMP), cache.version(1))
+    cache.on_measurement({"measurement_id": 2, "sensor_id": 1, "value": 3.0, "timestamp": "2000-01-01T01:02:00+00:00"})
+    assert cache.get(1).measurement_id == 2, "Notified measurement should replace the cached one"
+
+    cache.on_measurement({"sensor_id": 1, "deleted": True})
+    assert cache.get(1) is None, "Deleting measurements should invalidate the sensor"
+
+    cache.fill(make_measurement(2, TIMESTAMP), cache.version(1))
+    cache.on_listener_connection(False)
+    cache.on_listener_connection(True)
+    assert cache.get(1) is None, "Cache should be emptied when the listener reconnects"
+
+
+def test_last_measurement_cached(client: TestClient, db_session: Session, dummy_sensors: list[models.Sensor], enabled_last_measurements: LastMeasurementCache):
+    """Test /measurements/{sensor_id}/last endpoint with the last measurement cache"""
+    sensor_id = dummy_sensors[0].sensor_id
+    client.post("/measurements", json={"sensor_id": sensor_id, "value": 1.0, "timestamp": "2000-01-01T01:01:00Z"})
+    response = client.get(f"/measurements/{sensor_id}/last")
+    assert response.status_code == 200, f"Should return 200 OK, got {response.status_code}"
+    assert enabled_last_measurements.get(sensor_id) is not None, "Last measurement should be cached after a read"
+
+    response = client.post("/measurements", json={"sensor_id": sensor_id, "value": 2.0, "timestamp": "2000-01-01T01:02:00Z"})
+    assert enabled_last_measurements.get(sensor_id).value == 2.0, "Posting a newer measurement should update the cache"
+    assert client.get(f"/measurements/{sensor_id}/last").json()["value"] == 2.0, "Should return the new measurement"
+
+    client.delete(f"/measurements/{response.json()['measurement_id']}")
+    assert enabled_last_measurements.get(sensor_id) is None, "Deleting a measurement should invalidate the cache"
+    assert client.get(f"/measurements/{sensor_id}/last").json()["value"] == 1.0, "Should return the previous measurement"
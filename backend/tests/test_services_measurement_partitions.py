@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from app import models
+from app.services.measurement_partitions import (
+    PARTITION_MONTHS_AHEAD,
+    add_months,
+    create_measurement_partitions,
+    drop_measurement_partitions,
+    get_measurement_partitions,
+    maintain_measurement_partitions,
+    month_start,
+)
+
+
+def add_measurement(db_session: Session, sensor: models.Sensor, timestamp: datetime) -> models.Measurement:
+    measurement = models.Measurement(sensor_id=sensor.sensor_id, value=1.0, timestamp=timestamp)
+    db_session.add(measurement)
+    db_session.flush()
+    return measurement
+
+
+def get_partition(db_session: Session, measurement: models.Measurement) -> str:
+    return db_session.execute(
+        text("SELECT tableoid::regclass::text FROM measurements WHERE measurement_id = :id"),
+        {"id": measurement.measurement_id},
+    ).scalar()
+
+
+def test_add_months():
+    """Test that months are added across years"""
+    month = datetime(2026, 11, 1, tzinfo=timezone.utc)
+    assert add_months(month, 2) == datetime(2027, 1, 1, tzinfo=timezone.utc), "Should roll over to the next year"
+    assert add_months(month, -11) == datetime(2025, 12, 1, tzinfo=timezone.utc), "Should roll back to the past year"
+
+
+def test_month_start_is_utc():
+    """Test that months are aligned on UTC"""
+    timestamp = datetime.fromisoformat("2026-11-01T01:00:00+02:00")
+    assert month_start(timestamp) == datetime(2026, 10, 1, tzinfo=timezone.utc), "Should be the UTC month"
+
+
+def test_maintain_measurement_partitions(db_session: Session):
+    """Test that the partitions of the current and next months exist"""
+    maintain_measurement_partitions(db_session)
+    months = set(get_measurement_partitions(db_session).values())
+    current = month_start(datetime.now(timezone.utc))
+    for months_ahead in range(PARTITION_MONTHS_AHEAD + 1):
+        assert add_months(current, months_ahead) in months, f"Partition {months_ahead} months ahead should exist"
+
+
+def test_create_measurement_partitions_moves_default_rows(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that the measurements of a new partition are moved out of the default partition"""
+    measurement = add_measurement(db_session, dummy_sensors[0], datetime(2300, 5, 10, tzinfo=timezone.utc))
+    assert get_partition(db_session, measurement) == "measurements_default", "Should be in the default partition"
+
+    created = create_measurement_partitions(
+        db_session, datetime(2300, 5, 1, tzinfo=timezone.utc), datetime(2300, 6, 1, tzinfo=timezone.utc)
+    )
+
+    assert created == ["measurements_y2300m05"], "Should create the partition of the month"
+    assert get_partition(db_session, measurement) == "measurements_y2300m05", "Should be moved to the new partition"
+    assert create_measurement_partitions(
+        db_session, datetime(2300, 5, 1, tzinfo=timezone.utc), datetime(2300, 6, 1, tzinfo=timezone.utc)
+    ) == [], "Should not create existing partitions"
+
+
+def test_drop_measurement_partitions(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that old partitions are dropped and their rollups kept"""
+    create_measurement_partitions(
+        db_session, datetime(1990, 1, 1, tzinfo=timezone.utc), datetime(1990, 3, 1, tzinfo=timezone.utc)
+    )
+    sensor = dummy_sensors[0]
+    dropped = add_measurement(db_session, sensor, datetime(1990, 1, 15, tzinfo=timezone.utc))
+    kept = add_measurement(db_session, sensor, datetime(1990, 2, 15, tzinfo=timezone.utc))
+    dropped_id, kept_id = dropped.measurement_id, kept.measurement_id
+    rollups = select(func.count()).select_from(models.MeasurementRollup).where(
+        models.MeasurementRollup.sensor_id == sensor.sensor_id
+    )
+    rollup_count = db_session.execute(rollups).scalar()
+
+    result = drop_measurement_partitions(db_session, datetime(1990, 2, 1, tzinfo=timezone.utc))
+
+    assert result == {"measurements_y1990m01": 1}, "Should drop the partition of January only"
+    assert "measurements_y1990m01" not in get_measurement_partitions(db_session), "Partition should be dropped"
+    remaining = db_session.execute(
+        select(models.Measurement.measurement_id).where(models.Measurement.sensor_id == sensor.sensor_id)
+    ).scalars().all()
+    assert dropped_id not in remaining, "Measurement of January should be dropped"
+    assert kept_id in remaining, "Measurement of February should be kept"
+    assert db_session.execute(rollups).scalar() == rollup_count, "Rollups should be kept"
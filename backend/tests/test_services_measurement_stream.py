@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from sqlalchemy.orm import Session
+from app import crud, models, schemas
+from app.services.measurement_listener import measurement_listener
+from app.services.measurement_stream import MeasurementStreamHub, SUBSCRIBER_QUEUE_SIZE
+
+
+class SessionMeasurementStreamHub(MeasurementStreamHub):
+    """Hub reading the measurements through the test session"""
+
+    def __init__(self, db_session: Session):
+        super().__init__()
+        self.db_session = db_session
+
+    def fetch(self, sensor_ids, after_measurement_id, up_to_measurement_id=None, limit=None):
+        measurements = crud.get_new_measurements(
+            self.db_session, sensor_ids, after_measurement_id, up_to_measurement_id=up_to_measurement_id, limit=limit
+        )
+        return [schemas.Measurement.model_validate(measurement) for measurement in measurements]
+
+    def max_measurement_id(self):
+        return crud.get_max_measurement_id(self.db_session)
+
+
+def add_measurements(db_session: Session, sensor_id: int, values: list[float]):
+    measurements = [models.Measurement(sensor_id=sensor_id, value=value) for value in values]
+    db_session.add_all(measurements)
+    db_session.flush()
+    return [schemas.Measurement.model_validate(measurement) for measurement in measurements]
+
+
+async def next_events(events, count: int):
+    return [await asyncio.wait_for(anext(events), timeout=1) for _ in range(count)]
+
+
+# Test MeasurementStreamHub.events
+@pytest.mark.asyncio
+async def test_stream_backlog_then_live(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that a stream sends the backlog, then the new measurements, without duplicates"""
+    hub = SessionMeasurementStreamHub(db_session)
+    sensor_id = dummy_sensors[0].sensor_id
+    old = add_measurements(db_session, sensor_id, [1.0, 2.0, 3.0])
+    add_measurements(db_session, dummy_sensors[1].sensor_id, [4.0])
+
+    events = hub.events([sensor_id], old[0].measurement_id, keepalive_seconds=10)
+    backlog = await next_events(events, 2)
+    assert [event.split("\n")[0] for event in backlog] == [f"id: {measurement.measurement_id}" for measurement in old[1:]], "Should send the measurements after the last one received"
+
+    new = add_measurements(db_session, sensor_id, [5.0, 6.0])
+    hub.publish(sensor_id, old[1:] + new)
+    live = await next_events(events, 2)
+    assert [event.split("\n")[0] for event in live] == [f"id: {measurement.measurement_id}" for measurement in new], "Should only send the measurements that were not sent yet"
+    assert "event: measurement" in live[0], "Should send measurement events"
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_when_behind(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that the stream of a subscriber falling behind is ended"""
+    hub = SessionMeasurementStreamHub(db_session)
+    sensor_id = dummy_sensors[0].sensor_id
+    queue = hub.subscribe([sensor_id])
+    measurement = schemas.Measurement(measurement_id=1, sensor_id=sensor_id, value=1.0, timestamp="2000-01-01T01:01:00Z")
+
+    for _ in range(SUBSCRIBER_QUEUE_SIZE + 1):
+        hub.publish(sensor_id, [measurement])
+    assert queue.get_nowait() is None, "Stream of a subscriber falling behind should be ended"
+
+    hub.unsubscribe([sensor_id], queue)
+    hub.publish(sensor_id, [measurement])
+    assert queue.empty(), "Unsubscribed queue should not receive measurements"
+
+
+@pytest.mark.asyncio
+async def test_stream_end_all(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that every stream ends when notifications may have been missed"""
+    hub = SessionMeasurementStreamHub(db_session)
+    events = hub.events([dummy_sensors[0].sensor_id], None, keepalive_seconds=10)
+    pending = asyncio.ensure_future(anext(events))
+    await asyncio.sleep(0.1)
+
+    hub.end_all()
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(pending, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_stream_polls_without_notify_triggers(db_session: Session, dummy_sensors: list[models.Sensor], monkeypatch):
+    """Test that a stream polls the database while the listener is connected but the notify triggers are missing"""
+    monkeypatch.setattr(measurement_listener, "connected", True)
+    monkeypatch.setattr(measurement_listener, "notifying", False)
+    hub = SessionMeasurementStreamHub(db_session)
+    sensor_id = dummy_sensors[0].sensor_id
+    events = hub.events([sensor_id], None, keepalive_seconds=0.1)
+    pending = asyncio.ensure_future(anext(events))
+    await asyncio.sleep(0.05)
+
+    new = add_measurements(db_session, sensor_id, [1.0])
+    polled = [await asyncio.wait_for(pending, timeout=1)] + await next_events(events, 1)
+    assert polled[0] == ": keep-alive\n\n", "Should send a keep-alive when the stream is idle"
+    assert polled[1].startswith(f"id: {new[0].measurement_id}\n"), "Should send the polled measurement"
+    await events.aclose()
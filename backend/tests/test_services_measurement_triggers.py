@@ -0,0 +1,59 @@
+import threading
+from unittest.mock import patch
+import psycopg2
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.database import LISTEN_DATABASE_URL
+from app.services.measurement_listener import MeasurementListener
+from app.services.measurement_triggers import MeasurementTriggers
+
+
+class RecordingSubscriber:
+    def __init__(self):
+        self.connections = []
+
+    def on_listener_connection(self, connected: bool):
+        self.connections.append(connected)
+
+    def on_measurement(self, payload: dict):
+        pass
+
+
+def run_listener(listener: MeasurementListener, seconds: float = 0.5):
+    """Runs the listening loop of the listener on a connection of its own for a while"""
+    connection = psycopg2.connect(LISTEN_DATABASE_URL)
+    thread = threading.Thread(target=listener._listen, args=(connection,))
+    thread.start()
+    listener._stop.wait(seconds)
+    listener._stop.set()
+    thread.join()
+    connection.close()
+
+
+def test_check_migrated_database(db_session: Session):
+    triggers = MeasurementTriggers()
+    triggers.check(db_session)
+    assert triggers.notify
+    assert triggers.rollups
+
+
+def test_check_missing_trigger(db_session: Session):
+    """A database created by create_all has none of the triggers of the migrations"""
+    db_session.execute(text("DROP TRIGGER measurements_notify_delete ON measurements"))
+    triggers = MeasurementTriggers()
+    triggers.check(db_session)
+    assert not triggers.notify
+    assert triggers.rollups
+
+
+@pytest.mark.parametrize("has_triggers", [True, False])
+def test_listener_notifying_with_triggers(has_triggers: bool):
+    listener = MeasurementListener(LISTEN_DATABASE_URL)
+    subscriber = RecordingSubscriber()
+    listener.subscribe(subscriber)
+    with patch.object(MeasurementListener, "_has_notify_triggers", return_value=has_triggers):
+        run_listener(listener)
+    assert listener.connected
+    assert listener.notifying == has_triggers
+    assert subscriber.connections == ([True] if has_triggers else [])
@@ -0,0 +1,35 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.request_metrics import Histogram
+
+
+def test_histogram():
+    """Test observations are counted in cumulative buckets"""
+    histogram = Histogram((1, 5))
+    for value in (0, 1, 3, 10):
+        histogram.observe(value)
+
+    assert histogram.lines("requests", 'route="/"') == [
+        'requests_bucket{route="/",le="1"} 2',
+        'requests_bucket{route="/",le="5"} 3',
+        'requests_bucket{route="/",le="+Inf"} 4',
+        'requests_sum{route="/"} 14.0',
+        'requests_count{route="/"} 4',
+    ], "Should render the buckets, sum and count"
+
+
+def test_metrics(client: TestClient, db_session: Session, dummy_prototype: models.Prototype):
+    """Test /metrics reports the requests per route template, with their SQL statements"""
+    client.get(f"/sensors/{dummy_prototype.prototype_id}")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200, f"Should return 200, got {response.status_code}"
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4"), "Should use the Prometheus format"
+    labels = 'method="GET",route="/sensors/{prototype_id}"'
+    assert f'aquapoly_http_requests_total{{{labels},status="200"}}' in response.text, "Should count the request"
+    assert f"aquapoly_http_request_duration_seconds_count{{{labels}}}" in response.text, "Should time the request"
+    assert f'aquapoly_http_request_db_queries_bucket{{{labels},le="0"}} 0' in response.text, \
+        "Should count the statements reading the sensors"
+    assert "aquapoly_db_pool_checkouts_total" in response.text, "Should report the connection pool"
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app import models
+from app.classes.rollup_resolution import RollupResolution
+from app.classes.sensor_type import SensorType
+from app.services.measurement_partitions import create_measurement_partitions
+from app.services.retention import enforce_retention_policies
+
+NOW = datetime.now(timezone.utc)
+
+
+def add_measurements(db_session: Session, sensor: models.Sensor, timestamps: list[datetime]) -> list[int]:
+    measurements = [models.Measurement(sensor_id=sensor.sensor_id, value=1.0, timestamp=t) for t in timestamps]
+    db_session.add_all(measurements)
+    db_session.flush()
+    return [measurement.measurement_id for measurement in measurements]
+
+
+def get_measurement_ids(db_session: Session, sensor: models.Sensor) -> list[int]:
+    return db_session.execute(
+        select(models.Measurement.measurement_id).where(models.Measurement.sensor_id == sensor.sensor_id)
+    ).scalars().all()
+
+
+def get_rollup_resolutions(db_session: Session, sensor: models.Sensor) -> list[RollupResolution]:
+    return db_session.execute(
+        select(models.MeasurementRollup.resolution).where(models.MeasurementRollup.sensor_id == sensor.sensor_id)
+    ).scalars().all()
+
+
+def test_enforce_retention_deletes_old_measurements(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that measurements older than the raw retention are deleted in batches and their rollups kept"""
+    sensor = dummy_sensors[0]
+    db_session.add(models.RetentionPolicy(sensor_type=sensor.sensor_type, raw_days=30))
+    old_ids = add_measurements(db_session, sensor, [NOW - timedelta(days=40, minutes=i) for i in range(5)])
+    recent_ids = add_measurements(db_session, sensor, [NOW - timedelta(days=1)])
+
+    run = enforce_retention_policies(db_session, now=NOW, batch_size=2)
+
+    remaining = get_measurement_ids(db_session, sensor)
+    assert not set(old_ids) & set(remaining), "Old measurements should be deleted"
+    assert recent_ids[0] in remaining, "Recent measurement should be kept"
+    assert run.measurements_deleted >= len(old_ids), "Run should report the deleted measurements"
+    assert get_rollup_resolutions(db_session, sensor).count(RollupResolution.minute) == 6, "Rollups should be kept"
+
+
+def test_enforce_retention_deletes_old_rollups(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that rollups are deleted per resolution"""
+    sensor = dummy_sensors[0]
+    db_session.add(models.RetentionPolicy(sensor_type=sensor.sensor_type, minute_days=7))
+    add_measurements(db_session, sensor, [NOW - timedelta(days=10)])
+
+    run = enforce_retention_policies(db_session, now=NOW)
+
+    resolutions = get_rollup_resolutions(db_session, sensor)
+    assert RollupResolution.minute not in resolutions, "Old minute rollup should be deleted"
+    assert RollupResolution.hour in resolutions, "Hour rollup should be kept"
+    assert len(get_measurement_ids(db_session, sensor)) == 1, "Raw measurement should be kept"
+    assert run.rollups_deleted >= 1, "Run should report the deleted rollups"
+
+
+def test_enforce_retention_without_policy(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that the measurements of sensor types without a policy are kept"""
+    sensor = dummy_sensors[0]
+    add_measurements(db_session, sensor, [NOW - timedelta(days=3650)])
+
+    enforce_retention_policies(db_session, now=NOW)
+
+    assert len(get_measurement_ids(db_session, sensor)) == 1, "Measurement should be kept"
+
+
+def test_enforce_retention_drops_partitions(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that partitions past the retention of every sensor type are dropped"""
+    create_measurement_partitions(
+        db_session, datetime(1990, 1, 1, tzinfo=timezone.utc), datetime(1990, 2, 1, tzinfo=timezone.utc)
+    )
+    sensor = dummy_sensors[0]
+    add_measurements(db_session, sensor, [datetime(1990, 1, 15, tzinfo=timezone.utc)])
+    for sensor_type in SensorType:
+        db_session.add(models.RetentionPolicy(sensor_type=sensor_type, raw_days=365))
+    db_session.flush()
+
+    run = enforce_retention_policies(db_session, now=NOW)
+
+    assert run.partitions_dropped >= 1, "The partition of January 1990 should be dropped"
+    assert run.measurements_dropped >= 1, "Run should report the dropped measurements"
+    assert not get_measurement_ids(db_session, sensor), "Measurement should be dropped"
+    assert run.run_id is not None, "Run should be saved"
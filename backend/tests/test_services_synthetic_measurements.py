@@ -0,0 +1,36 @@
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app import models
+from app.services.synthetic_measurements import generate_measurements, recurrence
+
+
+def test_recurrence():
+    """Test that the vectorized recurrence matches the loop"""
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(2, 5000))
+    initial = np.array([1.0, -1.0])
+    for decay in (0.0, 0.5, 0.99, 1.0):
+        expected = np.empty_like(x)
+        previous = initial
+        for t in range(x.shape[1]):
+            previous = decay * previous + x[:, t]
+            expected[:, t] = previous
+        assert np.allclose(recurrence(x, decay, initial), expected), f"Recurrence with decay {decay} should match"
+
+
+def test_generate_measurements(db_session: Session, dummy_sensors: list[models.Sensor]):
+    """Test that the measurements are inserted in chunks, within the critical thresholds"""
+    sensor_ids = [sensor.sensor_id for sensor in dummy_sensors]
+    count = select(func.count()).select_from(models.Measurement).where(models.Measurement.sensor_id.in_(sensor_ids))
+
+    inserted = generate_measurements(db_session, 2000, 0.8, 0.1, 0.1, 0.2, 0.5, 0.15, seed=1, chunk_measurements=100)
+
+    sensors = db_session.execute(select(func.count()).select_from(models.Sensor)).scalar()
+    assert inserted == 2000 // sensors * sensors, "Should insert the measurements of every period"
+    assert db_session.execute(count).scalar() == inserted // sensors * len(dummy_sensors), "Every sensor should have measurements"
+    low, high = db_session.execute(
+        select(func.min(models.Measurement.value), func.max(models.Measurement.value))
+        .where(models.Measurement.sensor_id.in_(sensor_ids))
+    ).one()
+    assert low >= 0 and high <= 3, "Values should stay within the critical thresholds"